@@ -0,0 +1,175 @@
+#!usr/bin/env python3
+"""Dispatch hot path benchmark suite.
+
+``python -m benchmarks run`` measures runtime startup and tracing overhead, then end
+to end dispatch, working memory, classification and serialization for each workload
+size, storing results as JSON keyed by commit.
+``python -m benchmarks compare BASELINE CURRENT`` reports metrics regressing more
+than a tolerance, exiting with a non zero status if any does.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+from benchmarks import (
+    bench_classification,
+    bench_codecs,
+    bench_dispatch,
+    bench_memory,
+    bench_models,
+    bench_startup,
+    bench_tracing,
+)
+
+DEFAULT_OUTPUT = Path(".benchmarks")
+LOWER = "lower"
+HIGHER = "higher"
+# tracing overhead is measured on a single, typical, request size
+TRACING_SIZE = 100
+
+
+def commit() -> str:
+    """Provide current commit, `unknown` outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def metric(value: float, unit: str, better: str = LOWER) -> dict:
+    """Build metric entry."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def collect(sizes, repeat: int, number: int) -> Dict[str, dict]:
+    """Run every benchmark for each workload size."""
+    metrics = {}
+    for runtime in bench_startup.RUNTIMES:
+        result = bench_startup.run(runtime)
+        metrics[f"startup.{runtime}.time"] = metric(result["startup"], "s")
+        if result["rss"]:
+            metrics[f"startup.{runtime}.rss"] = metric(result["rss"], "bytes")
+    size = TRACING_SIZE
+    for config, result in bench_tracing.run(
+        size, bench_dispatch.default_requests(size)
+    ).items():
+        metrics[f"tracing.{config}.per_request"] = metric(result["per_request"], "s")
+    for size in sizes:
+        result = bench_dispatch.run(size, bench_dispatch.default_requests(size))
+        metrics[f"dispatch.{size}.requests_per_second"] = metric(
+            result["requests_per_second"], "requests/s", HIGHER
+        )
+        metrics[f"dispatch.{size}.queries_per_second"] = metric(
+            result["queries_per_second"], "queries/s", HIGHER
+        )
+        metrics[f"dispatch.{size}.latency_p50"] = metric(result["p50"], "s")
+        metrics[f"dispatch.{size}.latency_p99"] = metric(result["p99"], "s")
+
+        result = bench_memory.run(size)
+        metrics[f"memory.{size}.peak_per_query"] = metric(
+            result["peak_per_query"], "bytes/query"
+        )
+
+        result = bench_classification.run(size, repeat, number)
+        metrics[f"classification.{size}.classifier"] = metric(
+            result["classifier"], "s/query"
+        )
+
+        result = bench_models.run(size, repeat, number)
+        metrics[f"serialization.{size}.operation"] = metric(
+            result["trusted"], "s/operation"
+        )
+
+        for codec, result in bench_codecs.run(size, repeat, number).items():
+            metrics[f"codec.{size}.{codec}.encode"] = metric(result["encode"], "s")
+            metrics[f"codec.{size}.{codec}.decode"] = metric(result["decode"], "s")
+            metrics[f"codec.{size}.{codec}.size"] = metric(result["size"], "bytes")
+    return metrics
+
+
+def run(args: argparse.Namespace) -> int:
+    """Run suite and store results."""
+    report = {
+        "commit": commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": collect(args.sizes, args.repeat, args.number),
+    }
+    output = args.output
+    if output.suffix != ".json":
+        output.mkdir(parents=True, exist_ok=True)
+        output = output / f"{report['commit']}.json"
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    for name, entry in report["metrics"].items():
+        print(f"{name:<50} {entry['value']:>14.6g} {entry['unit']}")
+    print(f"Results stored at {output}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Compare two stored results, failing on regressions above tolerance."""
+    baseline = json.loads(args.baseline.read_text())["metrics"]
+    current = json.loads(args.current.read_text())["metrics"]
+    regressions = 0
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name]["value"], current[name]["value"]
+        if not before:
+            continue
+        change = (after - before) / before
+        if current[name]["better"] == HIGHER:
+            change = -change
+        regressed = change > args.tolerance
+        regressions += regressed
+        print(
+            f"{'REGRESSION' if regressed else 'ok':<10} {name:<50} "
+            f"{before:>12.6g} -> {after:>12.6g} ({change:+.1%})"
+        )
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    """Parse command line and run selected command."""
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmark suite")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 5000])
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--number", type=int, default=10)
+    run_parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help="results file or directory, stored as <commit>.json in directories",
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare stored results")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="relative worsening tolerated before reporting a regression",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!usr/bin/env python3
+"""Source classification micro-benchmark.
+
+Compares the handler chain, built per message, against the compiled classifier used
+by :class:`~pipo_dispatch.audio_source.source_oracle.SourceOracle`.
+
+Run with ``python -m benchmarks.bench_classification``.
+"""
+
+import argparse
+import timeit
+from typing import List
+
+from pipo_dispatch.audio_source.source_oracle import SourceOracle
+from pipo_dispatch.audio_source.spotify_handler import SpotifyHandler
+from pipo_dispatch.audio_source.youtube_handler import (
+    YoutubeHandler,
+    YoutubeQueryHandler,
+)
+
+SAMPLE_QUERIES = (
+    "https://www.youtube.com/watch?v=1V_xRb0x9aw",
+    "https://www.youtube.com/watch?v=BaW_jenozKc&list=PL4lCao7KL_QFVb7Iudeipvc2BCavECqzc",
+    "https://open.spotify.com/track/0q6LuUqGLUiCPP1cbdwFs3",
+    "yellow submarine",
+    "https://soundcloud.com/artist/track",
+)
+
+
+def workload(size: int) -> List[str]:
+    """Build a mixed url and search query workload."""
+    return [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(size)]
+
+
+def chain_classify(queries: List[str]) -> list:
+    """Classify queries through a freshly built handler chain."""
+    handlers = YoutubeHandler()
+    handlers.set_next(SpotifyHandler()).set_next(YoutubeQueryHandler())
+    return [
+        result
+        for result in (handlers.handle(query) for query in queries)
+        if result is not None
+    ]
+
+
+def classifier_classify(queries: List[str]) -> list:
+    """Classify queries through the compiled classifier."""
+    return list(SourceOracle.process_queries(queries))
+
+
+def run(size: int, repeat: int, number: int) -> dict:
+    """Measure best per query classification time for both strategies."""
+    queries = workload(size)
+    results = {}
+    for name, func in (("chain", chain_classify), ("classifier", classifier_classify)):
+        timings = timeit.repeat(lambda f=func: f(queries), repeat=repeat, number=number)
+        results[name] = min(timings) / (number * size)
+    return results
+
+
+def main():
+    """Run benchmark and print per query timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'queries':>8} {'chain (us)':>12} {'classifier (us)':>16} {'speedup':>8}")
+    for size in args.sizes:
+        result = run(size, args.repeat, args.number)
+        print(
+            f"{size:>8} {result['chain'] * 1e6:>12.2f} "
+            f"{result['classifier'] * 1e6:>16.2f} "
+            f"{result['chain'] / result['classifier']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
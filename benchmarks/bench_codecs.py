@@ -0,0 +1,69 @@
+#!usr/bin/env python3
+"""Message codec benchmark.
+
+Measures encode and decode time and payload size of `MusicRequest` bodies for each
+available codec, alongside the broker default pydantic JSON path.
+
+Run with ``python -m benchmarks.bench_codecs``.
+"""
+
+import argparse
+import json
+import timeit
+
+from faststream._compat import dump_json
+
+from benchmarks.bench_classification import workload
+from pipo_dispatch.codec import codecs
+from pipo_dispatch.models import MusicRequest
+
+UUID = "01928c5e-0b7d-7c5e-8f2d-3c4b5a697887"
+
+
+def run(size: int, repeat: int, number: int) -> dict:
+    """Measure best encode and decode time and payload size per codec."""
+    request = MusicRequest(uuid=UUID, server_id="0", query=workload(size))
+    value = request.model_dump()
+    candidates = {
+        "pydantic": (lambda: dump_json(request), json.loads),
+        **{
+            content_type: (lambda c=codec: c.encode(value), codec.decode)
+            for content_type, codec in codecs.items()
+            if not content_type.startswith("application/x-")
+        },
+    }
+    results = {}
+    for name, (encode, decode) in candidates.items():
+        body = encode()
+        decode_body = lambda d=decode, b=body: d(b)  # noqa: E731
+        results[name] = {
+            "encode": min(timeit.repeat(encode, repeat=repeat, number=number)) / number,
+            "decode": min(timeit.repeat(decode_body, repeat=repeat, number=number))
+            / number,
+            "size": len(body),
+        }
+    return results
+
+
+def main():
+    """Run benchmark and print per request timings and sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'queries':>8} {'codec':>20} {'encode (us)':>12} "
+        f"{'decode (us)':>12} {'bytes':>9}"
+    )
+    for size in args.sizes:
+        for name, result in run(size, args.repeat, args.number).items():
+            print(
+                f"{size:>8} {name:>20} {result['encode'] * 1e6:>12.2f} "
+                f"{result['decode'] * 1e6:>12.2f} {result['size']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
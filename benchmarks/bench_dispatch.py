@@ -0,0 +1,88 @@
+#!usr/bin/env python3
+"""End to end dispatch benchmark.
+
+Publishes `MusicRequest` messages to the dispatcher queue of an in-memory
+`TestRabbitBroker`, no RabbitMQ instance is required, and measures request
+throughput and latency percentiles.
+
+Run with ``python -m benchmarks.bench_dispatch``.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import List
+
+import uuid6
+from faststream.rabbit import TestRabbitBroker
+
+from benchmarks.bench_classification import workload
+from pipo_dispatch.config import settings
+
+
+def percentiles(samples: List[float]) -> dict:
+    """Provide p50 and p99 of samples."""
+    if len(samples) < 2:  # noqa: PLR2004
+        return {"p50": samples[0], "p99": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p99": cuts[98]}
+
+
+async def run_async(size: int, requests: int) -> dict:
+    """Dispatch requests of size queries sequentially, timing each one."""
+    # telemetry is set up when queues are loaded, use in-memory exporters
+    settings.configure(FORCE_ENV_FOR_DYNACONF="test")
+    from pipo_dispatch._queues import dispatcher_queue, get_broker
+
+    logging.getLogger("pipo_dispatch").setLevel(logging.WARNING)
+    queries = workload(size)
+    async with TestRabbitBroker(get_broker()) as broker:
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(requests):
+            request = {"uuid": str(uuid6.uuid7()), "server_id": "0", "query": queries}
+            sent = time.perf_counter()
+            await broker.publish(request, queue=dispatcher_queue)
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - start
+    return {
+        "requests_per_second": requests / elapsed,
+        "queries_per_second": requests * size / elapsed,
+        **percentiles(latencies),
+    }
+
+
+def run(size: int, requests: int) -> dict:
+    """Measure dispatch throughput and latency for requests of size queries."""
+    return asyncio.run(run_async(size, requests))
+
+
+def default_requests(size: int) -> int:
+    """Provide number of requests dispatching a similar amount of queries."""
+    return max(10, min(500, 20000 // size))
+
+
+def main():
+    """Run benchmark and print throughput and latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--requests", type=int, default=None)
+    args = parser.parse_args()
+
+    print(
+        f"{'queries':>8} {'requests/s':>11} {'queries/s':>10} "
+        f"{'p50 (ms)':>9} {'p99 (ms)':>9}"
+    )
+    for size in args.sizes:
+        result = run(size, args.requests or default_requests(size))
+        print(
+            f"{size:>8} {result['requests_per_second']:>11.1f} "
+            f"{result['queries_per_second']:>10.0f} "
+            f"{result['p50'] * 1e3:>9.2f} {result['p99'] * 1e3:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
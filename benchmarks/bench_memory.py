@@ -0,0 +1,144 @@
+#!usr/bin/env python3
+"""Dispatch working memory benchmark.
+
+Dispatches a single shuffled `MusicRequest` of distinct queries and increasing size
+through an in-memory `TestRabbitBroker` and reports traced allocation peak, total
+and per query, along with the decoded request size. Queries are distinct so request
+deduplication and progress tracking keep an entry for each of them, the request
+body is encoded outside the traced window. Each size is measured in a child process
+with telemetry disabled, the in-memory span exporter keeping every span. Fails if
+peak per query grows with request size by more than a tolerance.
+
+Per query peak is flat rather than the total: the decoded request, the request
+deduplication set and the progress store operation keys of the request in flight
+are linear in its distinct queries by design. Decoding the `query` array
+incrementally is deferred, the AMQP body is delivered and held whole anyway,
+the request is validated as a whole before its handler runs, and splitting needs
+its length upfront, so it would only shrink a constant factor. Working memory of
+large requests is bounded by ``dispatch.split`` instead, children being
+deduplicated and tracked separately.
+
+Run with ``python -m benchmarks.bench_memory``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tracemalloc
+
+import uuid6
+from faststream.rabbit import TestRabbitBroker
+
+from benchmarks.loadgen import QUERY_KINDS
+from pipo_dispatch.config import settings
+from pipo_dispatch.models import MusicRequest
+
+KINDS = ("youtube", "spotify", "query")
+
+
+def request_body(size: int, seed: int = 0) -> bytes:
+    """Build encoded shuffled request of size distinct queries."""
+    rng = random.Random(seed)  # noqa: S311
+    kinds = itertools.cycle(KINDS)
+    request = {
+        "uuid": str(uuid6.uuid7()),
+        "server_id": "0",
+        "query": [QUERY_KINDS[next(kinds)](rng, index) for index in range(size)],
+        "shuffle": True,
+    }
+    return json.dumps(request).encode()
+
+
+def decoded_size(body: bytes) -> int:
+    """Provide traced allocation peak of decoding and validating request body."""
+    tracemalloc.start()
+    try:
+        MusicRequest.model_validate(json.loads(body))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+async def run_async(size: int) -> dict:
+    """Dispatch one request of size queries, tracing allocation peak."""
+    settings.configure(FORCE_ENV_FOR_DYNACONF="test")
+    from pipo_dispatch._queues import dispatcher_queue, get_broker
+
+    logging.getLogger("pipo_dispatch").setLevel(logging.WARNING)
+    async with TestRabbitBroker(get_broker()) as broker:
+        # warm up caches and lazily created objects outside traced window
+        request = {"uuid": str(uuid6.uuid7()), "server_id": "0", "query": ["warm"]}
+        await broker.publish(request, queue=dispatcher_queue)
+        body = request_body(size)
+        decoded = decoded_size(body)
+        tracemalloc.start()
+        try:
+            await broker.publish(
+                body, queue=dispatcher_queue, content_type="application/json"
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "peak": peak,
+        "peak_per_query": peak / size,
+        "decoded_per_query": decoded / size,
+    }
+
+
+def run(size: int) -> dict:
+    """Measure dispatch allocation peak for a request of size queries."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-m", "benchmarks.bench_memory", "measure", str(size)],
+        env={**os.environ, "OTEL_SDK_DISABLED": "true"},
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main() -> int:
+    """Run benchmark, print allocation peaks and check they stay flat per query."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    measure_parser = commands.add_parser("measure", help="measure dispatch, internal")
+    measure_parser.add_argument("size", type=int)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="relative growth of peak per query tolerated between sizes",
+    )
+    args = parser.parse_args()
+
+    if args.command == "measure":
+        print(json.dumps(asyncio.run(run_async(args.size))))
+        return 0
+
+    print(f"{'queries':>8} {'peak (KiB)':>11} {'bytes/query':>12} {'decoded':>8}")
+    growing = 0
+    previous = None
+    for size in sorted(args.sizes):
+        result = run(size)
+        per_query = result["peak_per_query"]
+        grew = previous is not None and per_query > previous * (1 + args.tolerance)
+        growing += grew
+        print(
+            f"{size:>8} {result['peak'] / 1024:>11.1f} {per_query:>12.1f} "
+            f"{result['decoded_per_query']:>8.1f}{'  GROWING' if grew else ''}"
+        )
+        previous = per_query
+    return 1 if growing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!usr/bin/env python3
+"""Provider operation construction and serialization benchmark.
+
+Compares building and serializing a validated `ProviderOperation` per sub-query, as
+done by the broker for models, against the trusted `ProviderOperationEncoder` path.
+
+Run with ``python -m benchmarks.bench_models``.
+"""
+
+import argparse
+import timeit
+
+from faststream._compat import dump_json
+
+from benchmarks.bench_classification import workload
+from pipo_dispatch.audio_source.source_oracle import SourceOracle
+from pipo_dispatch.models import ProviderOperation, ProviderOperationEncoder
+
+UUID = "01928c5e-0b7d-7c5e-8f2d-3c4b5a697887"
+SERVER_ID = "0"
+
+
+def validated(sources: list) -> list:
+    """Build and serialize validated models."""
+    return [
+        dump_json(
+            ProviderOperation(
+                uuid=UUID,
+                server_id=SERVER_ID,
+                provider=f"provider.{source.handler_type}.{source.operation}",
+                operation=source.operation,
+                shuffle=False,
+                query=source.query,
+            )
+        )
+        for source in sources
+    ]
+
+
+def trusted(sources: list) -> list:
+    """Serialize operations from request template."""
+    encoder = ProviderOperationEncoder(uuid=UUID, server_id=SERVER_ID, shuffle=False)
+    return [
+        encoder.encode(
+            f"provider.{source.handler_type}.{source.operation}",
+            source.operation,
+            source.query,
+        )
+        for source in sources
+    ]
+
+
+def run(size: int, repeat: int, number: int) -> dict:
+    """Measure best per operation time for both paths."""
+    sources = list(SourceOracle.process_queries(workload(size)))
+    results = {}
+    for name, func in (("validated", validated), ("trusted", trusted)):
+        timings = timeit.repeat(lambda f=func: f(sources), repeat=repeat, number=number)
+        results[name] = min(timings) / (number * len(sources))
+    return results
+
+
+def main():
+    """Run benchmark and print per operation timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'queries':>8} {'validated (us)':>15} {'trusted (us)':>13} {'speedup':>8}")
+    for size in args.sizes:
+        result = run(size, args.repeat, args.number)
+        print(
+            f"{size:>8} {result['validated'] * 1e6:>15.2f} "
+            f"{result['trusted'] * 1e6:>13.2f} "
+            f"{result['validated'] / result['trusted']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!usr/bin/env python3
+"""Startup time and memory footprint benchmark of each runtime.
+
+Starts the dispatcher in a child process per runtime, against an in-memory
+`TestRabbitBroker` so no RabbitMQ instance is required, and measures time until
+the liveness probe answers and resident memory at that point.
+
+Run with ``python -m benchmarks.bench_startup``.
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+RUNTIMES = ("asgi", "standalone")
+
+
+async def serve(runtime: str, port: int) -> None:
+    """Serve dispatcher probes on port using runtime, broker held in memory."""
+    from faststream.rabbit import TestRabbitBroker
+
+    from pipo_dispatch.config import settings
+
+    settings.configure(FORCE_ENV_FOR_DYNACONF="test")
+    settings.set("runtime", runtime, validate=False)
+    settings.set("probes.port", port, validate=False)
+    from pipo_dispatch._queues import get_broker
+
+    async with TestRabbitBroker(get_broker()):
+        if runtime == "standalone":
+            from pipo_dispatch.runtime import create_app
+
+            await create_app().run()
+        else:
+            import uvicorn
+
+            from pipo_dispatch.app import create_app
+
+            config = uvicorn.Config(create_app(), port=port, log_level="warning")
+            await uvicorn.Server(config).serve()
+
+
+def free_port() -> int:
+    """Provide an unused local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss(pid: int) -> Optional[int]:
+    """Provide process resident memory in bytes, if available."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def run(runtime: str, timeout: float = 60) -> dict:
+    """Measure seconds until runtime answers liveness and its resident memory."""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(  # noqa: S603
+        [sys.executable, "-m", "benchmarks.bench_startup", "serve", runtime, str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(  # noqa: S310
+                    f"http://127.0.0.1:{port}/livez", timeout=1
+                ):
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                if process.poll() is not None or time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"{runtime} runtime did not start") from None  # noqa: TRY003
+                time.sleep(0.01)
+        return {"startup": time.perf_counter() - start, "rss": rss(process.pid)}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    """Run benchmark and print startup time and memory of each runtime."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    serve_parser = commands.add_parser("serve", help="serve a runtime, internal")
+    serve_parser.add_argument("runtime", choices=RUNTIMES)
+    serve_parser.add_argument("port", type=int)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.runtime, args.port))
+        return
+
+    print(f"{'runtime':>10} {'startup (s)':>12} {'rss (MiB)':>10}")
+    for runtime in RUNTIMES:
+        results = [run(runtime) for _ in range(args.repeat)]
+        startup = min(result["startup"] for result in results)
+        memory = min(result["rss"] or 0 for result in results)
+        print(f"{runtime:>10} {startup:>12.3f} {memory / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!usr/bin/env python3
+"""Tracing overhead benchmark of each sampling configuration.
+
+Runs the end to end dispatch benchmark in a child process per sampling
+configuration, spans exported in memory, and reports per request overhead relative
+to tracing disabled.
+
+Run with ``python -m benchmarks.bench_tracing``.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict
+
+from benchmarks import bench_dispatch
+
+DISABLED = "off"
+CONFIGS: Dict[str, Dict[str, str]] = {
+    DISABLED: {"OTEL_SDK_DISABLED": "true"},
+    "all": {"PIPO_TELEMETRY__TRACES__SAMPLING__RATIO": "1.0"},
+    "ratio_10": {"PIPO_TELEMETRY__TRACES__SAMPLING__RATIO": "0.1"},
+    "ratio_10_errors": {
+        "PIPO_TELEMETRY__TRACES__SAMPLING__RATIO": "0.1",
+        "PIPO_TELEMETRY__TRACES__SAMPLING__ALWAYS_ON_ERROR": "true",
+    },
+    "limited_10": {"PIPO_TELEMETRY__TRACES__SAMPLING__RATE_LIMIT": "10"},
+}
+
+
+def run_config(config: str, size: int, requests: int) -> dict:
+    """Measure dispatch in a child process with config sampling settings."""
+    env = {
+        name: value for name, value in os.environ.items() if name != "OTEL_SDK_DISABLED"
+    }
+    env.update(CONFIGS[config])
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_tracing",
+            "measure",
+            str(size),
+            str(requests),
+        ],
+        env=env,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def run(size: int, requests: int) -> Dict[str, dict]:
+    """Measure per request dispatch time and tracing overhead of each config."""
+    results = {}
+    for config in CONFIGS:
+        result = run_config(config, size, requests)
+        results[config] = {"per_request": 1 / result["requests_per_second"]}
+    baseline = results[DISABLED]["per_request"]
+    for result in results.values():
+        result["overhead"] = result["per_request"] - baseline
+    return results
+
+
+def main():
+    """Run benchmark and print per request time and overhead of each config."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    measure_parser = commands.add_parser("measure", help="measure dispatch, internal")
+    measure_parser.add_argument("size", type=int)
+    measure_parser.add_argument("requests", type=int)
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "measure":
+        print(json.dumps(bench_dispatch.run(args.size, args.requests)))
+        return
+
+    requests = args.requests or bench_dispatch.default_requests(args.size)
+    print(f"{'config':>14} {'request (ms)':>13} {'overhead (ms)':>14}")
+    for config, result in run(args.size, requests).items():
+        print(
+            f"{config:>14} {result['per_request'] * 1e3:>13.3f} "
+            f"{result['overhead'] * 1e3:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
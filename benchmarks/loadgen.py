@@ -0,0 +1,423 @@
+#!usr/bin/env python3
+"""Synthetic load generator and soak test harness.
+
+Publishes `MusicRequest` messages to the dispatcher queue at a target rate, with
+constant or Poisson open loop arrivals, from a configurable mix of query kinds and
+request size distribution. Provider operations are observed on the provider
+exchange, measuring end to end latency from each request scheduled send time until
+all its operations are published, so a saturated dispatcher shows as latency
+instead of slowing arrivals down.
+
+Requests are dispatched by an in-process dispatcher on a `TestRabbitBroker` by
+default, or by a separately running service when a broker url is provided, where
+the dispatcher queue depth is also sampled as consumer lag.
+
+Run with ``python -m benchmarks.loadgen --rate 50 --duration 300``.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import random
+import statistics
+import string
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import uuid6
+from faststream.rabbit import RabbitBroker, RabbitQueue, TestRabbitBroker
+
+from pipo_dispatch.config import settings
+
+WORDS = (
+    "yellow",
+    "submarine",
+    "melancholy",
+    "hill",
+    "blue",
+    "monday",
+    "paranoid",
+    "android",
+    "midnight",
+    "city",
+)
+
+
+def _id(rng: random.Random, length: int, alphabet: str) -> str:
+    return "".join(rng.choices(alphabet, k=length))
+
+
+YOUTUBE_ALPHABET = string.ascii_letters + string.digits + "-_"
+SPOTIFY_ALPHABET = string.ascii_letters + string.digits
+
+# query kinds, built unique so request deduplication does not drop them
+QUERY_KINDS: Dict[str, Callable[[random.Random, int], str]] = {
+    "youtube": lambda rng, n: (
+        f"https://www.youtube.com/watch?v={_id(rng, 11, YOUTUBE_ALPHABET)}"
+    ),
+    "playlist": lambda rng, n: (
+        f"https://www.youtube.com/watch?v={_id(rng, 11, YOUTUBE_ALPHABET)}"
+        f"&list=PL{_id(rng, 32, YOUTUBE_ALPHABET)}"
+    ),
+    "spotify": lambda rng, n: (
+        f"https://open.spotify.com/track/{_id(rng, 22, SPOTIFY_ALPHABET)}"
+    ),
+    "query": lambda rng, n: f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}",
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse query kind weights, e.g. ``youtube=4,playlist=1,spotify=2,query=3``."""
+    mix = {}
+    for entry in value.split(","):
+        kind, _, weight = entry.partition("=")
+        if kind not in QUERY_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown query kind {kind!r}")  # noqa: TRY003
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def parse_sizes(value: str) -> Callable[[random.Random], float]:
+    """Parse request size distribution.
+
+    One of ``fixed:N``, ``uniform:MIN:MAX``, ``lognormal:MEDIAN:SIGMA`` or
+    ``pareto:ALPHA:MIN``, the heavy tailed distributions resembling requests mostly
+    holding a few queries with occasional large playlists.
+    """
+    name, *params = value.split(":")
+    try:
+        values = [float(param) for param in params]
+        distributions = {
+            "fixed": lambda rng, n: n,
+            "uniform": lambda rng, low, high: rng.uniform(low, high),
+            "lognormal": lambda rng, median, sigma: median
+            * rng.lognormvariate(0, sigma),
+            "pareto": lambda rng, alpha, low: low * rng.paretovariate(alpha),
+        }
+        distribution = distributions[name]
+        # fails on a wrong number of parameters, before any size is sampled
+        inspect.signature(distribution).bind(None, *values)
+    except (KeyError, TypeError, ValueError) as error:
+        raise argparse.ArgumentTypeError(f"invalid distribution {value!r}") from error  # noqa: TRY003
+    return lambda rng: distribution(rng, *values)
+
+
+class Workload:
+    """Builds requests from a query kind mix and request size distribution."""
+
+    __mix: Mapping[str, float]
+    __sizes: Callable[[random.Random], float]
+    __max_size: int
+    __servers: int
+    __built: int
+
+    def __init__(  # noqa: PLR0913
+        self,
+        mix: Mapping[str, float],
+        sizes: Callable[[random.Random], float],
+        max_size: int,
+        servers: int = 1,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """Build workload.
+
+        Parameters
+        ----------
+        mix : Mapping[str, float]
+            Relative weight of each query kind.
+        sizes : Callable[[random.Random], float]
+            Samples queries per request.
+        max_size : int
+            Maximum queries per request.
+        servers : int
+            Distinct server ids requests are spread across.
+        rng : Optional[random.Random]
+            Random source, seeded for reproducible workloads.
+        """
+        self.__mix = mix
+        self.__sizes = sizes
+        self.__max_size = max_size
+        self.__servers = servers
+        self.__built = 0
+        self.rng = rng or random.Random()  # noqa: S311
+
+    def request(self) -> Tuple[dict, int]:
+        """Provide a request and its number of queries."""
+        size = max(1, min(self.__max_size, round(self.__sizes(self.rng))))
+        kinds = self.rng.choices(
+            list(self.__mix), weights=list(self.__mix.values()), k=size
+        )
+        queries = [
+            QUERY_KINDS[kind](self.rng, self.__built * self.__max_size + index)
+            for index, kind in enumerate(kinds)
+        ]
+        self.__built += 1
+        request = {
+            "uuid": str(uuid6.uuid7()),
+            "server_id": str(self.rng.randrange(self.__servers)),
+            "query": queries,
+        }
+        return request, size
+
+
+def arrivals(rate: float, process: str, rng: random.Random) -> Iterator[float]:
+    """Provide seconds between consecutive requests."""
+    while True:
+        yield rng.expovariate(rate) if process == "poisson" else 1 / rate
+
+
+class Tracker:
+    """Tracks published requests until all their operations are observed."""
+
+    __clock: Callable[[], float]
+    # request to scheduled send time, expected and received operations
+    __pending: Dict[str, List[float]]
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        """Build tracker."""
+        self.__clock = clock
+        self.__pending = {}
+        self.sent = 0
+        self.queries = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.latencies: List[float] = []
+        self.window: List[float] = []
+
+    @property
+    def backlog(self) -> int:
+        """Requests sent and not completed yet."""
+        return len(self.__pending)
+
+    def send(self, uuid: str, scheduled: float, queries: int) -> None:
+        """Record request sent, before publishing as operations may arrive first."""
+        self.__pending[uuid] = [scheduled, queries, 0]
+        self.sent += 1
+        self.queries += queries
+
+    def receive(self, uuid: str, operations: int) -> None:
+        """Record operations of request published by the dispatcher."""
+        entry = self.__pending.get(uuid)
+        if entry is None:
+            return
+        entry[2] += operations
+        if entry[2] >= entry[1]:
+            del self.__pending[uuid]
+            latency = self.__clock() - entry[0]
+            self.completed += 1
+            self.latencies.append(latency)
+            self.window.append(latency)
+
+    def expire(self, timeout: float) -> None:
+        """Give up on requests pending for longer than timeout."""
+        deadline = self.__clock() - timeout
+        expired = [
+            uuid for uuid, entry in self.__pending.items() if entry[0] < deadline
+        ]
+        for uuid in expired:
+            del self.__pending[uuid]
+        self.timed_out += len(expired)
+
+
+def summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """Provide latency percentiles, None without samples."""
+    if len(latencies) < 2:  # noqa: PLR2004
+        latency = latencies[0] if latencies else None
+        return dict.fromkeys(("p50", "p95", "p99"), latency)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1e3:.1f}"
+
+
+async def queue_depth(broker: RabbitBroker, name: str) -> Optional[int]:
+    """Provide messages ready in queue, None if unavailable."""
+    try:
+        queue = await broker.declare_queue(RabbitQueue(name, passive=True))
+        # declarations are cached by the broker, along with their message count
+        result = await queue.declare()
+    except Exception:  # noqa: BLE001
+        return None
+    return result.message_count
+
+
+async def generate(
+    broker: RabbitBroker,
+    workload: Workload,
+    tracker: Tracker,
+    args: argparse.Namespace,
+    report: Callable[[float], Awaitable[None]],
+) -> float:
+    """Publish requests for duration, providing seconds elapsed."""
+    from pipo_dispatch._queues import dispatcher_queue
+
+    tasks = set()
+    start = time.perf_counter()
+    scheduled = start
+    reported = start
+    for delay in arrivals(args.rate, args.arrival, workload.rng):
+        scheduled += delay
+        if scheduled - start > args.duration:
+            break
+        now = time.perf_counter()
+        if now - reported >= args.report_interval:
+            reported = now
+            await report(now - start)
+        await asyncio.sleep(max(0, scheduled - now))
+        request, size = workload.request()
+        # latency counts from the scheduled time, a late send is not hidden
+        tracker.send(request["uuid"], scheduled, size)
+        task = asyncio.create_task(broker.publish(request, queue=dispatcher_queue))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return time.perf_counter() - start
+
+
+async def run_async(args: argparse.Namespace) -> dict:
+    """Generate load and observe dispatched operations."""
+    if args.url is None:
+        # in-process dispatcher, telemetry uses in-memory exporters
+        settings.configure(FORCE_ENV_FOR_DYNACONF="test")
+    from pipo_dispatch._queues import (
+        dispatcher_queue,
+        get_broker,
+        get_router,
+        provider_exch,
+    )
+    from pipo_dispatch.codec import decode_message
+
+    logging.getLogger("pipo_dispatch").setLevel(logging.WARNING)
+    tracker = Tracker()
+    workload = Workload(
+        mix=args.mix,
+        sizes=args.sizes,
+        max_size=args.max_size,
+        servers=args.servers,
+        rng=random.Random(args.seed),  # noqa: S311
+    )
+    if args.url is None:
+        broker = get_broker()
+        subscriber = get_router().subscriber
+    else:
+        broker = RabbitBroker(args.url)
+        subscriber = broker.subscriber
+
+    @subscriber(
+        RabbitQueue(f"loadgen-{uuid6.uuid7()}", auto_delete=True, routing_key="#"),
+        exchange=provider_exch,
+        decoder=decode_message,
+    )
+    async def observe(body: dict) -> None:
+        tracker.receive(body["uuid"], len(body.get("queries") or (None,)))
+
+    last = {"elapsed": 0.0, "sent": 0, "completed": 0}
+
+    async def report(elapsed: float) -> None:
+        tracker.expire(args.timeout)
+        span = elapsed - last["elapsed"] or 1
+        depth = (
+            None
+            if args.url is None
+            else await queue_depth(broker, dispatcher_queue.name)
+        )
+        window = summary(tracker.window)
+        print(
+            f"{elapsed:>7.0f}s sent {(tracker.sent - last['sent']) / span:>7.1f}/s "
+            f"completed {(tracker.completed - last['completed']) / span:>7.1f}/s "
+            f"backlog {tracker.backlog:>6} queue {'-' if depth is None else depth:>6} "
+            f"p50 {_ms(window['p50']):>8}ms p99 {_ms(window['p99']):>8}ms",
+            flush=True,
+        )
+        last.update(elapsed=elapsed, sent=tracker.sent, completed=tracker.completed)
+        tracker.window.clear()
+
+    async def drain() -> None:
+        deadline = time.perf_counter() + args.timeout
+        while tracker.backlog and time.perf_counter() < deadline:  # noqa: ASYNC110
+            await asyncio.sleep(0.05)
+        tracker.expire(0)
+
+    if args.url is None:
+        async with TestRabbitBroker(broker):
+            elapsed = await generate(broker, workload, tracker, args, report)
+            await drain()
+    else:
+        async with broker:
+            await broker.start()
+            elapsed = await generate(broker, workload, tracker, args, report)
+            await drain()
+    return {
+        "duration": elapsed,
+        "sent": tracker.sent,
+        "completed": tracker.completed,
+        "timed_out": tracker.timed_out,
+        "requests_per_second": tracker.completed / elapsed,
+        "queries_per_second": tracker.queries / elapsed,
+        **summary(tracker.latencies),
+    }
+
+
+def main():
+    """Parse command line, generate load and print achieved throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=10, help="requests per second")
+    parser.add_argument(
+        "--arrival",
+        choices=("constant", "poisson"),
+        default="poisson",
+        help="constant intervals or open loop Poisson arrivals at rate",
+    )
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("youtube=4,playlist=1,spotify=2,query=3"),
+        help=f"query kind weights, kinds are {', '.join(QUERY_KINDS)}",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=parse_sizes("lognormal:5:1.2"),
+        help="queries per request, fixed:N, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA "
+        "or pareto:ALPHA:MIN",
+    )
+    parser.add_argument("--max-size", type=int, default=5000)
+    parser.add_argument("--servers", type=int, default=10, help="distinct server ids")
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="broker url of a running service, in-process TestRabbitBroker if unset",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30,
+        help="seconds a request may take before counted as timed out",
+    )
+    parser.add_argument("--report-interval", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_async(args))
+    print(
+        f"sent {result['sent']} completed {result['completed']} "
+        f"timed out {result['timed_out']} in {result['duration']:.1f}s, "
+        f"{result['requests_per_second']:.1f} requests/s "
+        f"{result['queries_per_second']:.0f} queries/s, latency "
+        f"p50 {_ms(result['p50'])}ms p95 {_ms(result['p95'])}ms "
+        f"p99 {_ms(result['p99'])}ms"
+    )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from pipo_dispatch.startup import profile  # noqa: F401 start profiling on import
@@ -3,10 +3,7 @@ import logging
 import os
 import sys
 
-import uvicorn
 from pipo_dispatch.config import settings
-from pipo_dispatch.app import create_app
-
 
 
 def main():
@@ -18,15 +15,27 @@ def main():
 
     logger = logging.getLogger(__name__)
 
-    app = create_app()
-
     try:
-        uvicorn.run(
-            app,
-            host=settings.probes.host,
-            port=settings.probes.port,
-            log_level=settings.probes.log_level
-        )
+        if settings.workers.count:
+            # run modes imported lazily, loading only the selected stack
+            from pipo_dispatch.supervisor import supervise
+
+            supervise(settings.workers.count)
+        elif settings.runtime == "standalone":
+            from pipo_dispatch.runtime import run
+
+            run()
+        else:
+            import uvicorn
+
+            from pipo_dispatch.app import create_app
+
+            uvicorn.run(
+                create_app(),
+                host=settings.probes.host,
+                port=settings.probes.port,
+                log_level=settings.probes.log_level
+            )
     except Exception:
         logger.exception("Unexpected exception raised")
     finally:
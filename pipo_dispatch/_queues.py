@@ -1,44 +1,118 @@
-import ssl
+import asyncio
+import collections
 import logging
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
 from opentelemetry import metrics, trace
-from opentelemetry.trace import SpanKind
-from prometheus_client import REGISTRY
-from faststream.security import BaseSecurity
+from opentelemetry.trace import Span, SpanKind
 from faststream.opentelemetry import Baggage
 from faststream.rabbit import (
     ExchangeType,
     RabbitExchange,
+    RabbitMessage,
     RabbitQueue,
 )
-from faststream.rabbit.fastapi import RabbitRouter, Logger, RabbitMessage
-from faststream.rabbit.prometheus import RabbitPrometheusMiddleware
-from faststream.rabbit.opentelemetry import RabbitTelemetryMiddleware
-
 
 from pipo_dispatch.config import settings
+from pipo_dispatch.audio_source.source_cache import ClassificationCache
+from pipo_dispatch.audio_source.source_classifier import Classifier, SourceClassifier
 from pipo_dispatch.audio_source.source_oracle import SourceOracle
-from pipo_dispatch.models import ProviderOperation, MusicRequest
-from pipo_dispatch.telemetry import setup_telemetry
-from pipo_dispatch.config import settings
+from pipo_dispatch.audio_source.source_pair import SourcePair
+from pipo_dispatch.audio_source.source_registry import registry
+from pipo_dispatch.audio_source.youtube_handler import YoutubeOperations
+from pipo_dispatch.codec import decode_message, get_codec, json_codec
+from pipo_dispatch.concurrency import AdaptiveConcurrency
+from pipo_dispatch.deduplication import DuplicateWindow
+from pipo_dispatch.health import HealthMonitor
+from pipo_dispatch.loop_lag import LoopLagSampler, LoopWatchdog
+from pipo_dispatch.models import (
+    MusicRequest,
+    ProviderOperation,
+    ProviderOperationBatch,
+    ProviderOperationEncoder,
+)
+from pipo_dispatch.progress import (
+    MemoryProgressStore,
+    ProgressStore,
+    SQLiteProgressStore,
+    operation_key,
+)
+from pipo_dispatch.publisher import batched_by, publish_all
+from pipo_dispatch.rate_limit import RateLimiter
+from pipo_dispatch.scheduling import FairScheduler
+from pipo_dispatch.startup import profile
+from pipo_dispatch.telemetry import (
+    create_counter,
+    create_histogram,
+    create_observable_gauge,
+    setup_telemetry,
+)
+
+if TYPE_CHECKING:
+    from faststream.rabbit import RabbitBroker
+    from faststream.rabbit.fastapi import RabbitRouter
+
+    from pipo_dispatch.replay import BackgroundReplay
 
 tracer = trace.get_tracer(__name__)
 meter = metrics.get_meter(__name__)
 
+# request latency classes, interactive operations are published ahead of bulk ones
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# request results, suppressed when every query duplicated a recent one
+SUCCESS = "success"
+FAIL = "fail"
+SUPPRESSED = "suppressed"
+
+
+def __serves_http() -> bool:
+    """Whether dispatch runs within the FastAPI application.
+
+    Standalone runtime and worker processes serve probes without it, and consume
+    from a plain broker so FastAPI is never imported.
+    """
+    return settings.runtime != "standalone" and not settings.workers.count
+
 
-def __load_router(service_name: str) -> RabbitRouter:
-    telemetry = setup_telemetry(service_name, settings.telemetry.local)
-    core_router = RabbitRouter(
-        app_id=settings.app,
-        url=settings.queue_broker_url,
-        host=settings.player.queue.broker.host,
-        virtualhost=settings.player.queue.broker.vhost,
-        port=settings.player.queue.broker.port,
-        timeout=settings.player.queue.broker.timeout,
-        max_consumers=settings.player.queue.broker.max_consumers,
-        graceful_timeout=settings.player.queue.broker.graceful_timeout,
-        logger=logging.getLogger(__name__),
-        security=BaseSecurity(ssl_context=ssl.create_default_context()),
-        middlewares=(
+def __broker_options(service_name: str) -> Dict[str, Any]:
+    # broker stack, telemetry exporters and TLS context are built on first use only
+    import ssl
+
+    from faststream.rabbit.opentelemetry import RabbitTelemetryMiddleware
+    from faststream.rabbit.prometheus import RabbitPrometheusMiddleware
+    from faststream.security import BaseSecurity
+    from prometheus_client import REGISTRY
+
+    telemetry = setup_telemetry(
+        service_name, settings.telemetry.local, settings.telemetry.get("traces")
+    )
+    profile.mark("telemetry")
+    return {
+        "app_id": settings.app,
+        "url": settings.queue_broker_url,
+        "host": settings.player.queue.broker.host,
+        "virtualhost": settings.player.queue.broker.vhost,
+        "port": settings.player.queue.broker.port,
+        "timeout": settings.player.queue.broker.timeout,
+        "max_consumers": settings.player.queue.broker.max_consumers,
+        "graceful_timeout": settings.player.queue.broker.graceful_timeout,
+        "logger": logging.getLogger(__name__),
+        "security": BaseSecurity(ssl_context=ssl.create_default_context()),
+        "middlewares": (
             RabbitPrometheusMiddleware(
                 registry=REGISTRY,
                 app_name=settings.telemetry.metrics.service,
@@ -46,19 +120,276 @@ def __load_router(service_name: str) -> RabbitRouter:
             ),
             RabbitTelemetryMiddleware(tracer_provider=telemetry.traces or None),
         ),
-    )
+    }
+
+
+def __load_router(service_name: str) -> "RabbitRouter":
+    from faststream.rabbit.fastapi import RabbitRouter
+
+    core_router = RabbitRouter(**__broker_options(service_name))
+
+    @core_router.after_startup
+    async def started(app: Any) -> None:
+        profile.mark("broker")
+        start_monitor()
+
+    @core_router.on_broker_shutdown
+    async def stopped(app: Any) -> None:
+        await stop_monitor()
+
     return core_router
 
 
-router = __load_router(settings.app)
+def __load_broker(service_name: str) -> "RabbitBroker":
+    """Build broker without FastAPI integration, its runtime starts monitoring."""
+    from faststream.rabbit import RabbitBroker
+
+    return RabbitBroker(**__broker_options(service_name))
+
+
+def __load_classifier() -> Classifier:
+    config = settings.dispatch.classification
+    classifier = SourceClassifier(registry, canonicalize=config.canonicalize)
+    if not config.cache.enabled:
+        return classifier
+    return ClassificationCache(
+        classifier,
+        max_entries=config.cache.max_entries,
+        ttl=config.cache.ttl,
+    )
+
+
+def __load_duplicate_window() -> Optional[DuplicateWindow]:
+    config = settings.dispatch.deduplication
+    if not config.window:
+        return None
+    return DuplicateWindow(window=config.window, max_entries=config.max_entries)
+
+
+def __load_scheduler() -> Optional[FairScheduler]:
+    config = settings.dispatch.scheduling
+    if not config.enabled:
+        return None
+    return FairScheduler(
+        weights={
+            str(server_id): float(weight)
+            for server_id, weight in (config.weights or {}).items()
+        },
+        default_weight=config.default_weight,
+        max_buffered=config.max_buffered,
+    )
+
+
+def __load_progress() -> Optional[ProgressStore]:
+    config = settings.dispatch.progress
+    if config.backend == "memory":
+        return MemoryProgressStore(max_requests=config.max_requests, ttl=config.ttl)
+    if config.backend == "sqlite":
+        return SQLiteProgressStore(config.path, ttl=config.ttl)
+    return None
+
+
+def __load_concurrency(lag: LoopLagSampler) -> Optional[AdaptiveConcurrency]:
+    config = settings.dispatch.concurrency
+    if not config.adaptive:
+        return None
+    # broker prefetch is fixed once consuming starts, bounding handled dispatches
+    return AdaptiveConcurrency(
+        min_limit=config.min,
+        max_limit=settings.player.queue.broker.max_consumers,
+        latency_target=config.latency_target,
+        lag_target=config.lag_target,
+        initial=config.initial,
+        backoff=config.backoff,
+        cooldown=config.cooldown,
+        lag=lambda: lag.lag,
+    )
+
+
+def __record_loop_lag(lag: float) -> None:
+    loop_lag_histogram.record(lag)
+    if lag > settings.telemetry.loop.slow_callback:
+        slow_callback_histogram.record(lag)
+
+
+def __load_watchdog(lag: LoopLagSampler) -> Optional[LoopWatchdog]:
+    config = settings.telemetry.loop
+    if not config.watchdog:
+        return None
+    return LoopWatchdog(lag, threshold=config.slow_callback)
+
+
+loop_lag = LoopLagSampler(
+    interval=settings.dispatch.concurrency.lag_interval, on_sample=__record_loop_lag
+)
+loop_watchdog = __load_watchdog(loop_lag)
+concurrency = __load_concurrency(loop_lag)
+classifier = __load_classifier()
+duplicate_window = __load_duplicate_window()
+scheduler = __load_scheduler()
+publish_codec = get_codec(settings.dispatch.publish.content_type)
+max_source_events = settings.get("telemetry.traces.max_source_events", 10)
+
+
+# router and its subscribers, built on first access
+__lazy: Dict[str, Any] = {}
+
+
+def __load() -> Dict[str, Any]:
+    if not __lazy:
+        if __serves_http():
+            router = __load_router(settings.app)
+            broker = router.broker
+        else:
+            # subscribers are registered on the broker itself
+            router = broker = __load_broker(settings.app)
+        __lazy["dispatch"] = __subscribe(router)
+        __lazy["router"] = router
+        __lazy["broker"] = broker
+        profile.mark("router")
+    return __lazy
+
+
+def __getattr__(name: str) -> Any:
+    """Provide lazily built router, subscribers, health monitor and progress store."""
+    if name in ("router", "dispatch"):
+        return __load()[name]
+    if name in ("health", "progress"):
+        return __load_services()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
+
+
+def loop_degraded() -> bool:
+    """Whether the monitored event loop lags past the readiness threshold."""
+    threshold = settings.probes.readiness.max_loop_lag
+    return bool(threshold) and loop_lag.running and loop_lag.lag > threshold
+
+
+async def __ping() -> bool:
+    return await get_broker().ping(settings.probes.readiness.timeout)
+
+
+def __consuming() -> bool:
+    """Whether router subscribers are consuming."""
+    if not __lazy:
+        return False
+    subscribers = get_broker()._subscribers.values()  # noqa: SLF001
+    return all(subscriber.running for subscriber in subscribers)
+
+
+def __disconnected(*args: Any) -> None:
+    __health().connected(False)
+
+
+def __reconnected(*args: Any) -> None:
+    __health().connected(True)
+
+
+def __watch_connection(broker: "RabbitBroker") -> None:
+    """Update health on broker connection and channel events."""
+    # robust connection and channel are internal to the broker, callbacks are
+    # stored by identity so watching again is a no op
+    for resource, reopened in (
+        (getattr(broker, "_connection", None), "reconnect_callbacks"),
+        (getattr(broker, "_channel", None), "reopen_callbacks"),
+    ):
+        if resource is None or not hasattr(resource, reopened):
+            continue
+        resource.close_callbacks.add(__disconnected)
+        getattr(resource, reopened).add(__reconnected)
+
+
+def __load_health() -> HealthMonitor:
+    config = settings.probes.readiness
+    return HealthMonitor(
+        check=__ping,
+        interval=config.interval,
+        max_publish_age=config.max_publish_age,
+        publish_failure_window=config.publish_failure_window,
+        conditions={"consumer": __consuming, "loop": lambda: not loop_degraded()},
+    )
+
+
+# health monitor and progress store, built on broker startup or first use as the
+# sqlite progress store opens its database
+__services: Dict[str, Any] = {}
+
+
+def __load_services() -> Dict[str, Any]:
+    if not __services:
+        __services["health"] = __load_health()
+        __services["progress"] = __load_progress()
+    return __services
+
+
+def __health() -> HealthMonitor:
+    return __load_services()["health"]
+
+
+def __progress() -> Optional[ProgressStore]:
+    return __load_services()["progress"]
+
 
+def __health_status(check: str) -> float:
+    """Whether readiness condition holds, not before health is monitored."""
+    health = __services.get("health")
+    return float(health is not None and health.status()[check])
 
-def get_router():
-    return router
 
+# background replay, built on first start as it declares queues defined below
+__replay: Dict[str, Any] = {}
 
-def get_broker():
-    return router.broker
+
+def __background_replay() -> Optional["BackgroundReplay"]:
+    if not settings.replay.background.enabled:
+        return None
+    if not __replay:
+        from pipo_dispatch.replay import create_background_replay
+
+        __replay["background"] = create_background_replay()
+    return __replay["background"]
+
+
+def start_monitor() -> None:
+    """Monitor broker health and the running event loop lag and stalls.
+
+    Parking lot and dead letter queues are also replayed periodically when
+    background replay is enabled.
+    """
+    __load_services()
+    __watch_connection(get_broker())
+    __health().start()
+    loop_lag.start()
+    if loop_watchdog is not None:
+        loop_watchdog.start()
+    replay = __background_replay()
+    if replay is not None:
+        replay.start()
+
+
+async def stop_monitor() -> None:
+    """Stop monitoring broker health and the event loop, and background replay."""
+    replay = __background_replay()
+    if replay is not None:
+        await replay.stop()
+    await __health().stop()
+    if loop_watchdog is not None:
+        loop_watchdog.stop()
+    await loop_lag.stop()
+
+
+async def readiness() -> List[str]:
+    """Provide failing readiness conditions, from cached health state."""
+    return await __health().readiness()
+
+
+def get_router() -> Union["RabbitRouter", "RabbitBroker"]:
+    """Provide FastAPI router of dispatch, or the broker without the application."""
+    return __load()["router"]
+
+
+def get_broker() -> "RabbitBroker":
+    return __load()["broker"]
 
 
 plq = RabbitQueue(
@@ -98,58 +429,602 @@ provider_exch = RabbitExchange(
     durable=True,
 )
 
+rate_limiter = RateLimiter.from_settings(settings.dispatch.rate_limit.buckets or ())
 
-dispatch_success_counter = meter.create_counter(
+# throttled operations wait in a per routing key queue until their message expires,
+# dead lettering them to the provider exchange under the original routing key,
+# including any lane suffix, built on first use
+delay_queues: Dict[str, RabbitQueue] = {}
+
+
+def __delay_queue(routing_key: str) -> RabbitQueue:
+    """Provide delay queue dead lettering to provider exchange routing key."""
+    queue = delay_queues.get(routing_key)
+    if queue is None:
+        queue = delay_queues[routing_key] = RabbitQueue(
+            f"{dispatcher_queue.name}.delay.{routing_key}",
+            durable=True,
+            arguments={
+                "x-dead-letter-exchange": provider_exch.name,
+                "x-dead-letter-routing-key": routing_key,
+            },
+        )
+    return queue
+
+
+dispatch_success_counter = create_counter(
+    meter,
     name="pipo.dispatch.requests.success",
     description="Number of requests dispatched successfully",
     unit="requests",
 )
 
-dispatch_fail_counter = meter.create_counter(
+dispatch_fail_counter = create_counter(
+    meter,
     name="pipo.dispatch.requests.fail",
     description="Number of requests dispatched unsuccessfully",
     unit="requests",
 )
 
+dispatch_suppressed_counter = create_counter(
+    meter,
+    name="pipo.dispatch.requests.suppressed",
+    description="Number of requests whose queries all duplicated recent queries",
+    unit="requests",
+)
+
+result_counters = {
+    SUCCESS: dispatch_success_counter,
+    FAIL: dispatch_fail_counter,
+    SUPPRESSED: dispatch_suppressed_counter,
+}
+
+dispatch_sources_counter = create_counter(
+    meter,
+    name="pipo.dispatch.sources",
+    description="Number of classified sources by handler and operation",
+    unit="sources",
+    labels=("handler_type", "operation"),
+)
+
+dispatch_duration_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.duration",
+    description="Seconds taken to dispatch a request",
+    unit="s",
+    labels=("result", "lane"),
+)
 
-@router.subscriber(
-    queue=dispatcher_queue,
-    description="Consumes from dispatch topic and produces to provider exchange",
+dispatch_stage_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.stage.duration",
+    description="Seconds taken by each dispatch stage of a request",
+    unit="s",
+    labels=("stage",),
 )
-async def dispatch(
-    logger: Logger,
+
+dispatch_publish_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.publish.duration",
+    description="Seconds taken to publish an operation to the provider exchange",
+    unit="s",
+    labels=("routing_key",),
+)
+
+loop_lag_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.loop.lag",
+    description="Seconds event loop callbacks waited to be scheduled",
+    unit="s",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float("inf")),
+)
+
+slow_callback_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.loop.slow_callback",
+    description="Seconds the event loop was blocked past the slow callback threshold",
+    unit="s",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")),
+)
+
+create_observable_gauge(
+    meter,
+    name="pipo.dispatch.loop.lag.smoothed",
+    description="Smoothed event loop lag, readiness fails above its threshold",
+    unit="s",
+    label="loop",
+    observe={"dispatch": lambda: loop_lag.lag},
+)
+
+create_observable_gauge(
+    meter,
+    name="pipo.dispatch.health",
+    description="Whether each readiness condition holds",
+    unit="1",
+    label="check",
+    observe={
+        check: lambda check=check: __health_status(check)
+        for check in ("connection", "publish", "consumer", "loop")
+    },
+)
+
+dispatch_fanout_histogram = create_histogram(
+    meter,
+    name="pipo.dispatch.fanout",
+    description="Number of operations published per request",
+    unit="operations",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf")),
+)
+
+dispatch_duplicate_counter = create_counter(
+    meter,
+    name="pipo.dispatch.queries.duplicate",
+    description="Number of queries suppressed for duplicating a recent query",
+    unit="queries",
+)
+
+dispatch_split_counter = create_counter(
+    meter,
+    name="pipo.dispatch.requests.split",
+    description="Number of oversized requests split into child requests",
+    unit="requests",
+)
+
+dispatch_resumed_counter = create_counter(
+    meter,
+    name="pipo.dispatch.resumed",
+    description="Number of redelivered requests and operations not dispatched again",
+    unit="1",
+    labels=("scope",),
+)
+
+dispatch_throttled_counter = create_counter(
+    meter,
+    name="pipo.dispatch.operations.throttled",
+    description="Number of operations deferred by provider rate limits",
+    unit="operations",
+    labels=("routing_key", "action"),
+)
+
+create_observable_gauge(
+    meter,
+    name="pipo.dispatch.rate_limit.tokens",
+    description="Operations publishable before throttling, negative if deferred",
+    unit="operations",
+    label="routing_key",
+    observe={
+        routing_key: lambda bucket=bucket: bucket.tokens
+        for routing_key, bucket in rate_limiter
+    },
+)
+
+if concurrency is not None:
+    create_observable_gauge(
+        meter,
+        name="pipo.dispatch.concurrency",
+        description="Adaptive limit and number of requests handled at once",
+        unit="requests",
+        label="state",
+        observe={
+            "limit": lambda: concurrency.limit,
+            "in_flight": lambda: concurrency.in_flight,
+        },
+    )
+
+
+def __provider(source: SourcePair) -> str:
+    """Provide provider exchange routing key for source."""
+    routing_key = settings.player.queue.service.transmuter.routing_key
+    return f"{routing_key}.{source.handler_type}.{source.operation}"
+
+
+def __lane(
+    request: MusicRequest, sources: Iterable[SourcePair]
+) -> Tuple[str, Iterable[SourcePair]]:
+    """Provide request latency class and its sources.
+
+    Requests of a few queries without playlists are interactive, their sources are
+    classified upfront to tell, larger requests and split children are bulk.
+    """
+    if request.chunk is not None or (
+        len(request.query) > settings.dispatch.priority.max_interactive
+    ):
+        return BULK, sources
+    sources = list(sources)
+    if any(source.operation == YoutubeOperations.PLAYLIST for source in sources):
+        return BULK, sources
+    return INTERACTIVE, sources
+
+
+def __lane_options(lane: str) -> Dict[str, Any]:
+    """Provide publish options of latency class, its AMQP priority if any."""
+    level = (settings.dispatch.priority.levels or {}).get(lane)
+    return {} if level is None else {"priority": int(level)}
+
+
+def __lane_routing_key(provider: str, lane: str) -> str:
+    """Provide provider exchange routing key of latency class."""
+    suffix = (settings.dispatch.priority.lanes or {}).get(lane)
+    return f"{provider}.{suffix}" if suffix else provider
+
+
+def __operation_encoder(request: MusicRequest) -> Callable[[str, str, str], bytes]:
+    """Provide serializer of request operations in publish codec."""
+    if publish_codec is json_codec:
+        return ProviderOperationEncoder(
+            uuid=request.uuid,
+            server_id=request.server_id,
+            shuffle=request.shuffle,
+        ).encode
+
+    def encode(provider: str, operation: str, query: str) -> bytes:
+        return publish_codec.encode(
+            {
+                "uuid": request.uuid,
+                "provider": provider,
+                "server_id": request.server_id,
+                "operation": str(operation),
+                "shuffle": request.shuffle,
+                "query": query,
+            }
+        )
+
+    return encode
+
+
+async def __publish(body: bytes, **options: Any) -> None:
+    """Publish to broker, recording the outcome in health state."""
+    try:
+        await get_broker().publish(body, **options)
+    except Exception:
+        __health().publish_failed()
+        raise
+    __health().published()
+
+
+async def __publish_operation(
+    provider: str, message_type: str, body: bytes, lane: str = BULK
+) -> None:
+    """Publish operation to provider exchange, deferring it while throttled.
+
+    Short deferrals are awaited, longer ones are published to the routing key delay
+    queue expiring once the operation is due, releasing the consumer. Operations are
+    published with their latency class priority and routing key, publish latency
+    is recorded for both, delayed publishes being confirmed by the same broker.
+    """
+    routing_key = __lane_routing_key(provider, lane)
+    delay = rate_limiter.reserve(provider)
+    delayed = delay > settings.dispatch.rate_limit.max_wait
+    if delayed:
+        queue = __delay_queue(routing_key)
+        await get_broker().declare_queue(queue)
+        destination = {"queue": queue, "expiration": delay}
+    else:
+        if delay:
+            dispatch_throttled_counter.add(
+                1, {"routing_key": provider, "action": "wait"}
+            )
+            await asyncio.sleep(delay)
+        destination = {"routing_key": routing_key, "exchange": provider_exch}
+    start = time.perf_counter()
+    await __publish(
+        body,
+        content_type=publish_codec.content_type,
+        message_type=message_type,
+        **destination,
+        **__lane_options(lane),
+    )
+    latency = time.perf_counter() - start
+    dispatch_publish_histogram.record(latency, {"routing_key": provider})
+    if concurrency is not None:
+        concurrency.record(latency)
+    if delayed:
+        dispatch_throttled_counter.add(1, {"routing_key": provider, "action": "delay"})
+
+
+def __operations(
+    request: MusicRequest, sources: Iterable[SourcePair]
+) -> Iterator[Tuple[str, str, bytes]]:
+    """Provide provider routing key, message type and body of request operations."""
+    batch = settings.dispatch.publish.batch
+    if not batch.enabled:
+        encode = __operation_encoder(request)
+        for source in sources:
+            provider = __provider(source)
+            yield (
+                provider,
+                ProviderOperation.message_type,
+                encode(provider, source.operation, source.query),
+            )
+        return
+    for provider, group in batched_by(sources, __provider, batch.max_size):
+        operation = ProviderOperationBatch(
+            uuid=request.uuid,
+            server_id=request.server_id,
+            provider=provider,
+            operation=group[0].operation,
+            shuffle=request.shuffle,
+            queries=[source.query for source in group],
+        )
+        yield (
+            provider,
+            ProviderOperationBatch.message_type,
+            publish_codec.encode(operation.model_dump()),
+        )
+
+
+async def __publish_operations(
+    server_id: str,
+    publish: Callable[[Tuple[str, str, bytes]], Awaitable[None]],
+    operations: Iterable[Tuple[str, str, bytes]],
+    lane: str = BULK,
+) -> None:
+    """Publish request operations, taking turns with other servers if scheduled.
+
+    Interactive operations are scheduled ahead of bulk ones.
+    """
+    max_in_flight = min(
+        settings.dispatch.publish.max_in_flight,
+        settings.dispatch.streaming.max_resident,
+    )
+    if scheduler is None:
+        await publish_all(publish, operations, max_in_flight=max_in_flight)
+        return
+    await scheduler.submit(
+        server_id,
+        publish,
+        operations,
+        max_in_flight=max_in_flight,
+        priority=int(lane == INTERACTIVE),
+    )
+
+
+def __oversized(request: MusicRequest, max_queries: int) -> bool:
+    """Whether request should be split, child requests are never split again."""
+    return (
+        request.chunk is None and bool(max_queries) and len(request.query) > max_queries
+    )
+
+
+async def __split(logger: logging.Logger, request: MusicRequest, size: int) -> None:
+    """Re-enqueue request as child requests of at most size queries."""
+    with tracer.start_as_current_span("dispatch.split") as sp:
+
+        async def publish(child: MusicRequest) -> None:
+            await __publish(
+                publish_codec.encode(child.model_dump()),
+                queue=dispatcher_queue,
+                content_type=publish_codec.content_type,
+                **__lane_options(BULK),
+            )
+
+        chunks = await publish_all(
+            publish,
+            request.split(size),
+            max_in_flight=settings.dispatch.publish.max_in_flight,
+        )
+        sp.set_attribute("dispatch.split.chunks", chunks)
+    dispatch_split_counter.add(1)
+    logger.info("Split request %s in %d chunks", request.uuid, chunks)
+
+
+def __progress_key(request: MusicRequest) -> str:
+    """Provide progress key of request, child requests share their parent uuid."""
+    if request.chunk is None:
+        return str(request.uuid)
+    return f"{request.uuid}:{request.chunk}"
+
+
+def __dispatched(
+    logger: logging.Logger, request: MusicRequest, request_key: str
+) -> bool:
+    """Whether request was completely dispatched by a previous delivery."""
+    progress = __progress()
+    if progress is None or not progress.completed(request_key):
+        return False
+    logger.info("Skipping already dispatched request: %s", request.uuid)
+    dispatch_resumed_counter.add(1, {"scope": "request"})
+    return True
+
+
+def __complete(request_key: str) -> None:
+    """Record request as completely dispatched."""
+    progress = __progress()
+    if progress is not None:
+        progress.complete(request_key)
+
+
+def __resumable(
+    request_key: str, publish: Callable[[Tuple[str, str, bytes]], Awaitable[None]]
+) -> Callable[[Tuple[str, str, bytes]], Awaitable[None]]:
+    """Wrap publish to skip operations published by a previous delivery."""
+    progress = __progress()
+    if progress is None:
+        return publish
+    published = progress.published(request_key)
+
+    async def resume(operation: Tuple[str, str, bytes]) -> None:
+        key = operation_key(operation[2])
+        if key in published:
+            dispatch_resumed_counter.add(1, {"scope": "operation"})
+            return
+        await publish(operation)
+        progress.record(request_key, key)
+
+    return resume
+
+
+def __timed(items: Iterable, timings: collections.Counter, stage: str) -> Iterator:
+    """Iterate items, accumulating seconds spent producing them into stage timing."""
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            timings[stage] += time.perf_counter() - start
+        yield item
+
+
+def __record(
+    timings: collections.Counter,
+    classified: collections.Counter,
+    published: collections.Counter,
+) -> None:
+    """Record request dispatch stage timings, classified sources and fan-out."""
+    # producing operations includes classifying their sources
+    dispatch_stage_histogram.record(
+        timings["classification"], {"stage": "classification"}
+    )
+    dispatch_stage_histogram.record(
+        max(0.0, timings["production"] - timings["classification"]),
+        {"stage": "encoding"},
+    )
+    for (handler_type, operation), count in classified.items():
+        dispatch_sources_counter.add(
+            count, {"handler_type": handler_type, "operation": operation}
+        )
+    dispatch_fanout_histogram.record(published.total())
+
+
+def __summarize(span: Span, published: collections.Counter) -> None:
+    """Record per provider publish counts on span, bounded by the provider count."""
+    if not span.is_recording():
+        return
+    span.set_attribute("dispatch.published", published.total())
+    span.add_event(
+        "dispatch.process.sources",
+        attributes={
+            "published": published.total(),
+            "omitted_events": max(0, published.total() - max_source_events),
+            **{f"provider.{name}": count for name, count in published.items()},
+        },
+    )
+
+
+def __result(processed: int, suppressed: int) -> str:
+    """Provide request result, suppressed if all its sources were duplicates."""
+    if processed:
+        return SUCCESS
+    return SUPPRESSED if suppressed else FAIL
+
+
+async def __dispatch(
+    logger: logging.Logger,
     msg: RabbitMessage,
     request: MusicRequest,
 ) -> None:
+    started = time.perf_counter()
     with tracer.start_as_current_span("dispatch", kind=SpanKind.SERVER):
         logger.debug("Processing request: %s", request)
+        request_key = __progress_key(request)
+        if __dispatched(logger, request, request_key):
+            return
         baggage = Baggage.from_headers(msg.headers)
+        split = settings.dispatch.split
+        if __oversized(request, split.max_queries):
+            await __split(logger, request, split.chunk_size)
+            __complete(request_key)
+            return
         with tracer.start_as_current_span("dispatch.process.queries"):
-            sources = SourceOracle.process_queries(request.query, request.shuffle)
-        with tracer.start_as_current_span("dispatch.process.sources") as sp:
-            for source in sources:
-                logger.debug("Processing source: %s", source)
-                provider = f"{settings.player.queue.service.transmuter.routing_key}.{source.handler_type}.{source.operation}"
-                request = ProviderOperation(
-                    uuid=request.uuid,
-                    server_id=request.server_id,
-                    provider=provider,
-                    operation=source.operation,
-                    shuffle=request.shuffle,
-                    query=source.query,
+            queries = request.query
+            if request.shuffle:
+                # seeded by request so redeliveries are processed in the same order
+                queries = SourceOracle.shuffled(
+                    queries,
+                    seed=str(request.uuid),
+                    chunk_size=settings.dispatch.streaming.max_resident,
                 )
-                logger.debug(
-                    "Will publish to provider %s request: %s", provider, request
-                )
-                baggage.set("sub-query", source.query or "")
-                await router.broker.publish(
-                    request,
-                    routing_key=provider,
-                    exchange=provider_exch,
-                )
-                sp.add_event("dispatch.process.source", attributes={"source": source})
+            timings: collections.Counter = collections.Counter()
+            sources = __timed(
+                SourceOracle.process_queries(
+                    queries,
+                    classifier=classifier,
+                    unique=settings.dispatch.deduplication.request,
+                ),
+                timings,
+                "classification",
+            )
+            lane, sources = __lane(request, sources)
+        with tracer.start_as_current_span("dispatch.process.sources") as sp:
+            sp.set_attribute("dispatch.lane", lane)
+            processed = suppressed = 0
+            classified: collections.Counter = collections.Counter()
+
+            def fresh_sources() -> Iterator[SourcePair]:
+                nonlocal processed, suppressed
+                for source in sources:
+                    logger.debug("Processing source: %s", source)
+                    classified[source.handler_type, source.operation] += 1
+                    if duplicate_window is not None and duplicate_window.is_duplicate(
+                        request.server_id, request.uuid, source.query
+                    ):
+                        logger.info("Skipping recently dispatched source: %s", source)
+                        dispatch_duplicate_counter.add(1)
+                        suppressed += 1
+                        continue
+                    processed += 1
+                    baggage.set("sub-query", source.query or "")
+                    yield source
+
+            published: collections.Counter = collections.Counter()
+
+            async def publish(operation: Tuple[str, str, bytes]) -> None:
+                provider, message_type, body = operation
+                logger.debug("Will publish to provider %s request: %s", provider, body)
+                await __publish_operation(provider, message_type, body, lane)
+                published[provider] += 1
+                if sp.is_recording() and published.total() <= max_source_events:
+                    sp.add_event(
+                        "dispatch.process.source", attributes={"provider": provider}
+                    )
                 logger.info("Published request: %s", request.uuid)
-        if sources:
-            dispatch_success_counter.add(1)
-        else:
-            dispatch_fail_counter.add(1)
+
+            await __publish_operations(
+                request.server_id,
+                __resumable(request_key, publish),
+                __timed(__operations(request, fresh_sources()), timings, "production"),
+                lane,
+            )
+            __complete(request_key)
+            __summarize(sp, published)
+        __record(timings, classified, published)
+        result = __result(processed, suppressed)
+        result_counters[result].add(1)
+        dispatch_duration_histogram.record(
+            time.perf_counter() - started, {"result": result, "lane": lane}
+        )
+
+
+def __subscribe(router: Union["RabbitRouter", "RabbitBroker"]) -> Any:
+    """Subscribe dispatch handler to router, providing subscriber."""
+    # handler arguments are resolved by FastAPI dependencies within the application
+    if __serves_http():
+        from faststream.rabbit.fastapi import Logger, RabbitMessage
+    else:
+        from faststream.rabbit.annotations import Logger, RabbitMessage
+
+    @router.subscriber(
+        queue=dispatcher_queue,
+        decoder=decode_message,
+        description="Consumes from dispatch topic and produces to provider exchange",
+    )
+    async def dispatch(
+        logger: Logger,
+        msg: RabbitMessage,
+        request: MusicRequest,
+    ) -> None:
+        profile.first_message()
+        with __health().handling():
+            if concurrency is None:
+                await __dispatch(logger, msg, request)
+                return
+            async with concurrency:
+                await __dispatch(logger, msg, request)
+
+    return dispatch
+
+
+profile.mark("import")
@@ -2,9 +2,9 @@
 from fastapi import FastAPI
 from prometheus_client import REGISTRY, make_asgi_app
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from faststream.asgi import make_ping_asgi, get, AsgiResponse
+from faststream.asgi import get, AsgiResponse
 from prometheus_client import make_asgi_app, REGISTRY
-from pipo_dispatch._queues import get_router
+from pipo_dispatch._queues import get_router, readiness
 from pipo_dispatch.config import settings
 
 
@@ -13,15 +13,34 @@ async def liveness_ping(scope):
     return AsgiResponse(b"", status_code=settings.probes.liveness.status_code)
 
 
+@get
+async def readiness_ping(scope):
+    """Answer readiness with the failing conditions, if any."""
+    failures = await readiness()
+    if failures:
+        return AsgiResponse(", ".join(failures).encode(), status_code=500)
+    return AsgiResponse(b"", status_code=204)
+
+
 def create_app(router=None) -> FastAPI:
     router = router or get_router()
     application = FastAPI()
     application.include_router(router)
     application.mount(settings.probes.liveness.endpoint, liveness_ping)
-    application.mount(
-        settings.probes.readiness.endpoint,
-        make_ping_asgi(router.broker, timeout=settings.probes.readiness.timeout),
-    )
+    application.mount(settings.probes.readiness.endpoint, readiness_ping)
     application.mount(settings.telemetry.metrics.endpoint, make_asgi_app(REGISTRY))
+    if settings.debug.enabled:
+        from pipo_dispatch.debug import create_debug_app
+
+        application.mount(
+            settings.debug.endpoint,
+            create_debug_app(
+                settings.debug.token,
+                max_seconds=settings.debug.max_seconds,
+                interval=settings.debug.sampling_interval,
+                limit=settings.debug.limit,
+                frames=settings.debug.traceback_frames,
+            ),
+        )
     FastAPIInstrumentor.instrument_app(application)
     return application
@@ -1,5 +1,6 @@
 from abc import abstractmethod
-from urllib.parse import urlparse
+from typing import Optional, Tuple
+from urllib.parse import SplitResult, urlparse
 
 from pipo_dispatch.audio_source.source_handler import SourceHandler
 from pipo_dispatch.audio_source.source_pair import SourcePair
@@ -9,6 +10,7 @@ class BaseHandler(SourceHandler):
     """Defines handler default behavior."""
 
     _next_handler: SourceHandler = None
+    hosts: Tuple[str, ...] = ()
 
     def set_next(self, handler: SourceHandler) -> SourceHandler:
         """Define next handler."""
@@ -22,6 +24,41 @@ class BaseHandler(SourceHandler):
             return self._next_handler.handle(source)
         return None
 
+    @staticmethod
+    def operation(url: Optional[SplitResult]) -> str:
+        """Provide operation for an already parsed source.
+
+        Parameters
+        ----------
+        url : Optional[SplitResult]
+            Parsed source url, `None` for non url sources.
+
+        Returns
+        -------
+        str
+            Operation type to be requested from the provider.
+        """
+        return "url"
+
+    @staticmethod
+    def canonical(url: SplitResult) -> str:
+        """Provide canonical form of an already parsed source url.
+
+        Equivalent urls, such as host aliases or urls differing only on tracking
+        parameters, share the same canonical form.
+
+        Parameters
+        ----------
+        url : SplitResult
+            Parsed source url.
+
+        Returns
+        -------
+        str
+            Canonical source url.
+        """
+        return url.geturl()
+
     @staticmethod
     def is_url(url: str) -> bool:
         try:
@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from opentelemetry import metrics
+
+from pipo_dispatch.audio_source.source_classifier import Classifier
+from pipo_dispatch.audio_source.source_pair import SourcePair
+from pipo_dispatch.telemetry import create_counter
+
+meter = metrics.get_meter(__name__)
+
+cache_hit_counter = create_counter(
+    meter,
+    name="pipo.dispatch.classification.cache.hits",
+    description="Number of query classifications served from cache",
+    unit="queries",
+)
+
+cache_miss_counter = create_counter(
+    meter,
+    name="pipo.dispatch.classification.cache.misses",
+    description="Number of query classifications not found in cache",
+    unit="queries",
+)
+
+cache_eviction_counter = create_counter(
+    meter,
+    name="pipo.dispatch.classification.cache.evictions",
+    description="Number of query classifications evicted from cache",
+    unit="queries",
+    labels=("reason",),
+)
+
+
+class ClassificationCache:
+    """Bounded LRU cache of query classifications with entry expiration.
+
+    Memoizes a classifier by normalized query. Entries are evicted once cache is
+    full, least recently used first, or once their time to live elapses.
+    """
+
+    __classifier: Classifier
+    __max_entries: int
+    __ttl: float
+    __clock: Callable[[], float]
+    __entries: "OrderedDict[str, Tuple[float, Optional[SourcePair]]]"
+
+    def __init__(
+        self,
+        classifier: Classifier,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Wrap classifier with cache.
+
+        Parameters
+        ----------
+        classifier : Classifier
+            Classifier whose results are cached.
+        max_entries : int
+            Maximum number of cached classifications.
+        ttl : float
+            Seconds a classification is kept in cache.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__classifier = classifier
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Provide number of cached classifications."""
+        return len(self.__entries)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Provide cache key for query, stripped as `SourceClassifier` does."""
+        return query.strip()
+
+    def classify(self, query: str) -> Optional[SourcePair]:
+        """Match query with most fitting handler, reusing previous results.
+
+        Parameters
+        ----------
+        query : str
+            Url or search query.
+
+        Returns
+        -------
+        Optional[SourcePair]
+            Normalized query and its handler pair, `None` if no handler is able to
+            process it.
+        """
+        key = self.normalize(query)
+        now = self.__clock()
+        entry = self.__entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > now:
+                self.__entries.move_to_end(key)
+                cache_hit_counter.add(1)
+                return result
+            del self.__entries[key]
+            cache_eviction_counter.add(1, {"reason": "expired"})
+        cache_miss_counter.add(1)
+        result = self.__classifier.classify(key)
+        self.__entries[key] = (now + self.__ttl, result)
+        if len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            cache_eviction_counter.add(1, {"reason": "size"})
+        return result
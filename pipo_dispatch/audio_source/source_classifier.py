@@ -0,0 +1,79 @@
+from typing import Optional, Protocol
+from urllib.parse import urlsplit
+
+from pipo_dispatch.audio_source.source_pair import SourcePair
+from pipo_dispatch.audio_source.source_registry import SourceRegistry
+
+_URL_PREFIXES = ("https", "http")
+
+
+class Classifier(Protocol):
+    """Matches a query with its source handler."""
+
+    def classify(self, query: str) -> Optional[SourcePair]:
+        """Match query with most fitting handler."""
+
+
+class SourceClassifier:
+    """Classifies queries into source handler pairs.
+
+    Replaces walking a handler chain per query. Each query is parsed at most once and
+    its url host resolved through the registry lookup table.
+    """
+
+    __registry: SourceRegistry
+    __canonicalize: bool
+
+    def __init__(self, registry: SourceRegistry, canonicalize: bool = False) -> None:
+        """Build classifier.
+
+        Parameters
+        ----------
+        registry : SourceRegistry
+            Handlers available for classification.
+        canonicalize : bool
+            Whether url queries are replaced by their handler canonical form.
+        """
+        self.__registry = registry
+        self.__canonicalize = canonicalize
+
+    def classify(self, query: str) -> Optional[SourcePair]:
+        """Match query with most fitting handler.
+
+        Parameters
+        ----------
+        query : str
+            Url or search query.
+
+        Returns
+        -------
+        Optional[SourcePair]
+            Stripped query and its handler pair, `None` if no handler is able to
+            process it.
+        """
+        query = query.strip()
+        if not query:
+            return None
+        # urls require a scheme separator, skip parsing plain search queries
+        if ":" in query:
+            try:
+                url = urlsplit(query)
+                if url.scheme and url.netloc:
+                    handler = self.__registry.by_host(url.netloc)
+                    if handler is None:
+                        return None
+                    return SourcePair(
+                        query=handler.canonical(url) if self.__canonicalize else query,
+                        handler_type=handler.name,
+                        operation=handler.operation(url),
+                    )
+            except ValueError:
+                return None
+        if query.startswith(_URL_PREFIXES):
+            return None
+        handler = self.__registry.query_handler
+        return SourcePair(
+            query=query,
+            handler_type=handler.name,
+            operation=handler.operation(None),
+        )
@@ -1,24 +1,13 @@
+from typing import Type
+
 from pipo_dispatch.audio_source.base_handler import BaseHandler
-from pipo_dispatch.audio_source.null_handler import NullHandler
-from pipo_dispatch.audio_source.spotify_handler import SpotifyHandler
-from pipo_dispatch.audio_source.youtube_handler import (
-    YoutubeHandler,
-    YoutubeQueryHandler,
-)
+from pipo_dispatch.audio_source.source_registry import registry
 
 
 class SourceFactory:
     """Source handler factory."""
 
     @staticmethod
-    def get_source(source_type: str) -> BaseHandler:
+    def get_source(source_type: str) -> Type[BaseHandler]:
         """Get source by name."""
-        handlers = (
-            SpotifyHandler,
-            YoutubeHandler,
-            YoutubeQueryHandler,
-            NullHandler,
-        )
-        return {handler.name: handler for handler in handlers}.get(
-            source_type, NullHandler.name
-        )
+        return registry.by_name(source_type)
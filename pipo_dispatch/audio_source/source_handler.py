@@ -13,7 +13,6 @@ class SourceHandler(ABC):
 
     name: str
     _logger: logging.Logger
-    # TODO implement caching solution
 
     def __init__(self) -> None:
         self._logger = logging.getLogger(__name__)
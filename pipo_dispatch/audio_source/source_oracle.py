@@ -1,46 +1,92 @@
+import math
 import random
-from typing import Iterable, Iterator
+from typing import Iterable, Iterator, Optional, Sequence, Union
 
-from pipo_dispatch.audio_source.base_handler import BaseHandler
+from pipo_dispatch.audio_source.source_classifier import Classifier, SourceClassifier
 from pipo_dispatch.audio_source.source_pair import SourcePair
-from pipo_dispatch.audio_source.spotify_handler import SpotifyHandler
-from pipo_dispatch.audio_source.youtube_handler import (
-    YoutubeHandler,
-    YoutubeQueryHandler,
-)
+from pipo_dispatch.audio_source.source_registry import registry
 
 
 class SourceOracle:
     """Based on received queries provides the most appropriate source handlers."""
 
+    classifier = SourceClassifier(registry)
+
     @staticmethod
-    def __handlers() -> BaseHandler:
-        """Provide handler chain."""
-        handlers = YoutubeHandler()
-        handlers.set_next(SpotifyHandler()).set_next(YoutubeQueryHandler())
-        return handlers
+    def shuffled(
+        queries: Sequence[str],
+        seed: Optional[Union[int, str]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[str]:
+        """Provide queries in a seeded random order, one chunk at a time.
+
+        Queries are split in strided chunks, each chunk holding queries spread across
+        the whole sequence. Chunk order and queries within each chunk are shuffled,
+        so at most one chunk is copied at a time. Sequences no longer than a chunk
+        are fully shuffled.
+
+        Parameters
+        ----------
+        queries : Sequence[str]
+            Queries to shuffle, left unchanged.
+        seed : Optional[Union[int, str]]
+            Random seed, same seed and queries always provide the same order.
+        chunk_size : Optional[int]
+            Maximum number of queries copied at a time, unbounded by default.
+
+        Returns
+        -------
+        Iterator[str]
+            Shuffled queries.
+        """
+        rng = random.Random(seed)  # noqa: S311
+        chunks = math.ceil(len(queries) / chunk_size) if chunk_size else 1
+        order = list(range(chunks))
+        rng.shuffle(order)
+        for index in order:
+            chunk = list(queries[index::chunks])
+            rng.shuffle(chunk)
+            yield from chunk
 
     @staticmethod
     def process_queries(
         queries: Iterable[str],
         shuffle: bool = False,
+        classifier: Optional[Classifier] = None,
+        unique: bool = False,
     ) -> Iterator[SourcePair]:
         """Match queries with most fitting handlers.
 
+        Queries are classified lazily, as pairs are consumed.
+
         Parameters
         ----------
         queries : Iterable[str]
-            Queries to process.
+            Queries to process, a sequence when shuffled.
+        shuffle : bool
+            Whether queries should be processed in random order, see `shuffled` for
+            seeded and memory bounded shuffling.
+        classifier : Optional[Classifier]
+            Classifier matching each query, defaults to the registry classifier.
+        unique : bool
+            Whether repeated classified queries should be provided only once.
 
         Returns
         -------
         Iterable[SourcePair]
             Based on queries provides the most appropriate source handler pairs.
         """
-        handlers = SourceOracle.__handlers()
+        if classifier is None:
+            classifier = SourceOracle.classifier
         if shuffle:
-            random.shuffle(queries)
+            queries = SourceOracle.shuffled(queries)
+        seen = set()
         for query in queries:
-            result = handlers.handle(query)
-            if result is not None:
-                yield result
+            result = classifier.classify(query)
+            if result is None:
+                continue
+            if unique:
+                if result.query in seen:
+                    continue
+                seen.add(result.query)
+            yield result
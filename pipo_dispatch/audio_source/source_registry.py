@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, Optional, Tuple, Type
+
+from pipo_dispatch.audio_source.base_handler import BaseHandler
+from pipo_dispatch.audio_source.null_handler import NullHandler
+from pipo_dispatch.audio_source.spotify_handler import SpotifyHandler
+from pipo_dispatch.audio_source.youtube_handler import (
+    YoutubeHandler,
+    YoutubeQueryHandler,
+)
+
+
+class SourceRegistry:
+    """Registered source handlers.
+
+    Indexes handlers once, by name and by served url host, so lookups do not depend
+    on the number of registered handlers.
+    """
+
+    url_handlers: Tuple[Type[BaseHandler], ...]
+    query_handler: Type[BaseHandler]
+    __by_name: Dict[str, Type[BaseHandler]]
+    __by_host: Dict[str, Type[BaseHandler]]
+
+    def __init__(
+        self,
+        url_handlers: Iterable[Type[BaseHandler]],
+        query_handler: Type[BaseHandler],
+    ) -> None:
+        self.url_handlers = tuple(url_handlers)
+        self.query_handler = query_handler
+        handlers = (*self.url_handlers, query_handler, NullHandler)
+        self.__by_name = {handler.name: handler for handler in handlers}
+        self.__by_host = {}
+        for handler in reversed(self.url_handlers):
+            self.__by_host.update(dict.fromkeys(handler.hosts, handler))
+
+    def by_name(self, name: str) -> Type[BaseHandler]:
+        """Get handler by name, defaults to `NullHandler`."""
+        return self.__by_name.get(name, NullHandler)
+
+    def by_host(self, netloc: str) -> Optional[Type[BaseHandler]]:
+        """Get handler serving url host.
+
+        Unknown subdomains are matched against their parent domains.
+
+        Parameters
+        ----------
+        netloc : str
+            Url network location, may include user information and port.
+
+        Returns
+        -------
+        Optional[Type[BaseHandler]]
+            Handler serving host, `None` if host is not served.
+        """
+        handler = self.__by_host.get(netloc)
+        if handler is not None:
+            return handler
+        host = netloc.rpartition("@")[2]
+        if not host.startswith("["):
+            host = host.partition(":")[0]
+        host = host.lower()
+        while host:
+            handler = self.__by_host.get(host)
+            if handler is not None:
+                return handler
+            host = host.partition(".")[2]
+        return None
+
+
+registry = SourceRegistry(
+    url_handlers=(YoutubeHandler, SpotifyHandler),
+    query_handler=YoutubeQueryHandler,
+)
@@ -1,6 +1,8 @@
 from enum import StrEnum
 import logging
-from typing import Iterable
+import re
+from typing import Iterable, Optional
+from urllib.parse import SplitResult, urlunsplit
 
 from pipo_dispatch.audio_source.base_handler import BaseHandler
 from pipo_dispatch.audio_source.source_pair import SourcePair
@@ -13,10 +15,30 @@ class SpotifyOperations(StrEnum):
     URL = "url"
 
 
+_LOCALE_PATH = re.compile(r"^/intl-[\w-]+(?=/)")
+_CANONICAL_HOST = "open.spotify.com"
+
+
 class SpotifyHandler(BaseHandler):
     """Handles spotify url music."""
 
     name = SourceType.SPOTIFY
+    hosts = (
+        "spotify.com",
+        "open.spotify.com",
+        "play.spotify.com",
+    )
+
+    @staticmethod
+    def operation(url: Optional[SplitResult]) -> str:
+        """Provide url operation."""
+        return SpotifyOperations.URL
+
+    @staticmethod
+    def canonical(url: SplitResult) -> str:
+        """Provide `open.spotify.com` url without locale prefix nor parameters."""
+        path = _LOCALE_PATH.sub("", url.path)
+        return urlunsplit(("https", _CANONICAL_HOST, path, "", ""))
 
     @staticmethod
     def __valid_source(source: Iterable[str]) -> bool:
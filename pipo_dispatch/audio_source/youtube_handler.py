@@ -1,6 +1,8 @@
 import logging
-from typing import Iterable
+import re
+from typing import Iterable, Optional
 from enum import StrEnum
+from urllib.parse import SplitResult, parse_qsl, urlencode, urlunsplit
 
 from pipo_dispatch.audio_source.base_handler import BaseHandler
 from pipo_dispatch.audio_source.source_pair import SourcePair
@@ -15,10 +17,55 @@ class YoutubeOperations(StrEnum):
     QUERY = "query"
 
 
+_PLAYLIST_PARAMETER = re.compile(r"(?:^|&)list=")
+_VIDEO_PATH = re.compile(r"^/(?:shorts|embed|live|v)/([\w-]+)")
+_SHORT_HOST = "youtu.be"
+_CANONICAL_HOST = "www.youtube.com"
+# parameters changing what is played, remaining ones are tracking or ui related
+_CANONICAL_PARAMETERS = frozenset(("v", "list", "index", "t", "start"))
+
+
 class YoutubeHandler(BaseHandler):
     """Handles youtube url music."""
 
     name = SourceType.YOUTUBE
+    hosts = (
+        "youtube.com",
+        "www.youtube.com",
+        "m.youtube.com",
+        "music.youtube.com",
+        "youtu.be",
+    )
+
+    @staticmethod
+    def operation(url: Optional[SplitResult]) -> str:
+        """Provide playlist operation for urls referencing a list."""
+        if url and _PLAYLIST_PARAMETER.search(url.query):
+            return YoutubeOperations.PLAYLIST
+        return YoutubeOperations.URL
+
+    @staticmethod
+    def canonical(url: SplitResult) -> str:
+        """Provide `www.youtube.com` url without tracking parameters.
+
+        Short links and video paths such as `/shorts/<id>` are rewritten as
+        `/watch?v=<id>`.
+        """
+        parameters = [
+            (key, value)
+            for key, value in parse_qsl(url.query, keep_blank_values=True)
+            if key in _CANONICAL_PARAMETERS
+        ]
+        path = url.path
+        if url.hostname == _SHORT_HOST:
+            video = path.lstrip("/").partition("/")[0]
+        else:
+            match = _VIDEO_PATH.match(path)
+            video = match[1] if match else None
+        if video:
+            path = "/watch"
+            parameters = [("v", video)] + [p for p in parameters if p[0] != "v"]
+        return urlunsplit(("https", _CANONICAL_HOST, path, urlencode(parameters), ""))
 
     @staticmethod
     def __valid_source(source: Iterable[str]) -> bool:
@@ -55,6 +102,11 @@ class YoutubeQueryHandler(BaseHandler):
 
     name = SourceType.YOUTUBE
 
+    @staticmethod
+    def operation(url: Optional[SplitResult]) -> str:
+        """Provide query operation."""
+        return YoutubeOperations.QUERY
+
     @staticmethod
     def __valid_source(source: str) -> bool:
         """Check whether source is an url."""
@@ -0,0 +1,122 @@
+"""Message body codecs.
+
+Codecs are negotiated through the AMQP `content-type` property. Faster
+implementations are used when their optional dependencies are installed, messages
+without a known content type are handled as JSON so older producers keep working.
+"""
+
+import json
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, ClassVar, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+if TYPE_CHECKING:
+    from faststream.rabbit.message import RabbitMessage
+    from faststream.types import DecodedMessage
+
+
+class Codec(ABC):
+    """Encodes and decodes message bodies of a given content type."""
+
+    content_type: ClassVar[str]
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        """Serialize JSON compatible value."""
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Any:
+        """Deserialize message body."""
+
+
+class JsonCodec(Codec):
+    """JSON codec, backed by `orjson` when available."""
+
+    content_type = "application/json"
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize value as compact JSON."""
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def decode(self, body: bytes) -> Any:
+        """Deserialize JSON body."""
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack codec, requires `msgpack`."""
+
+    content_type = "application/msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize value as MessagePack."""
+        return msgpack.packb(value)
+
+    def decode(self, body: bytes) -> Any:
+        """Deserialize MessagePack body."""
+        return msgpack.unpackb(body)
+
+
+json_codec = JsonCodec()
+
+codecs: Dict[str, Codec] = {json_codec.content_type: json_codec}
+if msgpack is not None:
+    codecs[MsgpackCodec.content_type] = MsgpackCodec()
+    codecs["application/x-msgpack"] = codecs[MsgpackCodec.content_type]
+
+
+def get_codec(content_type: Optional[str]) -> Codec:
+    """Get codec for content type.
+
+    Parameters
+    ----------
+    content_type : Optional[str]
+        Message content type, parameters such as charset are ignored.
+
+    Returns
+    -------
+    Codec
+        Codec for content type.
+
+    Raises
+    ------
+    ValueError
+        If no codec is available for content type.
+    """
+    if not content_type:
+        return json_codec
+    codec = codecs.get(content_type.partition(";")[0].strip().lower())
+    if codec is None:
+        raise ValueError(f"Unsupported content type '{content_type}'")  # noqa: TRY003
+    return codec
+
+
+async def decode_message(
+    msg: "RabbitMessage",
+    original_decoder: Callable[["RabbitMessage"], Awaitable["DecodedMessage"]],
+) -> "DecodedMessage":
+    """Decode message body based on its content type.
+
+    Falls back to the broker default decoder for messages without content type or
+    whose content type has no codec.
+    """
+    if not msg.content_type:
+        return await original_decoder(msg)
+    try:
+        codec = get_codec(msg.content_type)
+    except ValueError:
+        return await original_decoder(msg)
+    return codec.decode(msg.body)
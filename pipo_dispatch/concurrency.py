@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque
+
+
+class AdaptiveConcurrency:
+    """Limits concurrent work to a limit adapted by AIMD.
+
+    Additive increase, multiplicative decrease: each latency sample within target,
+    while the event loop keeps up, grows the limit by one per limit samples, roughly
+    one per round of concurrent work. A sample above target, or event loop lag above
+    its target, shrinks the limit by a backoff factor, at most once per cooldown so a
+    burst of slow samples caused by the same congestion backs off once.
+    """
+
+    __min_limit: int
+    __max_limit: int
+    __limit: float
+    __latency_target: float
+    __lag_target: float
+    __backoff: float
+    __cooldown: float
+    __lag: Callable[[], float]
+    __clock: Callable[[], float]
+    __backed_off: float
+    __in_flight: int
+    __waiters: Deque[asyncio.Future]
+
+    def __init__(  # noqa: PLR0913
+        self,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        lag_target: float,
+        initial: int = 0,
+        backoff: float = 0.7,
+        cooldown: float = 1,
+        lag: Callable[[], float] = lambda: 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Build limiter.
+
+        Parameters
+        ----------
+        min_limit : int
+            Lowest concurrency limit.
+        max_limit : int
+            Highest concurrency limit.
+        latency_target : float
+            Seconds per latency sample above which concurrency is reduced.
+        lag_target : float
+            Seconds of event loop lag above which concurrency is reduced.
+        initial : int
+            Initial concurrency limit, defaults to the highest limit.
+        backoff : float
+            Factor the limit is multiplied by when reduced.
+        cooldown : float
+            Minimum seconds between reductions.
+        lag : Callable[[], float]
+            Provides current event loop lag, in seconds.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__min_limit = max(min_limit, 1)
+        self.__max_limit = max(max_limit, self.__min_limit)
+        self.__limit = float(
+            min(max(initial or self.__max_limit, self.__min_limit), self.__max_limit)
+        )
+        self.__latency_target = latency_target
+        self.__lag_target = lag_target
+        self.__backoff = backoff
+        self.__cooldown = cooldown
+        self.__lag = lag
+        self.__clock = clock
+        self.__backed_off = float("-inf")
+        self.__in_flight = 0
+        self.__waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of concurrent work units holding the limiter."""
+        return self.__in_flight
+
+    def record(self, latency: float) -> None:
+        """Adapt limit to a latency sample.
+
+        Parameters
+        ----------
+        latency : float
+            Seconds taken by a unit of work, e.g. a publish confirmation.
+        """
+        if latency > self.__latency_target or self.__lag() > self.__lag_target:
+            now = self.__clock()
+            if now - self.__backed_off < self.__cooldown:
+                return
+            self.__backed_off = now
+            self.__limit = max(self.__min_limit, self.__limit * self.__backoff)
+            return
+        self.__limit = min(self.__max_limit, self.__limit + 1 / self.__limit)
+        self.__wake()
+
+    def __wake(self) -> None:
+        """Admit waiters while under limit."""
+        while self.__waiters and self.__in_flight < self.limit:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                self.__in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        """Wait until under limit, holding a concurrency slot."""
+        if self.__in_flight < self.limit and not self.__waiters:
+            self.__in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Release a held concurrency slot."""
+        self.__in_flight -= 1
+        self.__wake()
+
+    async def __aenter__(self) -> "AdaptiveConcurrency":
+        """Acquire concurrency slot."""
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """Release concurrency slot."""
+        self.release()
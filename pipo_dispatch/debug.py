@@ -0,0 +1,192 @@
+#!usr/bin/env python3
+"""On demand profiling endpoints.
+
+Samples the event loop thread stacks, profiles it deterministically or tracks
+allocations for a bounded number of seconds, only while a request is being served.
+Nothing runs, and the profilers are not imported, until then.
+"""
+
+import asyncio
+import collections
+import hmac
+import io
+import sys
+import threading
+import time
+from typing import AsyncIterator, Counter, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+COLLAPSED = "collapsed"
+PSTATS = "pstats"
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter[str]:
+    """Sample a thread stacks periodically.
+
+    Parameters
+    ----------
+    thread_id : int
+        Identifier of sampled thread.
+    seconds : float
+        Sampling duration.
+    interval : float
+        Seconds between samples.
+
+    Returns
+    -------
+    Counter[str]
+        Number of samples of each stack, frames root first separated by `;`.
+    """
+    counts: Counter[str] = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)  # noqa: SLF001
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_qualname} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+        del frame
+        time.sleep(interval)
+    return counts
+
+
+def collapsed(counts: Counter[str]) -> str:
+    """Format stack samples as collapsed stacks, as read by flame graph tools."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+async def profile_stats(seconds: float, limit: int) -> str:
+    """Profile the running event loop thread, providing cumulative time pstats."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+async def allocation_stats(seconds: float, limit: int, frames: int) -> str:
+    """Trace allocations, providing top allocation sites and their growth.
+
+    Tracing is started for the duration if not already running, e.g. enabled by
+    `PYTHONTRACEMALLOC`, and stopped afterwards.
+    """
+    import tracemalloc
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    sites = after.statistics("lineno")
+    growth = after.compare_to(before, "lineno")
+    return "\n".join(
+        [
+            f"Traced {sum(stat.size for stat in sites)} bytes",
+            f"Top {limit} allocation sites:",
+            *map(str, sites[:limit]),
+            f"Top {limit} allocation changes in {seconds}s:",
+            *map(str, growth[:limit]),
+            "",
+        ]
+    )
+
+
+def create_debug_app(  # noqa: PLR0913
+    token: str,
+    max_seconds: float = 60,
+    interval: float = 0.005,
+    limit: int = 50,
+    frames: int = 1,
+) -> FastAPI:
+    """Create application serving profiling endpoints to bearer token holders.
+
+    Profiling requests are served one at a time, concurrent ones are rejected.
+
+    Parameters
+    ----------
+    token : str
+        Bearer token required by every request.
+    max_seconds : float
+        Longest profiling duration accepted.
+    interval : float
+        Seconds between stack samples.
+    limit : int
+        Default number of reported pstats entries and allocation sites.
+    frames : int
+        Frames stored per traced allocation.
+
+    Returns
+    -------
+    FastAPI
+        Profiling application.
+
+    Raises
+    ------
+    ValueError
+        If token is empty.
+    """
+    if not token:
+        raise ValueError("Debug endpoints require a token")  # noqa: TRY003
+    bearer = HTTPBearer()
+    busy = asyncio.Lock()
+
+    async def authorize(
+        credentials: HTTPAuthorizationCredentials = Depends(bearer),  # noqa: B008
+    ) -> None:
+        if not hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    async def exclusive() -> AsyncIterator[None]:
+        if busy.locked():
+            raise HTTPException(status_code=409, detail="Profiling in progress")
+        async with busy:
+            yield
+
+    application = FastAPI(
+        dependencies=[Depends(authorize), Depends(exclusive)],
+        docs_url=None,
+        redoc_url=None,
+        openapi_url=None,
+    )
+
+    @application.get("/profile", response_class=PlainTextResponse)
+    async def profile(
+        seconds: float = Query(10, gt=0, le=max_seconds),
+        output: str = Query(
+            COLLAPSED, alias="format", pattern=f"^({COLLAPSED}|{PSTATS})$"
+        ),
+        entries: Optional[int] = Query(None, alias="limit", gt=0),
+    ) -> str:
+        if output == PSTATS:
+            return await profile_stats(seconds, entries or limit)
+        counts = await asyncio.to_thread(
+            sample_stacks, threading.get_ident(), seconds, interval
+        )
+        return collapsed(counts)
+
+    @application.get("/allocations", response_class=PlainTextResponse)
+    async def allocations(
+        seconds: float = Query(10, gt=0, le=max_seconds),
+        entries: Optional[int] = Query(None, alias="limit", gt=0),
+    ) -> str:
+        return await allocation_stats(seconds, entries or limit, frames)
+
+    return application
@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+
+class DuplicateWindow:
+    """Tracks recently dispatched queries per server.
+
+    Absorbs double submissions by flagging queries already dispatched for the same
+    server, by a different request, within a time window. Queries recorded by a
+    request are never flagged for that same request so redeliveries are processed
+    in full.
+    """
+
+    __window: float
+    __max_entries: int
+    __clock: Callable[[], float]
+    __entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]"
+
+    def __init__(
+        self,
+        window: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Build window.
+
+        Parameters
+        ----------
+        window : float
+            Seconds a dispatched query is considered a duplicate.
+        max_entries : int
+            Maximum number of tracked queries, oldest are forgotten first.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__window = window
+        self.__max_entries = max_entries
+        self.__clock = clock
+        self.__entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Provide number of tracked queries."""
+        return len(self.__entries)
+
+    def __expire(self, now: float) -> None:
+        """Forget queries outside the window, entries are kept in insertion order."""
+        while self.__entries:
+            expires_at, _ = next(iter(self.__entries.values()))
+            if expires_at > now:
+                break
+            self.__entries.popitem(last=False)
+
+    def is_duplicate(self, server_id: str, uuid: str, query: str) -> bool:
+        """Check whether query is a duplicate, recording it otherwise.
+
+        Parameters
+        ----------
+        server_id : str
+            Server requesting the query.
+        uuid : str
+            Request identifier.
+        query : str
+            Canonical query.
+
+        Returns
+        -------
+        bool
+            Whether query was dispatched for server by another request within window.
+        """
+        now = self.__clock()
+        self.__expire(now)
+        key = (server_id, query)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            return entry[1] != uuid
+        self.__entries[key] = (now + self.__window, uuid)
+        if len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+        return False
@@ -0,0 +1,183 @@
+#!usr/bin/env python3
+"""Cached readiness state.
+
+Readiness is kept by a background monitor, updated by connection events and a
+periodic broker check, so probes are answered from memory without reaching the
+broker.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List, Mapping, Optional
+
+CONNECTION = "connection"
+PUBLISH = "publish"
+
+
+class HealthMonitor:
+    """Tracks broker connectivity, consumer progress and custom conditions.
+
+    Connectivity is refreshed every interval by a check, and immediately on
+    connection events. Publishing is unhealthy once a publish fails until one
+    succeeds or the failure window passes, or while requests are being handled
+    without any publish succeeding for longer than the maximum publish age.
+    """
+
+    __check: Callable[[], Awaitable[bool]]
+    __interval: float
+    __max_publish_age: float
+    __publish_failure_window: float
+    __conditions: Mapping[str, Callable[[], bool]]
+    __clock: Callable[[], float]
+    __connected: Optional[bool]
+    # monotonic time of the latest publish failure, None once a publish succeeds
+    __publish_failed: Optional[float]
+    __progressed: float
+    __handling: int
+    __task: Optional[asyncio.Task]
+
+    def __init__(  # noqa: PLR0913
+        self,
+        check: Callable[[], Awaitable[bool]],
+        interval: float = 5,
+        max_publish_age: float = 0,
+        publish_failure_window: float = 0,
+        conditions: Optional[Mapping[str, Callable[[], bool]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Build monitor.
+
+        Parameters
+        ----------
+        check : Callable[[], Awaitable[bool]]
+            Lightweight check of broker connectivity.
+        interval : float
+            Seconds between connectivity checks.
+        max_publish_age : float
+            Seconds requests may be handled without a successful publish, `0`
+            disables the check.
+        publish_failure_window : float
+            Seconds a failed publish keeps publishing unhealthy without a later
+            publish succeeding, e.g. on an idle consumer, `0` until one succeeds.
+        conditions : Optional[Mapping[str, Callable[[], bool]]]
+            Additional named conditions required to be ready, evaluated on demand
+            so they must be cheap.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__check = check
+        self.__interval = interval
+        self.__max_publish_age = max_publish_age
+        self.__publish_failure_window = publish_failure_window
+        self.__conditions = conditions or {}
+        self.__clock = clock
+        self.__connected = None
+        self.__publish_failed = None
+        self.__progressed = clock()
+        self.__handling = 0
+        self.__task = None
+
+    @property
+    def checked(self) -> bool:
+        """Whether connectivity was checked at least once."""
+        return self.__connected is not None
+
+    def connected(self, connected: bool) -> None:
+        """Record connectivity change, e.g. from a connection callback."""
+        if connected != self.__connected:
+            logging.getLogger(__name__).info(
+                "Broker %s", "connected" if connected else "disconnected"
+            )
+        self.__connected = connected
+
+    def published(self) -> None:
+        """Record a successful publish."""
+        self.__publish_failed = None
+        self.__progressed = self.__clock()
+
+    def publish_failed(self) -> None:
+        """Record a failed publish."""
+        self.__publish_failed = self.__clock()
+
+    @contextlib.contextmanager
+    def handling(self) -> Iterator[None]:
+        """Track a request being handled."""
+        if not self.__handling:
+            # idle time does not count against publish progress
+            self.__progressed = self.__clock()
+        self.__handling += 1
+        try:
+            yield
+        finally:
+            self.__handling -= 1
+
+    def publish_age(self) -> float:
+        """Seconds since publishing last progressed."""
+        return self.__clock() - self.__progressed
+
+    def publishing(self) -> bool:
+        """Whether publishes succeed and progress while handling requests."""
+        if self.__publish_failed is not None and (
+            not self.__publish_failure_window
+            or self.__clock() - self.__publish_failed < self.__publish_failure_window
+        ):
+            return False
+        return not (
+            self.__max_publish_age
+            and self.__handling
+            and self.publish_age() > self.__max_publish_age
+        )
+
+    def status(self) -> Dict[str, bool]:
+        """Provide whether each readiness condition holds."""
+        return {
+            CONNECTION: bool(self.__connected),
+            PUBLISH: self.publishing(),
+            **{name: condition() for name, condition in self.__conditions.items()},
+        }
+
+    def failures(self) -> List[str]:
+        """Provide names of failing readiness conditions."""
+        return [name for name, ok in self.status().items() if not ok]
+
+    @property
+    def ready(self) -> bool:
+        """Whether every readiness condition holds."""
+        return not self.failures()
+
+    async def refresh(self) -> None:
+        """Check connectivity now."""
+        try:
+            self.connected(await self.__check())
+        except Exception:  # noqa: BLE001
+            logging.getLogger(__name__).warning("Health check failed", exc_info=True)
+            self.connected(False)
+
+    async def readiness(self) -> List[str]:
+        """Provide failing conditions, checking connectivity if never checked."""
+        if not self.checked:
+            await self.refresh()
+        return self.failures()
+
+    def start(self) -> None:
+        """Check connectivity periodically on the running event loop."""
+        if self.__task is not None and not self.__task.done():
+            return
+        self.__task = asyncio.get_running_loop().create_task(self.__monitor())
+
+    async def stop(self) -> None:
+        """Stop checking connectivity."""
+        task, self.__task = self.__task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def __monitor(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.__interval)
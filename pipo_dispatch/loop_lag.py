@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+
+class LoopLagSampler:
+    """Samples event loop lag as the overshoot of a periodic sleep.
+
+    A busy or blocked event loop wakes sleeping tasks late, the delay past the
+    requested interval is the time callbacks waited to be scheduled. Samples are
+    smoothed by an exponentially weighted moving average.
+    """
+
+    __interval: float
+    __smoothing: float
+    __lag: float
+    __task: Optional[asyncio.Task]
+    __on_sample: Optional[Callable[[float], None]]
+    __sampled: float
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        smoothing: float = 0.3,
+        on_sample: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        """Build sampler.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between samples.
+        smoothing : float
+            Weight of the latest sample in the moving average.
+        on_sample : Optional[Callable[[float], None]]
+            Called with each lag sample, in seconds, before smoothing.
+        """
+        self.__interval = interval
+        self.__smoothing = smoothing
+        self.__lag = 0.0
+        self.__task = None
+        self.__on_sample = on_sample
+        self.__sampled = time.monotonic()
+
+    @property
+    def interval(self) -> float:
+        """Seconds between samples."""
+        return self.__interval
+
+    @property
+    def sampled(self) -> float:
+        """Monotonic time of the latest sample, or of sampling start."""
+        return self.__sampled
+
+    @property
+    def lag(self) -> float:
+        """Smoothed event loop lag, in seconds."""
+        return self.__lag
+
+    @property
+    def running(self) -> bool:
+        """Whether sampler is running, on the current event loop if called from one.
+
+        Safe to call from threads without an event loop, e.g. metric export
+        callbacks, where any running sampler counts.
+        """
+        if self.__task is None or self.__task.done():
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        return self.__task.get_loop() is loop
+
+    def record(self, lag: float) -> None:
+        """Add lag sample to the moving average."""
+        self.__lag += self.__smoothing * (lag - self.__lag)
+
+    def start(self) -> None:
+        """Start sampling on the running event loop, if not already sampling it."""
+        if self.running:
+            return
+        self.__lag = 0.0
+        self.__sampled = time.monotonic()
+        self.__task = asyncio.get_running_loop().create_task(self.__sample())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        task, self.__task = self.__task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def __sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.__interval)
+            lag = max(0.0, loop.time() - start - self.__interval)
+            self.__sampled = time.monotonic()
+            self.record(lag)
+            if self.__on_sample is not None:
+                self.__on_sample(lag)
+
+
+class LoopWatchdog:
+    """Logs the stack of an event loop thread stalled past a threshold.
+
+    A daemon thread checks how long ago a `LoopLagSampler` sampled its loop. A loop
+    not sampling for longer than the threshold past the sampling interval is
+    running a slow callback, logged once per stall with the loop thread stack so
+    the blocking code can be identified.
+    """
+
+    __sampler: LoopLagSampler
+    __threshold: float
+    __thread_id: Optional[int]
+    __stopped: threading.Event
+    __thread: Optional[threading.Thread]
+
+    def __init__(self, sampler: LoopLagSampler, threshold: float) -> None:
+        """Build watchdog.
+
+        Parameters
+        ----------
+        sampler : LoopLagSampler
+            Sampler of watched event loop.
+        threshold : float
+            Seconds a callback may block the loop before being logged.
+        """
+        self.__sampler = sampler
+        self.__threshold = threshold
+        self.__thread_id = None
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    @property
+    def running(self) -> bool:
+        """Whether watchdog thread is running."""
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self) -> None:
+        """Watch the event loop of the current thread, if not already watching."""
+        if self.running:
+            return
+        self.__thread_id = threading.get_ident()
+        self.__stopped.clear()
+        self.__thread = threading.Thread(
+            target=self.__watch, name="loop-watchdog", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def stall(self) -> float:
+        """Seconds the watched loop is late sampling, `0` if on time."""
+        late = time.monotonic() - self.__sampler.sampled - self.__sampler.interval
+        return max(0.0, late)
+
+    def __watch(self) -> None:
+        reported = None
+        while not self.__stopped.wait(self.__threshold / 2):
+            sampled = self.__sampler.sampled
+            if sampled == reported or self.stall() <= self.__threshold:
+                continue
+            reported = sampled
+            frame = sys._current_frames().get(self.__thread_id)  # noqa: SLF001
+            if frame is None:
+                continue
+            logging.getLogger(__name__).warning(
+                "Event loop blocked for over %.3fs in:\n%s",
+                self.stall(),
+                "".join(traceback.format_stack(frame)),
+            )
+            del frame
@@ -1,2 +1,6 @@
-from pipo_dispatch.models.provider import ProviderOperation
+from pipo_dispatch.models.provider import (
+    ProviderOperation,
+    ProviderOperationBatch,
+    ProviderOperationEncoder,
+)
 from pipo_dispatch.models.music_request import MusicRequest
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -10,3 +10,31 @@ class MusicRequest(BaseModel):
     server_id: str
     shuffle: bool = False
     query: List[str]
+    # set on child requests split from an oversized request
+    chunk: Optional[int] = Field(default=None, ge=0)
+    chunks: Optional[int] = Field(default=None, ge=1)
+
+    def split(self, size: int) -> Iterator["MusicRequest"]:
+        """Split request in child requests of at most size queries.
+
+        Children keep the request uuid, identifying each by its chunk index.
+
+        Parameters
+        ----------
+        size : int
+            Maximum number of queries per child request.
+
+        Returns
+        -------
+        Iterator[MusicRequest]
+            Child requests, in query order.
+        """
+        chunks = -(-len(self.query) // size)
+        for chunk in range(chunks):
+            yield self.model_copy(
+                update={
+                    "query": self.query[chunk * size : (chunk + 1) * size],
+                    "chunk": chunk,
+                    "chunks": chunks,
+                }
+            )
@@ -1,4 +1,6 @@
 from enum import StrEnum
+from json.encoder import encode_basestring
+from typing import ClassVar, List
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +13,8 @@ class Provider(StrEnum):
 
 
 class ProviderOperation(BaseModel):
+    message_type: ClassVar[str] = "provider.operation"
+
     uuid: str = Field(
         pattern=r"^[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$"
     )
@@ -19,3 +23,76 @@ class ProviderOperation(BaseModel):
     operation: str
     shuffle: bool = False
     query: str
+
+
+class ProviderOperationBatch(BaseModel):
+    """Operations sharing provider and operation, sent as a single message."""
+
+    message_type: ClassVar[str] = "provider.operation.batch"
+
+    uuid: str = Field(
+        pattern=r"^[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$"
+    )
+    provider: str = Field(pattern=r"^[\d\w]*.[\d\w]*.[\d\w]*$")
+    server_id: str
+    operation: str
+    shuffle: bool = False
+    queries: List[str] = Field(min_length=1)
+
+
+class ProviderOperationEncoder:
+    """Encodes a request operations as `ProviderOperation` JSON without validation.
+
+    Request fields are validated once by `MusicRequest` and providers are generated by
+    the dispatcher, so operations are serialized from a per request template where
+    only varying fields are quoted. Output is equivalent to `ProviderOperation` JSON.
+    """
+
+    __prefix: str
+    __middle: str
+    __suffix: str
+
+    def __init__(self, uuid: str, server_id: str, shuffle: bool = False) -> None:
+        """Build request template.
+
+        Parameters
+        ----------
+        uuid : str
+            Already validated request identifier.
+        server_id : str
+            Requesting server.
+        shuffle : bool
+            Whether request was shuffled.
+        """
+        self.__prefix = f'{{"uuid":{encode_basestring(uuid)},"provider":'
+        self.__middle = f',"server_id":{encode_basestring(server_id)},"operation":'
+        self.__suffix = f',"shuffle":{"true" if shuffle else "false"},"query":'
+
+    def encode(self, provider: str, operation: str, query: str) -> bytes:
+        """Serialize operation.
+
+        Parameters
+        ----------
+        provider : str
+            Provider routing key, generated by the dispatcher.
+        operation : str
+            Provider operation.
+        query : str
+            Operation query.
+
+        Returns
+        -------
+        bytes
+            JSON encoded `ProviderOperation`.
+        """
+        return "".join(
+            (
+                self.__prefix,
+                encode_basestring(provider),
+                self.__middle,
+                encode_basestring(operation),
+                self.__suffix,
+                encode_basestring(query),
+                "}",
+            )
+        ).encode()
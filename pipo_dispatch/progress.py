@@ -0,0 +1,218 @@
+"""Request dispatch progress.
+
+Records which operations of a request were published so a redelivered request
+resumes where the previous delivery stopped, and completed requests are not
+dispatched again.
+"""
+
+import hashlib
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional, Set, Tuple
+
+
+def operation_key(body: bytes) -> str:
+    """Provide key identifying an operation within its request."""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+class ProgressStore(ABC):
+    """Stores published operations of each request until it completes."""
+
+    @abstractmethod
+    def completed(self, request: str) -> bool:
+        """Whether request was completely dispatched."""
+
+    @abstractmethod
+    def published(self, request: str) -> Set[str]:
+        """Provide keys of operations published for an incomplete request."""
+
+    @abstractmethod
+    def record(self, request: str, operation: str) -> None:
+        """Record operation as published for request."""
+
+    @abstractmethod
+    def complete(self, request: str) -> None:
+        """Record request as completely dispatched, forgetting its operations."""
+
+
+class MemoryProgressStore(ProgressStore):
+    """Keeps progress of the most recently dispatched requests in memory.
+
+    Survives redeliveries to the same process only, e.g. after a failed dispatch.
+    """
+
+    __max_requests: int
+    __ttl: float
+    __clock: Callable[[], float]
+    # request to expiry time and published operations, None once completed
+    __entries: "OrderedDict[str, Tuple[float, Optional[Set[str]]]]"
+
+    def __init__(
+        self,
+        max_requests: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Build store.
+
+        Parameters
+        ----------
+        max_requests : int
+            Maximum number of tracked requests, least recently updated are
+            forgotten first.
+        ttl : float
+            Seconds since last update a request progress is kept.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__max_requests = max_requests
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Provide number of tracked requests."""
+        return len(self.__entries)
+
+    def __get(self, request: str) -> Tuple[bool, Optional[Set[str]]]:
+        """Provide whether request is tracked and its published operations."""
+        entry = self.__entries.get(request)
+        if entry is None:
+            return False, None
+        if entry[0] <= self.__clock():
+            del self.__entries[request]
+            return False, None
+        return True, entry[1]
+
+    def __put(self, request: str, operations: Optional[Set[str]]) -> None:
+        self.__entries[request] = (self.__clock() + self.__ttl, operations)
+        self.__entries.move_to_end(request)
+        while len(self.__entries) > self.__max_requests:
+            self.__entries.popitem(last=False)
+
+    def completed(self, request: str) -> bool:
+        """Whether request was completely dispatched."""
+        tracked, operations = self.__get(request)
+        return tracked and operations is None
+
+    def published(self, request: str) -> Set[str]:
+        """Provide keys of operations published for an incomplete request."""
+        _, operations = self.__get(request)
+        return set(operations or ())
+
+    def record(self, request: str, operation: str) -> None:
+        """Record operation as published for request."""
+        tracked, operations = self.__get(request)
+        if tracked and operations is None:
+            return
+        operations = operations if operations is not None else set()
+        operations.add(operation)
+        self.__put(request, operations)
+
+    def complete(self, request: str) -> None:
+        """Record request as completely dispatched, forgetting its operations."""
+        self.__put(request, None)
+
+
+class SQLiteProgressStore(ProgressStore):
+    """Keeps progress in a local SQLite database.
+
+    Survives process restarts sharing the database file, e.g. on a volume
+    persisting across container restarts. Operations are committed as recorded,
+    in write ahead log mode without syncing each commit to disk.
+    """
+
+    # completed requests are stored as a single row with an empty operation
+    __COMPLETED = ""
+
+    __ttl: float
+    __clock: Callable[[], float]
+    __connection: sqlite3.Connection
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Build store, creating database if needed and purging expired progress.
+
+        Parameters
+        ----------
+        path : str
+            Database file path, `:memory:` for a private in-memory database.
+        ttl : float
+            Seconds since last update a request progress is kept.
+        clock : Callable[[], float]
+            Wall clock time source, in seconds, persisted across restarts.
+        """
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.__connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS progress (
+                request TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (request, operation)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS progress_updated ON progress (updated);
+            """
+        )
+        self.purge()
+
+    def purge(self) -> None:
+        """Forget progress of requests not updated within time to live."""
+        self.__connection.execute(
+            "DELETE FROM progress WHERE updated < ?", (self.__clock() - self.__ttl,)
+        )
+
+    def close(self) -> None:
+        """Close database."""
+        self.__connection.close()
+
+    def completed(self, request: str) -> bool:
+        """Whether request was completely dispatched."""
+        row = self.__connection.execute(
+            "SELECT 1 FROM progress WHERE request = ? AND operation = ? "
+            "AND updated >= ?",
+            (request, self.__COMPLETED, self.__clock() - self.__ttl),
+        ).fetchone()
+        return row is not None
+
+    def published(self, request: str) -> Set[str]:
+        """Provide keys of operations published for an incomplete request."""
+        rows = self.__connection.execute(
+            "SELECT operation FROM progress WHERE request = ? AND operation != ? "
+            "AND updated >= ?",
+            (request, self.__COMPLETED, self.__clock() - self.__ttl),
+        )
+        return {operation for (operation,) in rows}
+
+    def record(self, request: str, operation: str) -> None:
+        """Record operation as published for request."""
+        self.__connection.execute(
+            "INSERT OR REPLACE INTO progress VALUES (?, ?, ?)",
+            (request, operation, self.__clock()),
+        )
+
+    def complete(self, request: str) -> None:
+        """Record request as completely dispatched, forgetting its operations."""
+        with self.__connection:
+            self.__connection.execute("BEGIN")
+            self.__connection.execute(
+                "DELETE FROM progress WHERE request = ?", (request,)
+            )
+            self.__connection.execute(
+                "INSERT INTO progress VALUES (?, ?, ?)",
+                (request, self.__COMPLETED, self.__clock()),
+            )
+        self.purge()
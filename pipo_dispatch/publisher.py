@@ -0,0 +1,112 @@
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+
+def batched_by(
+    items: Iterable[T],
+    key: Callable[[T], K],
+    max_size: int,
+) -> Iterator[Tuple[K, List[T]]]:
+    """Group items sharing the same key in batches.
+
+    Batches are provided as soon as they are full, remaining partial batches once
+    items are exhausted, so at most one partial batch per key is kept in memory.
+
+    Parameters
+    ----------
+    items : Iterable[T]
+        Items to group.
+    key : Callable[[T], K]
+        Provides item group key.
+    max_size : int
+        Maximum number of items per batch.
+
+    Returns
+    -------
+    Iterator[Tuple[K, List[T]]]
+        Group key and its batch of items.
+    """
+    groups: Dict[K, List[T]] = {}
+    for item in items:
+        group_key = key(item)
+        group = groups.setdefault(group_key, [])
+        group.append(item)
+        if len(group) >= max_size:
+            yield group_key, groups.pop(group_key)
+    yield from groups.items()
+
+
+async def __settle(tasks: Set[asyncio.Future]) -> int:
+    """Wait for every task, raising the first failure once all have settled."""
+    if not tasks:
+        return 0
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return len(results)
+
+
+async def publish_all(
+    publish: Callable[[T], Awaitable[Any]],
+    items: Iterable[T],
+    max_in_flight: int = 1,
+) -> int:
+    """Publish items keeping a bounded window of unconfirmed publishes.
+
+    Items are consumed lazily, a new publish only starts once there is room in the
+    window. Confirmations of in-flight publishes are collected together, on failure
+    remaining in-flight publishes are allowed to settle before the error is raised
+    so callers may reject the originating message.
+
+    Parameters
+    ----------
+    publish : Callable[[T], Awaitable[Any]]
+        Publishes a single item, returning once broker confirms it.
+    items : Iterable[T]
+        Items to publish.
+    max_in_flight : int
+        Maximum number of publishes awaiting confirmation, `1` publishes
+        sequentially preserving item order.
+
+    Returns
+    -------
+    int
+        Number of published items.
+    """
+    if max_in_flight <= 1:
+        published = 0
+        for item in items:
+            await publish(item)
+            published += 1
+        return published
+
+    published = 0
+    pending: Set[asyncio.Future] = set()
+    try:
+        for item in items:
+            if len(pending) >= max_in_flight:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                published += await __settle(done)
+            pending.add(asyncio.ensure_future(publish(item)))
+    except BaseException:
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+    return published + await __settle(pending)
@@ -0,0 +1,125 @@
+import time
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Tuple
+
+
+class TokenBucket:
+    """Token bucket granting tokens ahead of time.
+
+    Tokens refill at a constant rate up to burst. Reserving more tokens than
+    available succeeds immediately, leaving the bucket in debt, and provides the
+    time until the bucket refills enough. Callers defer work by that time instead
+    of waiting for tokens, subsequent reservations queue behind it.
+    """
+
+    __rate: float
+    __burst: float
+    __clock: Callable[[], float]
+    __tokens: float
+    __updated: float
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Build bucket, initially full.
+
+        Parameters
+        ----------
+        rate : float
+            Tokens refilled per second.
+        burst : float
+            Maximum number of tokens available at once.
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__rate = rate
+        self.__burst = max(burst, 1)
+        self.__clock = clock
+        self.__tokens = self.__burst
+        self.__updated = clock()
+
+    def __refill(self) -> None:
+        now = self.__clock()
+        self.__tokens = min(
+            self.__burst, self.__tokens + (now - self.__updated) * self.__rate
+        )
+        self.__updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available, negative while reserved ahead."""
+        self.__refill()
+        return self.__tokens
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Reserve tokens, providing seconds until they are available.
+
+        Parameters
+        ----------
+        tokens : float
+            Number of tokens to reserve.
+
+        Returns
+        -------
+        float
+            Seconds to defer work by, `0` if tokens were available.
+        """
+        self.__refill()
+        self.__tokens -= tokens
+        if self.__tokens >= 0:
+            return 0.0
+        return -self.__tokens / self.__rate
+
+
+class RateLimiter:
+    """Token buckets per routing key, keys without a bucket are unlimited."""
+
+    __buckets: Dict[str, TokenBucket]
+
+    def __init__(self, buckets: Mapping[str, TokenBucket]) -> None:
+        """Build limiter.
+
+        Parameters
+        ----------
+        buckets : Mapping[str, TokenBucket]
+            Bucket of each limited routing key.
+        """
+        self.__buckets = dict(buckets)
+
+    def __iter__(self) -> Iterator[Tuple[str, TokenBucket]]:
+        """Provide limited routing keys and their buckets."""
+        return iter(self.__buckets.items())
+
+    def __len__(self) -> int:
+        """Provide number of limited routing keys."""
+        return len(self.__buckets)
+
+    @classmethod
+    def from_settings(cls, buckets: Iterable[Mapping]) -> "RateLimiter":
+        """Build limiter from `routing_key`, `rate` and `burst` entries.
+
+        Raises
+        ------
+        ValueError
+            If a rate is not positive or a burst is below one token.
+        """
+        limited = {}
+        for bucket in buckets:
+            rate = float(bucket["rate"])
+            burst = float(bucket.get("burst") or rate)
+            if rate <= 0 or burst < 1:
+                raise ValueError(  # noqa: TRY003
+                    f"Invalid rate limit for '{bucket['routing_key']}', rate must be "
+                    "positive and burst at least 1"
+                )
+            limited[bucket["routing_key"]] = TokenBucket(rate=rate, burst=burst)
+        return cls(limited)
+
+    def reserve(self, routing_key: str) -> float:
+        """Reserve a publish to routing key, providing seconds to defer it by."""
+        bucket = self.__buckets.get(routing_key)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
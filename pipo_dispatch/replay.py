@@ -0,0 +1,512 @@
+#!usr/bin/env python3
+"""Parking lot and dead letter replay.
+
+Drains parking lot and dead letter queues in batches, re-dispatching messages
+matching a filter to the dispatcher queue at a bounded rate and concurrency.
+Replayed messages are acknowledged once published, others are held unacknowledged
+until the pass ends, which also ends once too many are held, then requeued.
+
+Run with ``python -m pipo_dispatch.replay --help``.
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import datetime
+import fnmatch
+import logging
+import time
+from dataclasses import dataclass
+from typing import (
+    AbstractSet,
+    Any,
+    Awaitable,
+    Callable,
+    Counter,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from opentelemetry import metrics
+
+from pipo_dispatch.codec import get_codec
+from pipo_dispatch.config import settings
+from pipo_dispatch.publisher import publish_all
+from pipo_dispatch.rate_limit import TokenBucket
+from pipo_dispatch.telemetry import create_counter, create_observable_gauge
+
+REPLAYED = "replayed"
+SKIPPED = "skipped"
+FAILED = "failed"
+MATCHED = "matched"
+
+# set by RabbitMQ on dead lettering, dropped so replayed messages start afresh
+_DEATH_HEADERS = ("x-death", "x-first-death-", "x-last-death-", "x-delivery-count")
+
+meter = metrics.get_meter(__name__)
+
+replay_counter = create_counter(
+    meter,
+    name="pipo.replay.messages",
+    description="Number of parking lot and dead letter messages handled by replay",
+    unit="messages",
+    labels=("queue", "result"),
+)
+
+# messages left to handle in the current pass of each queue
+remaining: Dict[str, int] = collections.defaultdict(int)
+
+create_observable_gauge(
+    meter,
+    name="pipo.replay.remaining",
+    description="Messages left to handle in the current replay pass",
+    unit="messages",
+    label="queue",
+    observe={
+        name: lambda name=name: remaining[name]
+        for name in (
+            settings.player.queue.service.parking_lot.queue,
+            settings.player.queue.service.dead_letter.queue.name,
+        )
+    },
+)
+
+
+def dead_lettered_at(message: Any) -> Optional[float]:
+    """Provide when message was first dead lettered, or else published, if known."""
+    deaths = (message.headers or {}).get("x-death") or []
+    when = deaths[-1].get("time") if deaths else None
+    when = when or message.timestamp
+    if isinstance(when, datetime.datetime):
+        return when.timestamp()
+    return when
+
+
+def server_id(message: Any) -> Optional[str]:
+    """Provide server id of a `MusicRequest` message, if decodable."""
+    try:
+        body = get_codec(message.content_type).decode(message.body)
+    except Exception:  # noqa: BLE001
+        return None
+    if not isinstance(body, Mapping):
+        return None
+    return body.get("server_id")
+
+
+def _count(counts: Counter[str], name: str, result: str) -> None:
+    counts[result] += 1
+    replay_counter.add(1, {"queue": name, "result": result})
+
+
+@dataclass(frozen=True)
+class ReplayFilter:
+    """Selects messages to replay, every criterion must match.
+
+    Routing keys are shell style patterns, ages are seconds since dead lettering
+    with `0` leaving the bound open, empty criteria match any message.
+    """
+
+    routing_keys: Sequence[str] = ()
+    server_ids: AbstractSet[str] = frozenset()
+    min_age: float = 0
+    max_age: float = 0
+
+    def matches(self, message: Any, now: float) -> bool:
+        """Whether message is selected for replay."""
+        routing_key = message.routing_key or ""
+        if self.routing_keys and not any(
+            fnmatch.fnmatchcase(routing_key, pattern) for pattern in self.routing_keys
+        ):
+            return False
+        if self.min_age or self.max_age:
+            when = dead_lettered_at(message)
+            if when is None:
+                return False
+            age = now - when
+            if age < self.min_age or (self.max_age and age > self.max_age):
+                return False
+        return not self.server_ids or server_id(message) in self.server_ids
+
+
+class Replayer:
+    """Replays messages from queues in batches, at a bounded rate and concurrency."""
+
+    __publish: Callable[[Any], Awaitable[None]]
+    __filter: ReplayFilter
+    __bucket: TokenBucket
+    __concurrency: int
+    __batch_size: int
+    __max_held: int
+    __clock: Callable[[], float]
+
+    def __init__(  # noqa: PLR0913
+        self,
+        publish: Callable[[Any], Awaitable[None]],
+        replay_filter: ReplayFilter,
+        rate: float,
+        burst: float = 1,
+        concurrency: int = 1,
+        batch_size: int = 100,
+        max_held: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Build replayer.
+
+        Parameters
+        ----------
+        publish : Callable[[Any], Awaitable[None]]
+            Re-dispatches a message.
+        replay_filter : ReplayFilter
+            Selects messages to replay.
+        rate : float
+            Messages replayed per second.
+        burst : float
+            Messages replayed at once before throttling.
+        concurrency : int
+            Replayed messages awaiting publish confirmation at once.
+        batch_size : int
+            Messages fetched before being replayed.
+        max_held : int
+            Messages not replayed held unacknowledged at once, ending the pass once
+            reached so later messages are left for the next pass.
+        clock : Callable[[], float]
+            Wall clock time source message ages are measured with, in seconds.
+        """
+        self.__publish = publish
+        self.__filter = replay_filter
+        self.__bucket = TokenBucket(rate=rate, burst=burst)
+        self.__concurrency = concurrency
+        self.__batch_size = batch_size
+        self.__max_held = max_held
+        self.__clock = clock
+
+    async def __fetch(self, queue: Any, size: int) -> List[Any]:
+        batch = []
+        while len(batch) < size:
+            message = await queue.get(no_ack=False, fail=False)
+            if message is None:
+                break
+            batch.append(message)
+        return batch
+
+    def __select(  # noqa: PLR0913
+        self,
+        batch: List[Any],
+        name: str,
+        counts: Counter[str],
+        held: List[Any],
+        dry_run: bool,
+    ) -> List[Any]:
+        """Provide messages to replay, holding others until the pass ends."""
+        now = self.__clock()
+        selected = []
+        for message in batch:
+            if not self.__filter.matches(message, now):
+                held.append(message)
+                _count(counts, name, SKIPPED)
+            elif dry_run:
+                held.append(message)
+                _count(counts, name, MATCHED)
+            else:
+                selected.append(message)
+        return selected
+
+    async def __replay_one(self, message: Any, name: str, counts: Counter[str]) -> None:
+        delay = self.__bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await self.__publish(message)
+        except Exception:
+            logging.getLogger(__name__).exception(
+                "Failed replaying message %s", message.message_id
+            )
+            await message.nack(requeue=True)
+            _count(counts, name, FAILED)
+        else:
+            await message.ack()
+            _count(counts, name, REPLAYED)
+
+    async def replay(
+        self,
+        queue: Any,
+        name: str,
+        limit: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> Counter[str]:
+        """Replay a pass over queue.
+
+        The pass ends once the queue is empty, limit messages were fetched, as
+        many messages as the queue held when declared were, so messages dead
+        lettered again while replaying are left for the next pass, or `max_held`
+        messages not replayed are held.
+
+        Parameters
+        ----------
+        queue
+            Queue to replay, fetching messages by `get`.
+        name : str
+            Queue name, identifies its metrics.
+        limit : Optional[int]
+            Maximum messages fetched, unbounded if not provided.
+        dry_run : bool
+            Count matching messages without replaying them.
+
+        Returns
+        -------
+        Counter[str]
+            Number of messages by result.
+        """
+        declared = getattr(
+            getattr(queue, "declaration_result", None), "message_count", None
+        )
+        bounds = [bound for bound in (limit, declared) if bound is not None]
+        bound = min(bounds) if bounds else None
+        counts: Counter[str] = collections.Counter()
+        held: List[Any] = []
+        fetched = 0
+        try:
+            while bound is None or fetched < bound:
+                # requeued messages would be fetched again, so at most max_held
+                # are kept until the pass ends
+                size = min(self.__batch_size, self.__max_held - len(held))
+                if bound is not None:
+                    remaining[name] = bound - fetched
+                    size = min(size, remaining[name])
+                if size <= 0:
+                    logging.getLogger(__name__).warning(
+                        "Ending %s pass holding %d messages", name, len(held)
+                    )
+                    break
+                batch = await self.__fetch(queue, size)
+                if not batch:
+                    break
+                fetched += len(batch)
+                selected = self.__select(batch, name, counts, held, dry_run)
+                await publish_all(
+                    lambda message: self.__replay_one(message, name, counts),
+                    selected,
+                    max_in_flight=self.__concurrency,
+                )
+                logging.getLogger(__name__).info("Replaying %s: %s", name, dict(counts))
+        finally:
+            # requeued only now, fetching them again would never end the pass
+            for message in held:
+                await message.nack(requeue=True)
+            remaining[name] = 0
+        return counts
+
+
+class BackgroundReplay:
+    """Replays queues periodically on the running event loop."""
+
+    __replayer: Replayer
+    __queues: Mapping[str, Callable[[], Awaitable[Any]]]
+    __interval: float
+    __task: Optional[asyncio.Task]
+
+    def __init__(
+        self,
+        replayer: Replayer,
+        queues: Mapping[str, Callable[[], Awaitable[Any]]],
+        interval: float,
+    ) -> None:
+        """Build background replay.
+
+        Parameters
+        ----------
+        replayer : Replayer
+            Replays each queue pass.
+        queues : Mapping[str, Callable[[], Awaitable[Any]]]
+            Declares each replayed queue, by name.
+        interval : float
+            Seconds between replay passes.
+        """
+        self.__replayer = replayer
+        self.__queues = queues
+        self.__interval = interval
+        self.__task = None
+
+    def start(self) -> None:
+        """Replay periodically, if not already replaying."""
+        if self.__task is not None and not self.__task.done():
+            return
+        self.__task = asyncio.get_running_loop().create_task(self.__run())
+
+    async def stop(self) -> None:
+        """Stop replaying, requeueing messages of an interrupted pass."""
+        task, self.__task = self.__task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def __replay(self, name: str) -> None:
+        try:
+            await self.__replayer.replay(await self.__queues[name](), name)
+        except Exception:
+            logging.getLogger(__name__).exception("Failed replaying %s", name)
+
+    async def __run(self) -> None:
+        while True:
+            await asyncio.sleep(self.__interval)
+            for name in self.__queues:
+                await self.__replay(name)
+
+
+async def republish(message: Any) -> None:
+    """Re-dispatch message to the dispatcher queue, without dead letter headers."""
+    from pipo_dispatch._queues import dispatcher_queue, get_broker
+
+    headers = {
+        key: value
+        for key, value in (message.headers or {}).items()
+        if not key.startswith(_DEATH_HEADERS)
+    }
+    await get_broker().publish(
+        message.body,
+        queue=dispatcher_queue,
+        headers=headers,
+        content_type=message.content_type,
+        message_type=message.type,
+        message_id=message.message_id,
+        correlation_id=message.correlation_id,
+        priority=message.priority,
+    )
+
+
+async def declare(queue: Any) -> Any:
+    """Declare queue, refreshing its message count on each call."""
+    from pipo_dispatch._queues import get_broker
+
+    declared = await get_broker().declare_queue(queue)
+    # declarations are cached by the broker, along with their message count
+    await declared.declare()
+    return declared
+
+
+def replayed_queues() -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """Provide declaration of each replayable queue, by name."""
+    from pipo_dispatch._queues import dlq, plq
+
+    return {queue.name: lambda queue=queue: declare(queue) for queue in (plq, dlq)}
+
+
+def create_replayer(config: Mapping[str, Any]) -> Replayer:
+    """Create replayer re-dispatching to the dispatcher queue from configuration."""
+    return Replayer(
+        republish,
+        ReplayFilter(
+            routing_keys=tuple(config.get("routing_keys") or ()),
+            server_ids=frozenset(map(str, config.get("server_ids") or ())),
+            min_age=config.get("min_age", 0),
+            max_age=config.get("max_age", 0),
+        ),
+        rate=config["rate"],
+        burst=config.get("burst", 1),
+        concurrency=config.get("concurrency", 1),
+        batch_size=config.get("batch_size", 100),
+        max_held=config.get("max_held", 1000),
+    )
+
+
+def create_background_replay() -> BackgroundReplay:
+    """Create background replay of configured queues."""
+    config = settings.replay
+    queues = replayed_queues()
+    return BackgroundReplay(
+        create_replayer(config),
+        {name: queues[name] for name in config.queues},
+        interval=config.background.interval,
+    )
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Counter[str]]:
+    """Connect to broker and replay a pass over each selected queue."""
+    from pipo_dispatch._queues import get_broker
+
+    config = {
+        "routing_keys": args.routing_key,
+        "server_ids": args.server_id,
+        "min_age": args.min_age,
+        "max_age": args.max_age,
+        "rate": args.rate,
+        "burst": args.burst,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "max_held": args.max_held,
+    }
+    replayer = create_replayer(config)
+    queues = replayed_queues()
+    broker = get_broker()
+    await broker.connect()
+    try:
+        return {
+            name: await replayer.replay(
+                await queues[name](), name, limit=args.limit, dry_run=args.dry_run
+            )
+            for name in args.queue
+        }
+    finally:
+        await broker.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Parse command line and replay selected queues once."""
+    config = settings.replay
+    queues = list(replayed_queues())
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--queue", action="append", choices=queues, help="queue to replay, repeatable"
+    )
+    routing_keys = parser.add_mutually_exclusive_group()
+    routing_keys.add_argument(
+        "--routing-key",
+        action="append",
+        default=None,
+        help="shell style routing key pattern, repeatable",
+    )
+    routing_keys.add_argument(
+        "--all-routing-keys",
+        action="store_true",
+        help="replay any routing key, ignoring configured patterns",
+    )
+    parser.add_argument("--server-id", action="append", default=None)
+    parser.add_argument("--min-age", type=float, default=config.min_age)
+    parser.add_argument("--max-age", type=float, default=config.max_age)
+    parser.add_argument("--rate", type=float, default=config.rate)
+    parser.add_argument("--burst", type=float, default=config.burst)
+    parser.add_argument("--concurrency", type=int, default=config.concurrency)
+    parser.add_argument("--batch-size", type=int, default=config.batch_size)
+    parser.add_argument("--max-held", type=int, default=config.max_held)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    args.queue = args.queue or list(config.queues)
+    if args.all_routing_keys:
+        args.routing_key = []
+    else:
+        args.routing_key = args.routing_key or list(config.routing_keys)
+    args.server_id = args.server_id or list(config.server_ids)
+
+    logging.basicConfig(
+        level=settings.telemetry.log.level,
+        format=settings.telemetry.log.format,
+        encoding=settings.telemetry.log.encoding,
+    )
+    for name, counts in asyncio.run(run(args)).items():
+        logging.getLogger(__name__).info(
+            "Replayed %s: %s",
+            name,
+            " ".join(f"{result}={count}" for result, count in counts.items()),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!usr/bin/env python3
+"""Standalone consumer runtime.
+
+Runs the dispatcher subscribers as a FastStream application, without the FastAPI
+application, its instrumentation and an ASGI server. Probes and metrics are served
+by a minimal HTTP responder on the probes port.
+"""
+
+import asyncio
+import logging
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from faststream import FastStream
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from pipo_dispatch.config import settings
+from pipo_dispatch.startup import profile
+
+Response = Tuple[int, bytes, str]
+
+# probe requests are a request line and a few headers
+_MAX_REQUEST_SIZE = 8192
+
+
+class ProbeServer:
+    """Minimal HTTP/1.1 responder of probe and metrics endpoints.
+
+    Each connection is answered once and closed, request bodies are ignored.
+    """
+
+    __routes: Dict[str, Callable[[], Awaitable[Response]]]
+    __timeout: float
+    __server: Optional[asyncio.AbstractServer]
+
+    def __init__(
+        self,
+        routes: Dict[str, Callable[[], Awaitable[Response]]],
+        timeout: float = 5,
+    ) -> None:
+        """Build server.
+
+        Parameters
+        ----------
+        routes : Dict[str, Callable[[], Awaitable[Response]]]
+            Provides status code, body and content type of each served path.
+        timeout : float
+            Seconds to wait for a request before closing the connection.
+        """
+        self.__routes = {path.rstrip("/"): route for path, route in routes.items()}
+        self.__timeout = timeout
+        self.__server = None
+
+    @property
+    def port(self) -> Optional[int]:
+        """Port server listens on, once started."""
+        if self.__server is None or not self.__server.sockets:
+            return None
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def start(self, host: str, port: int) -> None:
+        """Listen for probes."""
+        self.__server = await asyncio.start_server(
+            self.__handle, host, port, limit=_MAX_REQUEST_SIZE
+        )
+
+    async def close(self) -> None:
+        """Stop listening for probes."""
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def __respond(self, reader: asyncio.StreamReader) -> Response:
+        request = await asyncio.wait_for(
+            reader.readuntil(b"\r\n\r\n"), timeout=self.__timeout
+        )
+        method, target, _ = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, b"", "text/plain"
+        route = self.__routes.get(target.split("?", 1)[0].rstrip("/"))
+        if route is None:
+            return HTTPStatus.NOT_FOUND, b"", "text/plain"
+        return await route()
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            status, body, content_type = await self.__respond(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status, body, content_type = HTTPStatus.BAD_REQUEST, b"", "text/plain"
+        except asyncio.TimeoutError:
+            writer.close()
+            return
+        status = HTTPStatus(status)
+        writer.write(
+            (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def create_probe_server() -> ProbeServer:
+    """Create probe server of liveness, cached readiness and process metrics."""
+
+    async def liveness() -> Response:
+        return settings.probes.liveness.status_code, b"", "text/plain"
+
+    from pipo_dispatch._queues import readiness as failures
+
+    async def readiness() -> Response:
+        failing = await failures()
+        if failing:
+            return 500, ", ".join(failing).encode(), "text/plain"
+        return HTTPStatus.NO_CONTENT, b"", "text/plain"
+
+    async def metrics() -> Response:
+        return HTTPStatus.OK, generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+    return ProbeServer(
+        {
+            settings.probes.liveness.endpoint: liveness,
+            settings.probes.readiness.endpoint: readiness,
+            settings.telemetry.metrics.endpoint: metrics,
+        },
+        timeout=settings.probes.liveness.timeout,
+    )
+
+
+def create_app(broker=None) -> FastStream:
+    """Create FastStream application consuming from the dispatcher queue.
+
+    Parameters
+    ----------
+    broker
+        Broker of dispatcher subscribers, defaults to the dispatcher router broker.
+
+    Returns
+    -------
+    FastStream
+        Application serving probes while running.
+    """
+    from pipo_dispatch._queues import get_broker, start_monitor, stop_monitor
+
+    if broker is None:
+        broker = get_broker()
+    probes = create_probe_server()
+    application = FastStream(broker, logger=logging.getLogger(__name__))
+
+    @application.after_startup
+    async def start_probes() -> None:
+        profile.mark("broker")
+        start_monitor()
+        await probes.start(settings.probes.host, settings.probes.port)
+
+    @application.on_shutdown
+    async def stop_probes() -> None:
+        await probes.close()
+        await stop_monitor()
+
+    return application
+
+
+def run() -> None:
+    """Run standalone consumer until signaled to stop."""
+    asyncio.run(create_app().run())
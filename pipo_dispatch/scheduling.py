@@ -0,0 +1,237 @@
+import asyncio
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from pipo_dispatch.publisher import publish_all
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+_EXHAUSTED = object()
+
+
+class _Submission(Generic[T]):
+    """Items submitted by a single caller, tracked until all are published."""
+
+    publish: Callable[[T], Awaitable[Any]]
+    queued: int
+    pending: int
+    exhausted: bool
+    error: Optional[BaseException]
+    done: asyncio.Event
+
+    def __init__(self, publish: Callable[[T], Awaitable[Any]]) -> None:
+        self.publish = publish
+        self.queued = 0
+        self.pending = 0
+        self.exhausted = False
+        self.error = None
+        self.done = asyncio.Event()
+
+    def settle(self) -> None:
+        """Flag submission done once every item was published."""
+        if self.exhausted and not self.pending:
+            self.done.set()
+
+
+class FairScheduler(Generic[K, T]):
+    """Orders publishes of concurrent submissions by deficit round-robin.
+
+    Each key, e.g. a server, owns a queue of pending items. Keys take turns, on
+    each turn a key is credited its weight and publishes one item per credit, so
+    a key submitting many items cannot delay other keys by more than a turn.
+
+    Submissions have a priority, keys take turns within each priority and items of
+    a higher priority are always published first.
+
+    No background task is kept, submitters drive publishing themselves taking
+    whichever item is next in round-robin order, possibly one of another key.
+    Pending items are bounded, submitters stop buffering and publish when full.
+    """
+
+    __weights: Mapping[K, float]
+    __default_weight: float
+    __max_buffered: int
+    # pending items and deficit of each key within a priority
+    __queues: Dict[Tuple[int, K], Deque[Tuple[_Submission[T], T]]]
+    __deficits: Dict[Tuple[int, K], float]
+    # keys with pending items taking turns, by priority
+    __active: Dict[int, Deque[K]]
+    __buffered: int
+
+    def __init__(
+        self,
+        weights: Optional[Mapping[K, float]] = None,
+        default_weight: float = 1,
+        max_buffered: int = 1000,
+    ) -> None:
+        """Build scheduler.
+
+        Parameters
+        ----------
+        weights : Optional[Mapping[K, float]]
+            Items published per turn of each key.
+        default_weight : float
+            Items published per turn of keys without a weight.
+        max_buffered : int
+            Maximum number of items pending publish across keys.
+        """
+        self.__weights = weights or {}
+        self.__default_weight = default_weight
+        self.__max_buffered = max(max_buffered, 1)
+        self.__queues = {}
+        self.__deficits = {}
+        self.__active = {}
+        self.__buffered = 0
+
+    def __len__(self) -> int:
+        """Provide number of items pending publish."""
+        return self.__buffered
+
+    def __push(
+        self, key: K, priority: int, submission: _Submission[T], item: T
+    ) -> None:
+        lane = (priority, key)
+        queue = self.__queues.get(lane)
+        if queue is None:
+            queue = self.__queues[lane] = deque()
+            self.__deficits[lane] = 0
+            self.__active.setdefault(priority, deque()).append(key)
+        queue.append((submission, item))
+        submission.queued += 1
+        submission.pending += 1
+        self.__buffered += 1
+
+    def __pop(self) -> Optional[Tuple[_Submission[T], T]]:
+        """Take next item of the highest priority in deficit round-robin order."""
+        while self.__active:
+            priority = max(self.__active)
+            active = self.__active[priority]
+            key = active[0]
+            lane = (priority, key)
+            if self.__deficits[lane] < 1:
+                self.__deficits[lane] += self.__weights.get(key, self.__default_weight)
+                if self.__deficits[lane] < 1:
+                    active.rotate(-1)
+                    continue
+            queue = self.__queues[lane]
+            submission, item = queue.popleft()
+            self.__deficits[lane] -= 1
+            self.__buffered -= 1
+            submission.queued -= 1
+            if not queue:
+                del self.__queues[lane]
+                del self.__deficits[lane]
+                active.popleft()
+                if not active:
+                    del self.__active[priority]
+            elif self.__deficits[lane] < 1:
+                active.rotate(-1)
+            if submission.error is not None:
+                submission.pending -= 1
+                continue
+            return submission, item
+        return None
+
+    async def __publish(self, entry: Tuple[_Submission[T], T]) -> None:
+        """Publish item, reporting failures to its own submitter."""
+        submission, item = entry
+        try:
+            await submission.publish(item)
+        except Exception as e:
+            if submission.error is None:
+                submission.error = e
+            submission.done.set()
+        finally:
+            submission.pending -= 1
+            submission.settle()
+
+    def __entries(
+        self, key: K, priority: int, submission: _Submission[T], items: Iterator[T]
+    ) -> Iterator[Tuple[_Submission[T], T]]:
+        """Buffer submitted items, providing items in round-robin order."""
+        while submission.error is None:
+            while not submission.exhausted and self.__buffered < self.__max_buffered:
+                item = next(items, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    submission.exhausted = True
+                    break
+                self.__push(key, priority, submission, item)
+            if submission.exhausted and not submission.queued:
+                return
+            entry = self.__pop()
+            if entry is None:
+                return
+            yield entry
+
+    async def submit(
+        self,
+        key: K,
+        publish: Callable[[T], Awaitable[Any]],
+        items: Iterable[T],
+        max_in_flight: int = 1,
+        priority: int = 0,
+    ) -> int:
+        """Publish items once it is key turn, returning once all were published.
+
+        Parameters
+        ----------
+        key : K
+            Key items are scheduled by.
+        publish : Callable[[T], Awaitable[Any]]
+            Publishes a single item, returning once broker confirms it.
+        items : Iterable[T]
+            Items to publish, consumed lazily.
+        max_in_flight : int
+            Maximum number of publishes awaiting confirmation by this submitter.
+        priority : int
+            Items are published before those of lower priority submissions.
+
+        Returns
+        -------
+        int
+            Number of submitted items.
+
+        Raises
+        ------
+        Exception
+            First failure publishing a submitted item.
+        """
+        submission = _Submission(publish)
+        submitted = 0
+
+        def counted() -> Iterator[T]:
+            nonlocal submitted
+            for item in items:
+                submitted += 1
+                yield item
+
+        try:
+            await publish_all(
+                self.__publish,
+                self.__entries(key, priority, submission, counted()),
+                max_in_flight=max_in_flight,
+            )
+            submission.settle()
+            await submission.done.wait()
+        finally:
+            if submission.error is None and not submission.done.is_set():
+                # cancelled while pending, remaining queued items are dropped
+                submission.error = asyncio.CancelledError()
+        if submission.error is not None:
+            raise submission.error
+        return submitted
@@ -0,0 +1,72 @@
+"""Startup profiling.
+
+Records when each startup phase completes, from the package import until the first
+consumed message, reporting per phase durations once startup completes.
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
+FIRST_MESSAGE = "first_message"
+
+
+class StartupProfile:
+    """Tracks startup phases completion time.
+
+    Phases are recorded once, in completion order, each phase lasting since the
+    previous one completed.
+    """
+
+    __clock: Callable[[], float]
+    __start: float
+    __phases: List[Tuple[str, float]]
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        """Build profile, starting now.
+
+        Parameters
+        ----------
+        clock : Callable[[], float]
+            Monotonic time source, in seconds.
+        """
+        self.__clock = clock
+        self.__start = clock()
+        self.__phases = []
+
+    def __contains__(self, phase: str) -> bool:
+        """Whether phase was already recorded."""
+        return any(name == phase for name, _ in self.__phases)
+
+    def mark(self, phase: str) -> None:
+        """Record phase completion, if not already recorded."""
+        if phase not in self:
+            self.__phases.append((phase, self.__clock()))
+
+    def elapsed(self) -> float:
+        """Seconds since profiling started."""
+        return self.__clock() - self.__start
+
+    def report(self) -> Dict[str, float]:
+        """Provide duration of each recorded phase and total, in seconds."""
+        durations = {}
+        previous = self.__start
+        for phase, completed in self.__phases:
+            durations[phase] = completed - previous
+            previous = completed
+        durations["total"] = previous - self.__start
+        return durations
+
+    def first_message(self) -> None:
+        """Record first consumed message, logging startup report once."""
+        if FIRST_MESSAGE in self:
+            return
+        self.mark(FIRST_MESSAGE)
+        logging.getLogger(__name__).info(
+            "Startup phases: %s",
+            ", ".join(f"{phase}={took:.3f}s" for phase, took in self.report().items()),
+        )
+
+
+# started on package import
+profile = StartupProfile()
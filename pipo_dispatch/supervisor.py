@@ -0,0 +1,272 @@
+#!usr/bin/env python3
+"""Multi-process worker mode.
+
+A supervisor process starts worker processes consuming from the dispatcher queue and
+serves probes and metrics on their behalf. Workers report liveness and readiness
+through shared memory heartbeats, Prometheus metrics are written by each worker to
+a shared directory and merged by the supervisor on collection.
+"""
+
+import asyncio
+import contextlib
+import glob
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from typing import Callable, List, Optional
+
+from pipo_dispatch.config import settings
+from pipo_dispatch.startup import profile
+
+WORKER_ID_ATTRIBUTE = "pipo.worker.id"
+
+
+async def __serve(worker_id: int, heartbeats, ready) -> None:
+    """Consume from broker, reporting heartbeats until signaled to stop."""
+    from pipo_dispatch._queues import (
+        get_broker,
+        readiness,
+        start_monitor,
+        stop_monitor,
+    )
+    from pipo_dispatch.telemetry import refresh_gauges
+
+    config = settings.workers
+    broker = get_broker()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await broker.start()
+    profile.mark("broker")
+    start_monitor()
+    try:
+        while not stop.is_set():
+            ready[worker_id] = not await readiness()
+            heartbeats[worker_id] = time.time()
+            refresh_gauges()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), config.heartbeat_interval)
+    finally:
+        ready[worker_id] = False
+        await stop_monitor()
+        await broker.close()
+
+
+def run_worker(worker_id: int, heartbeats, ready) -> None:
+    """Worker process entry point.
+
+    Parameters
+    ----------
+    worker_id : int
+        Worker index, identifies worker telemetry.
+    heartbeats
+        Shared array of each worker last heartbeat timestamp.
+    ready
+        Shared array of each worker readiness.
+    """
+    logging.basicConfig(
+        level=settings.telemetry.log.level,
+        format=f"[worker {worker_id}] {settings.telemetry.log.format}",
+        encoding=settings.telemetry.log.encoding,
+    )
+    asyncio.run(__serve(worker_id, heartbeats, ready))
+
+
+class Supervisor:
+    """Starts worker processes, restarting them once they exit."""
+
+    __count: int
+    __heartbeat_timeout: float
+    __target: Callable
+    __context: BaseContext
+    __processes: List[Optional[BaseProcess]]
+    __clock: Callable[[], float]
+
+    def __init__(
+        self,
+        count: int,
+        heartbeat_timeout: float,
+        target: Callable = run_worker,
+        context: Optional[BaseContext] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Build supervisor.
+
+        Parameters
+        ----------
+        count : int
+            Number of worker processes.
+        heartbeat_timeout : float
+            Seconds without heartbeat after which a worker is considered unresponsive.
+        target : Callable
+            Worker entry point, called with worker id, heartbeats and readiness.
+        context : Optional[BaseContext]
+            Multiprocessing context, defaults to spawning fresh interpreters.
+        clock : Callable[[], float]
+            Time source heartbeats are recorded with, in seconds.
+        """
+        self.__count = count
+        self.__heartbeat_timeout = heartbeat_timeout
+        self.__target = target
+        self.__context = context or multiprocessing.get_context("spawn")
+        self.__clock = clock
+        self.__processes = [None] * count
+        self.heartbeats = self.__context.Array("d", count, lock=False)
+        self.ready = self.__context.Array("b", count, lock=False)
+
+    def __len__(self) -> int:
+        """Provide number of worker processes."""
+        return self.__count
+
+    def __start_worker(self, worker_id: int) -> None:
+        # identify worker telemetry, inherited by the worker environment
+        attributes = os.environ.get("OTEL_RESOURCE_ATTRIBUTES", "")
+        os.environ["OTEL_RESOURCE_ATTRIBUTES"] = ",".join(
+            filter(None, (attributes, f"{WORKER_ID_ATTRIBUTE}={worker_id}"))
+        )
+        try:
+            process = self.__context.Process(
+                target=self.__target,
+                args=(worker_id, self.heartbeats, self.ready),
+                name=f"worker-{worker_id}",
+                daemon=True,
+            )
+            self.heartbeats[worker_id] = self.__clock()
+            self.ready[worker_id] = False
+            process.start()
+        finally:
+            os.environ["OTEL_RESOURCE_ATTRIBUTES"] = attributes
+        self.__processes[worker_id] = process
+
+    def start(self) -> None:
+        """Start every worker process."""
+        for worker_id in range(self.__count):
+            self.__start_worker(worker_id)
+
+    def check(self) -> None:
+        """Restart exited worker processes."""
+        logger = logging.getLogger(__name__)
+        for worker_id, process in enumerate(self.__processes):
+            if process is None or process.is_alive():
+                continue
+            logger.warning(
+                "Worker %d exited with code %s, restarting", worker_id, process.exitcode
+            )
+            if multiprocess_dir := os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                from prometheus_client import multiprocess
+
+                multiprocess.mark_process_dead(process.pid, multiprocess_dir)
+            self.__start_worker(worker_id)
+
+    def alive(self) -> bool:
+        """Whether every worker is running and recently reported a heartbeat."""
+        now = self.__clock()
+        return all(
+            process is not None
+            and process.is_alive()
+            and now - self.heartbeats[worker_id] <= self.__heartbeat_timeout
+            for worker_id, process in enumerate(self.__processes)
+        )
+
+    def is_ready(self) -> bool:
+        """Whether every worker is connected to the broker."""
+        return self.alive() and all(self.ready)
+
+    def stop(self, timeout: float) -> None:
+        """Signal workers to stop, killing those not exiting within timeout."""
+        for process in self.__processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self.__processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def create_probe_app(supervisor: Supervisor):
+    """Create application serving aggregated probes and merged metrics.
+
+    Parameters
+    ----------
+    supervisor : Supervisor
+        Supervisor of probed workers, started and stopped with the application.
+
+    Returns
+    -------
+    FastAPI
+        Probe application.
+    """
+    from fastapi import FastAPI, Response
+    from prometheus_client import CollectorRegistry, make_asgi_app, multiprocess
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        supervisor.start()
+
+        async def monitor():
+            while True:
+                await asyncio.sleep(settings.workers.restart_delay)
+                supervisor.check()
+
+        task = asyncio.create_task(monitor())
+        try:
+            yield
+        finally:
+            task.cancel()
+            supervisor.stop(settings.player.queue.broker.graceful_timeout)
+
+    application = FastAPI(lifespan=lifespan)
+
+    @application.get(settings.probes.liveness.endpoint)
+    async def liveness() -> Response:
+        if supervisor.alive():
+            return Response(status_code=settings.probes.liveness.status_code)
+        return Response(status_code=500)
+
+    @application.get(settings.probes.readiness.endpoint)
+    async def readiness() -> Response:
+        return Response(status_code=204 if supervisor.is_ready() else 500)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    application.mount(settings.telemetry.metrics.endpoint, make_asgi_app(registry))
+    return application
+
+
+def prepare_metrics_dir() -> str:
+    """Provide a Prometheus multiprocess directory, exported to workers.
+
+    Metric files left by previous runs are removed, other files of a configured
+    directory are kept.
+    """
+    directory = settings.workers.metrics_dir or tempfile.mkdtemp(prefix="pipo-")
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def supervise(count: int) -> None:
+    """Run count worker processes, serving probes and metrics until stopped."""
+    import uvicorn
+
+    prepare_metrics_dir()
+    supervisor = Supervisor(count, settings.workers.heartbeat_timeout)
+    uvicorn.run(
+        create_probe_app(supervisor),
+        host=settings.probes.host,
+        port=settings.probes.port,
+        log_level=settings.probes.log_level,
+    )
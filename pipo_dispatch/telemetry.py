@@ -1,16 +1,400 @@
+import os
 from dataclasses import dataclass
+from typing import Callable, List, Mapping, Optional, Sequence, Tuple
+
+import prometheus_client
 from opentelemetry import trace, metrics
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import (
+    ReadableSpan,
+    SpanLimits,
+    SpanProcessor,
+    TracerProvider,
+)
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    ALWAYS_ON,
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
 from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.metrics.export import (
     InMemoryMetricReader,
     PeriodicExportingMetricReader,
 )
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+
+from pipo_dispatch.rate_limit import TokenBucket
+
+
+@dataclass
+class Counter:
+    """Counter exported through both OpenTelemetry and Prometheus registries."""
+
+    otel: metrics.Counter
+    prometheus: prometheus_client.Counter
+
+    def add(self, amount: int = 1, attributes: Optional[Mapping[str, str]] = None):
+        """Increment counter by amount, attributes must match declared labels."""
+        self.otel.add(amount, attributes)
+        if attributes:
+            self.prometheus.labels(**attributes).inc(amount)
+        else:
+            self.prometheus.inc(amount)
+
+
+def create_counter(
+    meter: metrics.Meter,
+    name: str,
+    description: str,
+    unit: str,
+    labels: Sequence[str] = (),
+) -> Counter:
+    """Create counter exported by OpenTelemetry meter and Prometheus registry.
+
+    Parameters
+    ----------
+    meter : metrics.Meter
+        OpenTelemetry meter creating the counter.
+    name : str
+        Dot separated counter name, converted to snake case for Prometheus.
+    description : str
+        Counter description.
+    unit : str
+        Counted unit.
+    labels : Sequence[str]
+        Attribute names used when incrementing the counter.
+
+    Returns
+    -------
+    Counter
+        Counter exported through both registries.
+    """
+    return Counter(
+        otel=meter.create_counter(name=name, description=description, unit=unit),
+        prometheus=prometheus_client.Counter(
+            name.replace(".", "_"),
+            description,
+            labelnames=labels,
+            registry=prometheus_client.REGISTRY,
+        ),
+    )
+
+
+@dataclass
+class Histogram:
+    """Histogram exported through both OpenTelemetry and Prometheus registries."""
+
+    otel: metrics.Histogram
+    prometheus: prometheus_client.Histogram
+
+    def record(
+        self, amount: float, attributes: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """Record a sample, attributes must match declared labels."""
+        self.otel.record(amount, attributes)
+        if attributes:
+            self.prometheus.labels(**attributes).observe(amount)
+        else:
+            self.prometheus.observe(amount)
+
+
+def create_histogram(  # noqa: PLR0913
+    meter: metrics.Meter,
+    name: str,
+    description: str,
+    unit: str,
+    labels: Sequence[str] = (),
+    buckets: Sequence[float] = prometheus_client.Histogram.DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create histogram exported by OpenTelemetry meter and Prometheus registry.
+
+    Parameters
+    ----------
+    meter : metrics.Meter
+        OpenTelemetry meter creating the histogram.
+    name : str
+        Dot separated histogram name, converted to snake case for Prometheus.
+    description : str
+        Histogram description.
+    unit : str
+        Measured unit.
+    labels : Sequence[str]
+        Attribute names used when recording samples.
+    buckets : Sequence[float]
+        Bucket upper bounds, defaults to Prometheus latency buckets in seconds.
+
+    Returns
+    -------
+    Histogram
+        Histogram exported through both registries.
+    """
+    bounds = [bound for bound in buckets if bound != float("inf")]
+    return Histogram(
+        otel=meter.create_histogram(
+            name=name,
+            description=description,
+            unit=unit,
+            explicit_bucket_boundaries_advisory=bounds,
+        ),
+        prometheus=prometheus_client.Histogram(
+            name.replace(".", "_"),
+            description,
+            labelnames=labels,
+            registry=prometheus_client.REGISTRY,
+            buckets=buckets,
+        ),
+    )
+
+
+__observed_gauges: List[Tuple[prometheus_client.Gauge, Callable[[], float]]] = []
+
+
+def multiprocess() -> bool:
+    """Whether Prometheus metrics are collected across multiple processes."""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def refresh_gauges() -> None:
+    """Store observable gauges current values, needed in multiprocess mode only."""
+    for gauge, callback in __observed_gauges:
+        gauge.set(callback())
+
+
+def create_observable_gauge(  # noqa: PLR0913
+    meter: metrics.Meter,
+    name: str,
+    description: str,
+    unit: str,
+    label: str,
+    observe: Mapping[str, Callable[[], float]],
+) -> None:
+    """Create gauge observed on collection by OpenTelemetry and Prometheus.
+
+    Parameters
+    ----------
+    meter : metrics.Meter
+        OpenTelemetry meter creating the gauge.
+    name : str
+        Dot separated gauge name, converted to snake case for Prometheus.
+    description : str
+        Gauge description.
+    unit : str
+        Measured unit.
+    label : str
+        Attribute name distinguishing observed values.
+    observe : Mapping[str, Callable[[], float]]
+        Provides current value of each label value.
+    """
+    gauge = prometheus_client.Gauge(
+        name.replace(".", "_"),
+        description,
+        labelnames=(label,),
+        registry=prometheus_client.REGISTRY,
+        multiprocess_mode="livesum",
+    )
+    for value, callback in observe.items():
+        if multiprocess():
+            # collected from files written by each process, see refresh_gauges
+            __observed_gauges.append((gauge.labels(value), callback))
+        else:
+            gauge.labels(value).set_function(callback)
+
+    def observations(options: CallbackOptions) -> Sequence[Observation]:
+        return [
+            Observation(callback(), {label: value})
+            for value, callback in observe.items()
+        ]
+
+    meter.create_observable_gauge(
+        name=name, callbacks=[observations], description=description, unit=unit
+    )
+
+
+class RecordOnlySampler(Sampler):
+    """Records spans without sampling them, so they are not exported by default."""
+
+    def should_sample(self, parent_context, trace_id, name, *args, **kwargs):
+        """Record span without sampling it."""
+        return SamplingResult(Decision.RECORD_ONLY)
+
+    def get_description(self) -> str:
+        """Describe sampler."""
+        return "RecordOnlySampler"
+
+
+class _RecordUnsampled(Sampler):
+    """Records spans a delegate sampler drops."""
+
+    def __init__(self, delegate: Sampler) -> None:
+        self.__delegate = delegate
+
+    def should_sample(self, parent_context, trace_id, name, *args, **kwargs):
+        result = self.__delegate.should_sample(
+            parent_context, trace_id, name, *args, **kwargs
+        )
+        if result.decision is Decision.DROP:
+            return SamplingResult(Decision.RECORD_ONLY, result.attributes)
+        return result
+
+    def get_description(self) -> str:
+        return self.__delegate.get_description()
+
+
+class RateLimitedSampler(Sampler):
+    """Limits spans sampled per second by a delegate sampler.
+
+    Spans sampled beyond the rate get the fallback decision instead.
+    """
+
+    __delegate: Sampler
+    __bucket: TokenBucket
+    __fallback: Decision
+
+    def __init__(
+        self, delegate: Sampler, rate: float, fallback: Decision = Decision.DROP
+    ) -> None:
+        """Build sampler.
+
+        Parameters
+        ----------
+        delegate : Sampler
+            Sampler deciding which spans are sampled.
+        rate : float
+            Maximum number of sampled spans per second, also allowed in a burst.
+        fallback : Decision
+            Decision for spans sampled beyond the rate.
+        """
+        self.__delegate = delegate
+        self.__bucket = TokenBucket(rate=rate, burst=rate)
+        self.__fallback = fallback
+
+    def should_sample(self, parent_context, trace_id, name, *args, **kwargs):
+        """Sample span if delegate samples it and rate allows."""
+        result = self.__delegate.should_sample(
+            parent_context, trace_id, name, *args, **kwargs
+        )
+        if not result.decision.is_sampled():
+            return result
+        if self.__bucket.tokens < 1:
+            return SamplingResult(self.__fallback)
+        self.__bucket.reserve()
+        return result
+
+    def get_description(self) -> str:
+        """Describe sampler."""
+        return f"RateLimitedSampler{{{self.__delegate.get_description()}}}"
+
+
+def create_sampler(
+    ratio: float = 1.0,
+    parent_based: bool = True,
+    rate_limit: float = 0,
+    always_on_error: bool = False,
+) -> Sampler:
+    """Create trace sampler.
+
+    Parameters
+    ----------
+    ratio : float
+        Share of new traces sampled.
+    parent_based : bool
+        Whether spans follow the sampling decision of their parent.
+    rate_limit : float
+        Maximum number of new traces sampled per second, unlimited if `0`.
+    always_on_error : bool
+        Whether unsampled spans are recorded, see `ErrorSpanProcessor`, recording
+        costs about as much as sampling apart from export.
+
+    Returns
+    -------
+    Sampler
+        Trace sampler.
+    """
+    unsampled = Decision.RECORD_ONLY if always_on_error else Decision.DROP
+    root = ALWAYS_ON if ratio >= 1 else TraceIdRatioBased(ratio)
+    if always_on_error and ratio < 1:
+        root = _RecordUnsampled(root)
+    if rate_limit:
+        root = RateLimitedSampler(root, rate_limit, fallback=unsampled)
+    if not parent_based:
+        return root
+    if always_on_error:
+        return ParentBased(
+            root,
+            remote_parent_not_sampled=RecordOnlySampler(),
+            local_parent_not_sampled=RecordOnlySampler(),
+        )
+    return ParentBased(root)
+
+
+class ErrorSpanProcessor(SpanProcessor):
+    """Forwards sampled spans, and unsampled recorded spans ending in error.
+
+    Export processors skip unsampled spans, recorded spans ending in error are
+    forwarded as sampled so failures are exported regardless of sampling.
+    """
+
+    __delegate: SpanProcessor
+
+    def __init__(self, delegate: SpanProcessor) -> None:
+        """Build processor.
+
+        Parameters
+        ----------
+        delegate : SpanProcessor
+            Processor exporting spans.
+        """
+        self.__delegate = delegate
+
+    def on_start(self, span, parent_context=None) -> None:
+        """Forward span start."""
+        self.__delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        """Forward sampled spans and unsampled spans ending in error."""
+        if span.context.trace_flags.sampled:
+            self.__delegate.on_end(span)
+        elif span.status.status_code is StatusCode.ERROR:
+            self.__delegate.on_end(_sampled(span))
+
+    def shutdown(self) -> None:
+        """Shutdown delegate."""
+        self.__delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Flush delegate."""
+        return self.__delegate.force_flush(timeout_millis)
+
+
+def _sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy span flagged as sampled."""
+    context = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            context.trace_id,
+            context.span_id,
+            context.is_remote,
+            TraceFlags(context.trace_flags | TraceFlags.SAMPLED),
+            context.trace_state,
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
 
 
 @dataclass
@@ -21,20 +405,61 @@ class TelemetryProviders:
     metrics: MeterProvider
 
 
-def setup_telemetry(service_name: str, local: bool = False) -> TelemetryProviders:
+def setup_telemetry(
+    service_name: str, local: bool = False, traces: Optional[Mapping] = None
+) -> TelemetryProviders:
+    """Set global tracer and meter providers.
+
+    Parameters
+    ----------
+    service_name : str
+        Name of instrumented service.
+    local : bool
+        Whether telemetry is kept in memory instead of exported.
+    traces : Optional[Mapping]
+        Trace `sampling` and span `limits` configuration, every trace sampled and
+        default limits applied if not provided.
+
+    Returns
+    -------
+    TelemetryProviders
+        Global tracer and meter providers.
+    """
+    traces = traces or {}
+    sampling = traces.get("sampling") or {}
+    limits = traces.get("limits") or {}
     resource = Resource.create(attributes={"service.name": service_name})
 
-    tracer_provider = TracerProvider(resource=resource)
-    tracer_exporter = InMemorySpanExporter() if local else OTLPSpanExporter()
+    if local:
+        tracer_exporter = InMemorySpanExporter()
+        metric_reader = InMemoryMetricReader()
+    else:
+        # gRPC exporters are slow to import, loaded only when exporting remotely
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        tracer_exporter = OTLPSpanExporter()
+        metric_reader = PeriodicExportingMetricReader(OTLPMetricExporter())
+
+    tracer_provider = TracerProvider(
+        resource=resource,
+        sampler=create_sampler(**sampling),
+        span_limits=SpanLimits(
+            max_span_attributes=limits.get("attributes"),
+            max_events=limits.get("events"),
+            max_attribute_length=limits.get("attribute_length"),
+        ),
+    )
     processor = BatchSpanProcessor(tracer_exporter)
+    if sampling.get("always_on_error"):
+        processor = ErrorSpanProcessor(processor)
     tracer_provider.add_span_processor(processor)
     trace.set_tracer_provider(tracer_provider)
 
-    metric_reader = (
-        InMemoryMetricReader()
-        if local
-        else PeriodicExportingMetricReader(OTLPMetricExporter())
-    )
     metric_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
     metrics.set_meter_provider(metric_provider)
     return TelemetryProviders(tracer_provider, metric_provider)
@@ -48,11 +48,40 @@ class Helpers:
         return port
 
 
+class Clock:
+    """Time source advanced by setting `now`, in seconds."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
 @pytest.fixture
 def helpers():
     return Helpers
 
 
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def override_settings():
+    """Override settings during a test, restoring previous values afterwards."""
+    previous = {}
+
+    def override(key: str, value):
+        previous.setdefault(key, settings.get(key))
+        settings.set(key, value, validate=False)
+
+    yield override
+    for key, value in previous.items():
+        settings.set(key, value, validate=False)
+
+
 @pytest.fixture(scope="session", autouse=True)
 def random():
     rand.seed(0)
@@ -0,0 +1,77 @@
+#!usr/bin/env python3
+import pytest
+from fastapi.testclient import TestClient
+from faststream.rabbit import TestRabbitBroker
+
+from pipo_dispatch._queues import get_broker, get_router
+from pipo_dispatch.app import create_app
+from pipo_dispatch.config import settings
+
+TOKEN = "secret"  # noqa: S105
+AUTHORIZATION = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.mark.integration
+class TestDebugEndpoints:
+    @pytest.fixture
+    async def client(self, override_settings):
+        override_settings("debug.enabled", True)
+        override_settings("debug.token", TOKEN)
+        async with TestRabbitBroker(get_broker()):
+            yield TestClient(create_app(get_router()))
+
+    async def test_disabled_by_default(self):
+        async with TestRabbitBroker(get_broker()):
+            client = TestClient(create_app(get_router()))
+            response = client.get(f"{settings.debug.endpoint}/profile")
+        assert response.status_code == 404
+
+    def test_enabled_without_token(self, override_settings):
+        override_settings("debug.enabled", True)
+        override_settings("debug.token", "")
+        with pytest.raises(ValueError):
+            create_app(get_router())
+
+    @pytest.mark.parametrize("path", ["/profile", "/allocations"])
+    def test_unauthenticated(self, client, path):
+        endpoint = f"{settings.debug.endpoint}{path}"
+        assert client.get(endpoint).status_code == 403
+        response = client.get(endpoint, headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == 401
+
+    def test_profile_collapsed(self, client):
+        response = client.get(
+            f"{settings.debug.endpoint}/profile",
+            params={"seconds": 0.2},
+            headers=AUTHORIZATION,
+        )
+        assert response.status_code == 200
+        stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+        assert "run_forever" in stack
+        assert int(count) > 0
+
+    def test_profile_pstats(self, client):
+        response = client.get(
+            f"{settings.debug.endpoint}/profile",
+            params={"seconds": 0.1, "format": "pstats", "limit": 5},
+            headers=AUTHORIZATION,
+        )
+        assert response.status_code == 200
+        assert "cumulative" in response.text
+
+    def test_profile_too_long(self, client):
+        response = client.get(
+            f"{settings.debug.endpoint}/profile",
+            params={"seconds": settings.debug.max_seconds + 1},
+            headers=AUTHORIZATION,
+        )
+        assert response.status_code == 422
+
+    def test_allocations(self, client):
+        response = client.get(
+            f"{settings.debug.endpoint}/allocations",
+            params={"seconds": 0.1},
+            headers=AUTHORIZATION,
+        )
+        assert response.status_code == 200
+        assert "allocation sites" in response.text
@@ -1,5 +1,6 @@
 import mock
 import pytest
+from prometheus_client import REGISTRY
 from faststream.rabbit import TestRabbitBroker, RabbitQueue
 
 import tests.constants
@@ -7,9 +8,15 @@ from tests.conftest import Helpers
 
 from pipo_dispatch.audio_source.youtube_handler import YoutubeOperations
 from pipo_dispatch.audio_source.spotify_handler import SpotifyOperations
-from pipo_dispatch.models.provider import ProviderOperation
+from pipo_dispatch.models.provider import ProviderOperation, ProviderOperationBatch
+from pipo_dispatch import _queues
 from pipo_dispatch._queues import router, get_broker
+from pipo_dispatch.codec import MsgpackCodec, decode_message, get_codec, json_codec
 from pipo_dispatch.config import settings
+from pipo_dispatch.deduplication import DuplicateWindow
+from pipo_dispatch.progress import MemoryProgressStore
+from pipo_dispatch.rate_limit import RateLimiter, TokenBucket
+from pipo_dispatch.replay import republish
 from pipo_dispatch.models.music_request import MusicRequest
 from pipo_dispatch._queues import (
     router,
@@ -28,6 +35,8 @@ test_queue = RabbitQueue(
 @router.subscriber(
     queue=test_queue,
     exchange=provider_exch,
+    filter=lambda msg: msg.raw_message.type == ProviderOperation.message_type,
+    decoder=decode_message,
     description="Consumes from dispatch topic and produces to provider exchange",
 )
 async def consume_dummy(
@@ -36,6 +45,33 @@ async def consume_dummy(
     pass
 
 
+@router.subscriber(
+    queue=test_queue,
+    exchange=provider_exch,
+    filter=lambda msg: msg.raw_message.type == ProviderOperationBatch.message_type,
+    decoder=decode_message,
+    description="Consumes batches from provider exchange",
+)
+async def consume_batch_dummy(
+    request: ProviderOperationBatch,
+) -> None:
+    pass
+
+
+test_delay_queue = RabbitQueue("test-delay-queue", auto_delete=True)
+
+
+@router.subscriber(
+    queue=test_delay_queue,
+    decoder=decode_message,
+    description="Consumes operations deferred by rate limits",
+)
+async def consume_delayed_dummy(
+    request: ProviderOperation,
+) -> None:
+    pass
+
+
 @pytest.mark.integration
 @pytest.mark.remote_queue
 class TestDispatch:
@@ -104,6 +140,395 @@ class TestDispatch:
         await consume_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
         consume_dummy.mock.assert_has_calls(provider_operations, any_order=True)
 
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_youtube_url_duplicates(
+        self, broker, monkeypatch, override_settings
+    ):
+        override_settings("dispatch.classification.canonicalize", True)
+        monkeypatch.setattr(
+            _queues, "classifier", getattr(_queues, "__load_classifier")()
+        )
+        server_id = "0"
+        uuid = Helpers.generate_uuid()
+        queries = [
+            "https://youtu.be/1V_xRb0x9aw",
+            "https://www.youtube.com/watch?v=1V_xRb0x9aw&si=x1",
+            "https://music.youtube.com/watch?v=1V_xRb0x9aw",
+        ]
+
+        dispatch_request = MusicRequest(
+            server_id=server_id,
+            uuid=uuid,
+            query=queries,
+        )
+
+        provider_operation = ProviderOperation(
+            uuid=uuid,
+            server_id=server_id,
+            query=tests.constants.YOUTUBE_URL_1,
+            provider="provider.youtube.url",
+            operation=YoutubeOperations.URL,
+        )
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        await consume_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
+        consume_dummy.mock.assert_called_once_with(dict(provider_operation))
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_batch(self, broker, override_settings):
+        override_settings("dispatch.publish.batch.enabled", True)
+        override_settings("dispatch.publish.batch.max_size", 2)
+        server_id = "0"
+        uuid = Helpers.generate_uuid()
+        queries = [
+            *tests.constants.YOUTUBE_URL_SIMPLE_LIST,
+            tests.constants.YOUTUBE_QUERY_1,
+        ]
+
+        dispatch_request = MusicRequest(
+            server_id=server_id,
+            uuid=uuid,
+            query=queries,
+        )
+
+        batches = [
+            ("provider.youtube.url", YoutubeOperations.URL, queries[:2]),
+            ("provider.youtube.url", YoutubeOperations.URL, queries[2:3]),
+            ("provider.youtube.query", YoutubeOperations.QUERY, queries[3:]),
+        ]
+        provider_operations = [
+            mock.call(
+                dict(
+                    ProviderOperationBatch(
+                        uuid=uuid,
+                        server_id=server_id,
+                        queries=batch,
+                        provider=provider,
+                        operation=operation,
+                    )
+                )
+            )
+            for provider, operation, batch in batches
+        ]
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        await consume_batch_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
+        consume_batch_dummy.mock.assert_has_calls(provider_operations, any_order=True)
+        assert consume_batch_dummy.mock.call_count == len(batches)
+        consume_dummy.mock.assert_not_called()
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_suppressed(self, broker, monkeypatch):
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        monkeypatch.setattr(
+            _queues, "duplicate_window", DuplicateWindow(window=60, max_entries=10)
+        )
+        succeeded = sample("pipo_dispatch_requests_success_total")
+        suppressed = sample("pipo_dispatch_requests_suppressed_total")
+        for _ in range(2):
+            await broker.publish(
+                MusicRequest(
+                    server_id="0",
+                    uuid=Helpers.generate_uuid(),
+                    query=[tests.constants.YOUTUBE_URL_1],
+                ),
+                queue=dispatcher_queue,
+            )
+            await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        consume_dummy.mock.assert_called_once()
+        assert sample("pipo_dispatch_requests_success_total") == succeeded + 1
+        assert sample("pipo_dispatch_requests_suppressed_total") == suppressed + 1
+        assert sample(
+            "pipo_dispatch_duration_count", result="suppressed", lane="interactive"
+        )
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_metrics(self, broker):
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        url_sources = {"handler_type": "youtube", "operation": "url"}
+        fanout = sample("pipo_dispatch_fanout_count")
+        sources = sample("pipo_dispatch_sources_total", **url_sources)
+        publishes = sample(
+            "pipo_dispatch_publish_duration_count",
+            routing_key="provider.youtube.url",
+        )
+        classification = sample(
+            "pipo_dispatch_stage_duration_count", stage="classification"
+        )
+        succeeded = sample(
+            "pipo_dispatch_duration_count", result="success", lane="interactive"
+        )
+        dispatch_request = MusicRequest(
+            server_id="0",
+            uuid=Helpers.generate_uuid(),
+            query=tests.constants.YOUTUBE_URL_SIMPLE_LIST,
+        )
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        size = len(tests.constants.YOUTUBE_URL_SIMPLE_LIST)
+        assert sample("pipo_dispatch_fanout_count") == fanout + 1
+        assert sample("pipo_dispatch_sources_total", **url_sources) == sources + size
+        assert (
+            sample(
+                "pipo_dispatch_publish_duration_count",
+                routing_key="provider.youtube.url",
+            )
+            == publishes + size
+        )
+        assert (
+            sample("pipo_dispatch_stage_duration_count", stage="classification")
+            == classification + 1
+        )
+        assert (
+            sample("pipo_dispatch_duration_count", result="success", lane="interactive")
+            == succeeded + 1
+        )
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_split(self, broker, override_settings):
+        override_settings("dispatch.split.max_queries", 2)
+        override_settings("dispatch.split.chunk_size", 2)
+        server_id = "0"
+        uuid = Helpers.generate_uuid()
+        queries = [
+            *tests.constants.YOUTUBE_URL_SIMPLE_LIST,
+            tests.constants.YOUTUBE_QUERY_1,
+        ]
+
+        dispatch_request = MusicRequest(
+            server_id=server_id,
+            uuid=uuid,
+            query=queries,
+        )
+        children = [
+            mock.call(child.model_dump()) for child in dispatch_request.split(2)
+        ]
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        await consume_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
+        dispatch.mock.assert_has_calls(children, any_order=True)
+        assert dispatch.mock.call_count == 1 + len(children)
+        assert consume_dummy.mock.call_count == len(queries)
+        assert {call.args[0]["uuid"] for call in consume_dummy.mock.call_args_list} == {
+            uuid
+        }
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_redelivery_resumed(self, broker, monkeypatch):
+        monkeypatch.setitem(
+            getattr(_queues, "__load_services")(),
+            "progress",
+            MemoryProgressStore(max_requests=10, ttl=60),
+        )
+        publish = getattr(_queues, "__publish")
+        published = []
+
+        async def fail_second(body, **options):
+            if len(published) == 1:
+                raise ConnectionError
+            await publish(body, **options)
+            published.append(body)
+
+        queries = tests.constants.YOUTUBE_URL_SIMPLE_LIST
+        dispatch_request = MusicRequest(
+            server_id="0",
+            uuid=Helpers.generate_uuid(),
+            query=queries,
+        )
+        monkeypatch.setattr(_queues, "__publish", fail_second)
+        with pytest.raises(ConnectionError):
+            await broker.publish(dispatch_request, queue=dispatcher_queue)
+        assert consume_dummy.mock.call_count == 1
+        first = consume_dummy.mock.call_args.args[0]
+
+        monkeypatch.setattr(_queues, "__publish", publish)
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        assert consume_dummy.mock.call_count == len(queries)
+        assert first not in [
+            call.args[0] for call in consume_dummy.mock.call_args_list[1:]
+        ]
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        assert consume_dummy.mock.call_count == len(queries)
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_priority_lanes(
+        self, broker, monkeypatch, override_settings
+    ):
+        override_settings("dispatch.priority.lanes.bulk", "bulk")
+        publish = getattr(_queues, "__publish")
+        published = []
+
+        async def capture(body, **options):
+            published.append(options)
+            await publish(body, **options)
+
+        monkeypatch.setattr(_queues, "__publish", capture)
+        levels = settings.dispatch.priority.levels
+        for query in (
+            tests.constants.YOUTUBE_URL_SIMPLE_LIST,
+            [tests.constants.YOUTUBE_PLAYLIST_1],
+        ):
+            dispatch_request = MusicRequest(
+                server_id="0",
+                uuid=Helpers.generate_uuid(),
+                query=query,
+            )
+            await broker.publish(dispatch_request, queue=dispatcher_queue)
+        assert [(o["routing_key"], o["priority"]) for o in published] == [
+            ("provider.youtube.url", levels.interactive),
+        ] * len(tests.constants.YOUTUBE_URL_SIMPLE_LIST) + [
+            ("provider.youtube.playlist.bulk", levels.bulk),
+        ]
+        assert consume_dummy.mock.call_count == len(published)
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_replayed(self, broker):
+        queries = tests.constants.YOUTUBE_URL_SIMPLE_LIST
+        dispatch_request = MusicRequest(
+            server_id="0",
+            uuid=Helpers.generate_uuid(),
+            query=queries,
+        )
+        message = mock.Mock(
+            body=json_codec.encode(dict(dispatch_request)),
+            content_type=json_codec.content_type,
+            headers={"x-death": [{"count": 3}], "x-delivery-count": 3, "trace": "1"},
+            type=None,
+            message_id=dispatch_request.uuid,
+            correlation_id=None,
+            priority=None,
+        )
+        await republish(message)
+        dispatch.mock.assert_called_once_with(dict(dispatch_request))
+        assert consume_dummy.mock.call_count == len(queries)
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_rate_limited(self, broker, monkeypatch):
+        routing_key = "provider.youtube.url"
+        monkeypatch.setattr(
+            _queues,
+            "rate_limiter",
+            RateLimiter({routing_key: TokenBucket(rate=0.01, burst=2)}),
+        )
+        monkeypatch.setattr(_queues, "delay_queues", {routing_key: test_delay_queue})
+        queries = tests.constants.YOUTUBE_URL_SIMPLE_LIST[:3]
+        publishes = (
+            REGISTRY.get_sample_value(
+                "pipo_dispatch_publish_duration_count", {"routing_key": routing_key}
+            )
+            or 0
+        )
+
+        dispatch_request = MusicRequest(
+            server_id="0",
+            uuid=Helpers.generate_uuid(),
+            query=queries,
+        )
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        await consume_delayed_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
+        assert consume_dummy.mock.call_count == 2
+        consume_delayed_dummy.mock.assert_called_once()
+        assert consume_delayed_dummy.mock.call_args.args[0]["query"] == queries[2]
+        assert REGISTRY.get_sample_value(
+            "pipo_dispatch_publish_duration_count", {"routing_key": routing_key}
+        ) == publishes + len(queries)
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_rate_limited_lane(
+        self, broker, monkeypatch, override_settings
+    ):
+        override_settings("dispatch.priority.lanes.bulk", "bulk")
+        routing_key = "provider.youtube.playlist"
+        monkeypatch.setattr(
+            _queues,
+            "rate_limiter",
+            RateLimiter({routing_key: TokenBucket(rate=0.01, burst=1)}),
+        )
+        monkeypatch.setattr(_queues, "delay_queues", {})
+        publish = getattr(_queues, "__publish")
+        published = []
+
+        async def capture(body, **options):
+            published.append(options)
+            await publish(body, **options)
+
+        monkeypatch.setattr(_queues, "__publish", capture)
+        dispatch_request = MusicRequest(
+            server_id="0",
+            uuid=Helpers.generate_uuid(),
+            query=[
+                tests.constants.YOUTUBE_PLAYLIST_1,
+                tests.constants.YOUTUBE_PLAYLIST_2,
+            ],
+        )
+
+        await broker.publish(dispatch_request, queue=dispatcher_queue)
+        assert published[0]["routing_key"] == f"{routing_key}.bulk"
+        delayed = published[1]["queue"]
+        assert delayed.arguments["x-dead-letter-routing-key"] == f"{routing_key}.bulk"
+        assert _queues.delay_queues == {f"{routing_key}.bulk": delayed}
+
+    @pytest.mark.youtube
+    @pytest.mark.asyncio
+    async def test_dispatch_msgpack(self, broker, monkeypatch):
+        codec = get_codec(MsgpackCodec.content_type)
+        monkeypatch.setattr(_queues, "publish_codec", codec)
+        server_id = "0"
+        uuid = Helpers.generate_uuid()
+        queries = tests.constants.YOUTUBE_URL_SIMPLE_LIST
+
+        dispatch_request = MusicRequest(
+            server_id=server_id,
+            uuid=uuid,
+            query=queries,
+        )
+
+        provider_operations = [
+            mock.call(
+                dict(
+                    ProviderOperation(
+                        uuid=uuid,
+                        server_id=server_id,
+                        query=query,
+                        provider="provider.youtube.url",
+                        operation=YoutubeOperations.URL,
+                    )
+                )
+            )
+            for query in queries
+        ]
+
+        await broker.publish(
+            codec.encode(dispatch_request.model_dump()),
+            queue=dispatcher_queue,
+            content_type=codec.content_type,
+        )
+        await dispatch.wait_call(timeout=tests.constants.SHORT_TIMEOUT)
+        dispatch.mock.assert_called_once_with(dict(dispatch_request))
+        await consume_dummy.wait_call(timeout=tests.constants.MEDIUM_TIMEOUT)
+        consume_dummy.mock.assert_has_calls(provider_operations, any_order=True)
+
     @pytest.mark.parametrize(
         "queries",
         [
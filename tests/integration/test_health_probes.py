@@ -1,10 +1,15 @@
 #!usr/bin/env python3
+import concurrent.futures
+
+import mock
 import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 from faststream.rabbit import TestRabbitBroker
 
 from pipo_dispatch.config import settings
 from pipo_dispatch._queues import get_broker, get_router
+from pipo_dispatch import _queues
 from pipo_dispatch.app import create_app
 
 
@@ -22,3 +27,39 @@ class TestHealthProbes:
     def test_readyz(self, client):
         response = client.get("/readyz", timeout=settings.probes.readiness.timeout)
         assert response.status_code == 204
+
+    def test_readyz_loop_degraded(self, client, monkeypatch):
+        monkeypatch.setattr(_queues, "loop_degraded", lambda: True)
+        response = client.get("/readyz", timeout=settings.probes.readiness.timeout)
+        assert response.status_code == 500
+        assert response.text == "loop"
+
+    def test_readyz_cached(self, client, monkeypatch):
+        ping = mock.AsyncMock(return_value=True)
+        monkeypatch.setattr(get_broker(), "ping", ping)
+        for _ in range(3):
+            response = client.get("/readyz")
+            assert response.status_code == 204
+        assert ping.await_count <= 1
+
+    def test_readyz_disconnected(self, client):
+        _queues.health.connected(False)
+        try:
+            response = client.get("/readyz")
+        finally:
+            _queues.health.connected(True)
+        assert response.status_code == 500
+        assert response.text == "connection"
+
+    @pytest.mark.asyncio
+    async def test_health_gauge_off_loop_thread(self):
+        # metric readers observe gauges from their own thread, without event loop
+        _queues.loop_lag.start()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(1) as executor:
+                observed = executor.submit(
+                    REGISTRY.get_sample_value, "pipo_dispatch_health", {"check": "loop"}
+                ).result()
+        finally:
+            await _queues.loop_lag.stop()
+        assert observed == 1
@@ -0,0 +1,67 @@
+#!usr/bin/env python3
+import asyncio
+
+import pytest
+from faststream.rabbit import TestRabbitBroker
+
+from pipo_dispatch._queues import get_broker
+from pipo_dispatch.config import settings
+from pipo_dispatch.runtime import ProbeServer, create_probe_server
+
+
+async def get(port, path, method="GET"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split(b" ", 2)[1]), body
+
+
+@pytest.mark.integration
+class TestStandaloneRuntime:
+    @pytest.fixture
+    async def port(self):
+        async with TestRabbitBroker(get_broker()):
+            server = create_probe_server()
+            await server.start("127.0.0.1", 0)
+            yield server.port
+            await server.close()
+
+    @pytest.mark.asyncio
+    async def test_livez(self, port):
+        status, _ = await get(port, settings.probes.liveness.endpoint)
+        assert status == settings.probes.liveness.status_code
+
+    @pytest.mark.asyncio
+    async def test_readyz(self, port):
+        status, _ = await get(port, settings.probes.readiness.endpoint)
+        assert status == 204
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, port):
+        status, body = await get(port, f"{settings.telemetry.metrics.endpoint}/")
+        assert status == 200
+        assert b"pipo_dispatch_queries_duplicate_total" in body
+
+    @pytest.mark.parametrize(
+        "path, method, expected", [("/unknown", "GET", 404), ("/livez", "POST", 405)]
+    )
+    @pytest.mark.asyncio
+    async def test_unserved(self, port, path, method, expected):
+        status, _ = await get(port, path, method)
+        assert status == expected
+
+    @pytest.mark.asyncio
+    async def test_malformed_request(self):
+        server = ProbeServer({}, timeout=1)
+        await server.start("127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"garbage\r\n\r\n")
+            await writer.drain()
+            assert (await reader.read()).startswith(b"HTTP/1.1 400")
+            writer.close()
+        finally:
+            await server.close()
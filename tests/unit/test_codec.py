@@ -0,0 +1,41 @@
+#!usr/bin/env python3
+import pytest
+
+import tests.constants
+from tests.conftest import Helpers
+from pipo_dispatch.codec import JsonCodec, MsgpackCodec, get_codec
+from pipo_dispatch.models import MusicRequest
+
+
+@pytest.mark.unit
+class TestCodec:
+    @pytest.mark.parametrize(
+        "content_type",
+        [JsonCodec.content_type, MsgpackCodec.content_type],
+    )
+    def test_round_trip(self, content_type):
+        codec = get_codec(content_type)
+        request = MusicRequest(
+            uuid=Helpers.generate_uuid(),
+            server_id="0",
+            query=tests.constants.YOUTUBE_URL_COMPLEX_LIST,
+        )
+        body = codec.encode(request.model_dump())
+        assert MusicRequest.model_validate(codec.decode(body)) == request
+
+    @pytest.mark.parametrize(
+        "content_type, codec",
+        [
+            (None, JsonCodec),
+            ("", JsonCodec),
+            ("application/json; charset=utf-8", JsonCodec),
+            ("Application/MsgPack", MsgpackCodec),
+            ("application/x-msgpack", MsgpackCodec),
+        ],
+    )
+    def test_get_codec(self, content_type, codec):
+        assert isinstance(get_codec(content_type), codec)
+
+    def test_get_codec_unsupported(self):
+        with pytest.raises(ValueError, match="Unsupported"):
+            get_codec("text/xml")
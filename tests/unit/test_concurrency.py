@@ -0,0 +1,164 @@
+#!usr/bin/env python3
+import asyncio
+import concurrent.futures
+import logging
+import time
+
+import pytest
+
+from pipo_dispatch.concurrency import AdaptiveConcurrency
+from pipo_dispatch.loop_lag import LoopLagSampler, LoopWatchdog
+
+
+def limiter(clock, lag=lambda: 0.0, **kwargs):
+    options = dict(
+        min_limit=1,
+        max_limit=20,
+        latency_target=0.1,
+        lag_target=0.05,
+        initial=4,
+        backoff=0.5,
+        cooldown=1,
+        lag=lag,
+        clock=clock,
+    )
+    options.update(kwargs)
+    return AdaptiveConcurrency(**options)
+
+
+@pytest.mark.unit
+class TestAdaptiveConcurrency:
+    def test_additive_increase(self, clock):
+        concurrency = limiter(clock)
+        for _ in range(4):
+            concurrency.record(0.01)
+        assert concurrency.limit == 4
+        concurrency.record(0.01)
+        assert concurrency.limit == 5
+
+    def test_bounded(self, clock):
+        concurrency = limiter(clock, max_limit=6)
+        for _ in range(100):
+            concurrency.record(0.01)
+        assert concurrency.limit == 6
+        concurrency = limiter(clock, min_limit=2)
+        for second in range(10):
+            clock.now = second
+            concurrency.record(1)
+        assert concurrency.limit == 2
+
+    def test_multiplicative_decrease_once_per_cooldown(self, clock):
+        concurrency = limiter(clock, initial=16)
+        concurrency.record(1)
+        concurrency.record(1)
+        assert concurrency.limit == 8
+        clock.now = 1
+        concurrency.record(1)
+        assert concurrency.limit == 4
+
+    def test_loop_lag_decrease(self, clock):
+        concurrency = limiter(clock, lag=lambda: 1, initial=16)
+        concurrency.record(0.01)
+        assert concurrency.limit == 8
+
+    @pytest.mark.asyncio
+    async def test_limits_in_flight(self, clock):
+        concurrency = limiter(clock, initial=2)
+        running = []
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with concurrency:
+                running.append(None)
+                peak = max(peak, len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        await asyncio.gather(*(work() for _ in range(10)))
+        assert peak == 2
+        assert concurrency.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_increase_admits_waiters(self, clock):
+        concurrency = limiter(clock, initial=1)
+        await concurrency.acquire()
+        waiter = asyncio.ensure_future(concurrency.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        concurrency.record(0.01)
+        await asyncio.sleep(0)
+        assert waiter.done()
+        assert concurrency.in_flight == 2
+
+
+@pytest.mark.unit
+class TestLoopLagSampler:
+    @pytest.mark.asyncio
+    async def test_blocked_loop_lag(self):
+        sampler = LoopLagSampler(interval=0.01, smoothing=0.5)
+        sampler.start()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        # block event loop past the sampler wake up
+        time.sleep(0.2)
+        await asyncio.sleep(0.015)
+        assert sampler.lag >= 0.02
+        assert sampler.running
+        await sampler.stop()
+        assert not sampler.running
+
+    @pytest.mark.asyncio
+    async def test_samples_observed(self):
+        samples = []
+        sampler = LoopLagSampler(interval=0.01, on_sample=samples.append)
+        sampler.start()
+        await asyncio.sleep(0)
+        time.sleep(0.05)
+        await asyncio.sleep(0.03)
+        await sampler.stop()
+        assert samples
+        assert max(samples) >= 0.02
+
+    @pytest.mark.asyncio
+    async def test_running_off_loop_thread(self):
+        sampler = LoopLagSampler(interval=0.01)
+        sampler.start()
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            assert executor.submit(lambda: sampler.running).result()
+            await sampler.stop()
+            assert not executor.submit(lambda: sampler.running).result()
+
+
+@pytest.mark.unit
+class TestLoopWatchdog:
+    @pytest.mark.asyncio
+    async def test_blocked_loop_logged(self, caplog):
+        sampler = LoopLagSampler(interval=0.01)
+        watchdog = LoopWatchdog(sampler, threshold=0.05)
+        sampler.start()
+        watchdog.start()
+        await asyncio.sleep(0.02)
+        with caplog.at_level(logging.WARNING, logger="pipo_dispatch.loop_lag"):
+            # block event loop past the threshold
+            time.sleep(0.3)
+            await asyncio.sleep(0.02)
+        watchdog.stop()
+        await sampler.stop()
+        assert not watchdog.running
+        (record,) = caplog.records
+        assert "Event loop blocked" in record.getMessage()
+        assert "test_blocked_loop_logged" in record.getMessage()
+
+    @pytest.mark.asyncio
+    async def test_responsive_loop_not_logged(self, caplog):
+        sampler = LoopLagSampler(interval=0.01)
+        watchdog = LoopWatchdog(sampler, threshold=0.05)
+        sampler.start()
+        watchdog.start()
+        with caplog.at_level(logging.WARNING, logger="pipo_dispatch.loop_lag"):
+            await asyncio.sleep(0.2)
+        watchdog.stop()
+        await sampler.stop()
+        assert watchdog.stall() >= 0
+        assert not caplog.records
@@ -0,0 +1,45 @@
+#!usr/bin/env python3
+import pytest
+
+import tests.constants
+from tests.conftest import Helpers
+from pipo_dispatch.deduplication import DuplicateWindow
+
+
+@pytest.mark.unit
+class TestDuplicateWindow:
+    @pytest.fixture
+    def window(self, clock):
+        return DuplicateWindow(window=10, max_entries=2, clock=clock)
+
+    def test_duplicate_from_other_request(self, window):
+        query = tests.constants.YOUTUBE_URL_1
+        assert not window.is_duplicate("0", Helpers.generate_uuid(), query)
+        assert window.is_duplicate("0", Helpers.generate_uuid(), query)
+
+    def test_same_request_not_duplicate(self, window):
+        uuid = Helpers.generate_uuid()
+        query = tests.constants.YOUTUBE_URL_1
+        assert not window.is_duplicate("0", uuid, query)
+        assert not window.is_duplicate("0", uuid, query)
+
+    def test_scoped_by_server(self, window):
+        query = tests.constants.YOUTUBE_URL_1
+        assert not window.is_duplicate("0", Helpers.generate_uuid(), query)
+        assert not window.is_duplicate("1", Helpers.generate_uuid(), query)
+
+    def test_expiration(self, window, clock):
+        query = tests.constants.YOUTUBE_URL_1
+        assert not window.is_duplicate("0", Helpers.generate_uuid(), query)
+        clock.now = 10
+        assert not window.is_duplicate("0", Helpers.generate_uuid(), query)
+        assert len(window) == 1
+
+    def test_bounded(self, window):
+        uuid = Helpers.generate_uuid()
+        for query in tests.constants.YOUTUBE_URL_SIMPLE_LIST:
+            window.is_duplicate("0", uuid, query)
+        assert len(window) == 2
+        assert not window.is_duplicate(
+            "0", Helpers.generate_uuid(), tests.constants.YOUTUBE_URL_SIMPLE_LIST[0]
+        )
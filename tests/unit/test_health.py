@@ -0,0 +1,92 @@
+#!usr/bin/env python3
+import asyncio
+
+import mock
+import pytest
+
+from pipo_dispatch.health import HealthMonitor
+
+
+@pytest.mark.unit
+class TestHealthMonitor:
+    @pytest.mark.asyncio
+    async def test_checked_once(self):
+        check = mock.AsyncMock(return_value=True)
+        monitor = HealthMonitor(check)
+        assert not monitor.checked
+        for _ in range(3):
+            assert await monitor.readiness() == []
+        check.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_check_failure(self):
+        monitor = HealthMonitor(mock.AsyncMock(side_effect=ConnectionError))
+        assert await monitor.readiness() == ["connection"]
+
+    def test_connection_events(self):
+        monitor = HealthMonitor(mock.AsyncMock())
+        monitor.connected(True)
+        assert monitor.ready
+        monitor.connected(False)
+        assert monitor.failures() == ["connection"]
+
+    def test_publish_failure_until_success(self):
+        monitor = HealthMonitor(mock.AsyncMock())
+        monitor.connected(True)
+        monitor.publish_failed()
+        assert monitor.failures() == ["publish"]
+        monitor.published()
+        assert monitor.ready
+
+    def test_publish_failure_window(self, clock):
+        monitor = HealthMonitor(
+            mock.AsyncMock(), publish_failure_window=30, clock=clock
+        )
+        monitor.connected(True)
+        monitor.publish_failed()
+        clock.now = 29
+        assert monitor.failures() == ["publish"]
+        clock.now = 30
+        assert monitor.ready
+
+    def test_publish_age_while_handling(self, clock):
+        monitor = HealthMonitor(mock.AsyncMock(), max_publish_age=10, clock=clock)
+        monitor.connected(True)
+        clock.now = 100
+        # idle time is not counted
+        with monitor.handling():
+            assert monitor.ready
+            clock.now = 105
+            monitor.published()
+            clock.now = 114
+            assert monitor.ready
+            clock.now = 116
+            assert monitor.failures() == ["publish"]
+        assert monitor.ready
+
+    def test_conditions(self):
+        healthy = {"consumer": True}
+        monitor = HealthMonitor(
+            mock.AsyncMock(), conditions={"consumer": lambda: healthy["consumer"]}
+        )
+        monitor.connected(True)
+        assert monitor.status() == {
+            "connection": True,
+            "publish": True,
+            "consumer": True,
+        }
+        healthy["consumer"] = False
+        assert monitor.failures() == ["consumer"]
+
+    @pytest.mark.asyncio
+    async def test_periodic_check(self):
+        check = mock.AsyncMock(return_value=True)
+        monitor = HealthMonitor(check, interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        assert check.await_count >= 2
+        assert monitor.ready
+        count = check.await_count
+        await asyncio.sleep(0.03)
+        assert check.await_count == count
@@ -0,0 +1,63 @@
+#!usr/bin/env python3
+import pytest
+
+import tests.constants
+from tests.conftest import Helpers
+from pipo_dispatch.audio_source.youtube_handler import YoutubeOperations
+from pipo_dispatch.models import (
+    MusicRequest,
+    ProviderOperation,
+    ProviderOperationEncoder,
+)
+
+
+@pytest.mark.unit
+class TestProviderOperationEncoder:
+    @pytest.mark.parametrize("shuffle", [True, False])
+    @pytest.mark.parametrize(
+        "query",
+        [
+            tests.constants.YOUTUBE_URL_1,
+            tests.constants.YOUTUBE_QUERY_0,
+            'quoted "song" \\ ção',
+        ],
+    )
+    def test_encode_matches_model(self, query, shuffle):
+        operation = ProviderOperation(
+            uuid=Helpers.generate_uuid(),
+            server_id="0",
+            provider="provider.youtube.url",
+            operation=YoutubeOperations.URL,
+            shuffle=shuffle,
+            query=query,
+        )
+        encoder = ProviderOperationEncoder(
+            uuid=operation.uuid,
+            server_id=operation.server_id,
+            shuffle=operation.shuffle,
+        )
+        body = encoder.encode(operation.provider, operation.operation, query)
+        assert ProviderOperation.model_validate_json(body) == operation
+        assert body == operation.model_dump_json().encode()
+
+
+class TestMusicRequestSplit:
+    @pytest.mark.parametrize(
+        "count, size, sizes",
+        [(5, 2, [2, 2, 1]), (4, 2, [2, 2]), (1, 3, [1]), (0, 3, [])],
+    )
+    def test_split(self, count, size, sizes):
+        request = MusicRequest(
+            uuid=Helpers.generate_uuid(),
+            server_id="0",
+            shuffle=True,
+            query=[f"query {index}" for index in range(count)],
+        )
+        children = list(request.split(size))
+        assert [len(child.query) for child in children] == sizes
+        assert [child.chunk for child in children] == list(range(len(sizes)))
+        assert {child.chunks for child in children} <= {len(sizes)}
+        assert {(child.uuid, child.server_id, child.shuffle) for child in children} <= {
+            (request.uuid, request.server_id, request.shuffle)
+        }
+        assert [query for child in children for query in child.query] == request.query
@@ -0,0 +1,76 @@
+#!usr/bin/env python3
+import pytest
+
+from pipo_dispatch.progress import (
+    MemoryProgressStore,
+    SQLiteProgressStore,
+    operation_key,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def clock_store(request, tmp_path, clock):
+    if request.param == "memory":
+        yield clock, MemoryProgressStore(max_requests=2, ttl=10, clock=clock)
+        return
+    store = SQLiteProgressStore(str(tmp_path / "progress.sqlite"), ttl=10, clock=clock)
+    yield clock, store
+    store.close()
+
+
+@pytest.mark.unit
+class TestProgressStore:
+    def test_operation_key(self):
+        assert operation_key(b"a") == operation_key(b"a")
+        assert operation_key(b"a") != operation_key(b"b")
+
+    def test_record(self, clock_store):
+        _, store = clock_store
+        assert store.published("a") == set()
+        store.record("a", "x")
+        store.record("a", "y")
+        store.record("a", "x")
+        assert store.published("a") == {"x", "y"}
+        assert store.published("b") == set()
+        assert not store.completed("a")
+
+    def test_complete(self, clock_store):
+        _, store = clock_store
+        store.record("a", "x")
+        store.complete("a")
+        assert store.completed("a")
+        assert store.published("a") == set()
+
+    def test_expire(self, clock_store):
+        clock, store = clock_store
+        store.record("a", "x")
+        store.complete("b")
+        clock.now = 11
+        assert store.published("a") == set()
+        assert not store.completed("b")
+
+
+@pytest.mark.unit
+class TestMemoryProgressStore:
+    def test_bounded(self):
+        store = MemoryProgressStore(max_requests=2, ttl=10)
+        store.record("a", "x")
+        store.complete("b")
+        store.record("c", "x")
+        assert len(store) == 2
+        assert store.published("a") == set()
+        assert store.completed("b")
+
+
+@pytest.mark.unit
+class TestSQLiteProgressStore:
+    def test_persisted(self, tmp_path):
+        path = str(tmp_path / "progress.sqlite")
+        store = SQLiteProgressStore(path, ttl=10)
+        store.record("a", "x")
+        store.complete("b")
+        store.close()
+        store = SQLiteProgressStore(path, ttl=10)
+        assert store.published("a") == {"x"}
+        assert store.completed("b")
+        store.close()
@@ -0,0 +1,77 @@
+#!usr/bin/env python3
+import asyncio
+
+import pytest
+
+from pipo_dispatch.publisher import batched_by, publish_all
+
+
+class Broker:
+    def __init__(self, fail_on=None):
+        self.published = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = fail_on
+
+    async def publish(self, item):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01 if item % 2 else 0)
+            if item == self.fail_on:
+                raise ConnectionError(item)
+            self.published.append(item)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.unit
+class TestPublisher:
+    @pytest.mark.asyncio
+    async def test_sequential(self):
+        broker = Broker()
+        assert await publish_all(broker.publish, range(10)) == 10
+        assert broker.published == list(range(10))
+        assert broker.max_in_flight == 1
+
+    @pytest.mark.parametrize("max_in_flight", [2, 4, 16])
+    @pytest.mark.asyncio
+    async def test_bounded_window(self, max_in_flight):
+        broker = Broker()
+        published = await publish_all(broker.publish, range(20), max_in_flight)
+        assert published == 20
+        assert sorted(broker.published) == list(range(20))
+        assert broker.max_in_flight == max_in_flight
+
+    @pytest.mark.parametrize("max_in_flight", [1, 4])
+    @pytest.mark.asyncio
+    async def test_failure_raised(self, max_in_flight):
+        broker = Broker(fail_on=5)
+        with pytest.raises(ConnectionError):
+            await publish_all(broker.publish, range(20), max_in_flight)
+        assert broker.in_flight == 0
+        assert 5 not in broker.published
+
+    @pytest.mark.asyncio
+    async def test_items_consumed_lazily(self):
+        broker = Broker()
+        consumed = []
+
+        def items():
+            for item in range(10):
+                consumed.append(item)
+                assert len(consumed) - len(broker.published) <= 3
+                yield item
+
+        assert await publish_all(broker.publish, items(), 2) == 10
+
+    def test_batched_by(self):
+        batches = list(batched_by(range(10), key=lambda item: item % 3, max_size=2))
+        assert batches == [
+            (0, [0, 3]),
+            (1, [1, 4]),
+            (2, [2, 5]),
+            (0, [6, 9]),
+            (1, [7]),
+            (2, [8]),
+        ]
@@ -0,0 +1,56 @@
+#!usr/bin/env python3
+import pytest
+
+from pipo_dispatch.rate_limit import RateLimiter, TokenBucket
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    def test_burst_available(self, clock):
+        bucket = TokenBucket(rate=1, burst=3, clock=clock)
+        assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+        assert bucket.tokens == 0
+
+    def test_reserve_ahead(self, clock):
+        bucket = TokenBucket(rate=2, burst=1, clock=clock)
+        assert [bucket.reserve() for _ in range(4)] == [0, 0.5, 1, 1.5]
+        assert bucket.tokens == -3
+
+    def test_refill(self, clock):
+        bucket = TokenBucket(rate=2, burst=2, clock=clock)
+        bucket.reserve()
+        bucket.reserve()
+        bucket.reserve()
+        clock.now = 1
+        assert bucket.tokens == 1
+        clock.now = 10
+        assert bucket.tokens == 2
+        assert bucket.reserve() == 0
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    def test_from_settings(self):
+        limiter = RateLimiter.from_settings(
+            [
+                {"routing_key": "provider.youtube.query", "rate": 1, "burst": 2},
+                {"routing_key": "provider.spotify.url", "rate": 5},
+            ]
+        )
+        assert len(limiter) == 2
+        assert dict(limiter)["provider.spotify.url"].tokens == 5
+        assert [limiter.reserve("provider.youtube.query") for _ in range(2)] == [0, 0]
+        assert limiter.reserve("provider.youtube.query") > 0
+
+    @pytest.mark.parametrize(
+        "bucket", [{"rate": 0}, {"rate": -1, "burst": 2}, {"rate": 1, "burst": 0.5}]
+    )
+    def test_from_settings_invalid(self, bucket):
+        with pytest.raises(ValueError, match="provider.youtube.query"):
+            RateLimiter.from_settings(
+                [{"routing_key": "provider.youtube.query", **bucket}]
+            )
+
+    def test_unlimited_keys(self):
+        limiter = RateLimiter({})
+        assert all(limiter.reserve("provider.youtube.url") == 0 for _ in range(100))
@@ -0,0 +1,196 @@
+#!usr/bin/env python3
+import asyncio
+import datetime
+import json
+from types import SimpleNamespace
+
+import mock
+import pytest
+
+from pipo_dispatch import replay
+from pipo_dispatch.replay import (
+    FAILED,
+    MATCHED,
+    REPLAYED,
+    SKIPPED,
+    BackgroundReplay,
+    Replayer,
+    ReplayFilter,
+)
+
+NOW = 1_000_000.0
+
+
+class Message:
+    def __init__(self, routing_key="dl.dispatch", server_id="0", died=NOW):
+        self.routing_key = routing_key
+        self.body = json.dumps({"server_id": server_id, "queries": []}).encode()
+        self.content_type = "application/json"
+        self.headers = {
+            "x-death": [
+                {"time": datetime.datetime.fromtimestamp(died, datetime.timezone.utc)}
+            ]
+        }
+        self.timestamp = None
+        self.message_id = id(self)
+        self.acked = False
+        self.requeued = False
+
+    async def ack(self):
+        self.acked = True
+
+    async def nack(self, requeue=True):
+        self.requeued = requeue
+
+
+class Queue:
+    def __init__(self, messages, declared=None):
+        self.messages = list(messages)
+        self.declaration_result = SimpleNamespace(
+            message_count=len(self.messages) if declared is None else declared
+        )
+
+    async def get(self, no_ack=False, fail=True):
+        if not self.messages:
+            return None
+        return self.messages.pop(0)
+
+
+def replayer(publish=None, replay_filter=ReplayFilter(), **kwargs):
+    return Replayer(
+        publish or mock.AsyncMock(),
+        replay_filter,
+        rate=kwargs.pop("rate", 1000),
+        burst=kwargs.pop("burst", 1000),
+        clock=lambda: NOW,
+        **kwargs,
+    )
+
+
+@pytest.mark.unit
+class TestReplayFilter:
+    def test_routing_keys(self):
+        replay_filter = ReplayFilter(routing_keys=("dl.*",))
+        assert replay_filter.matches(Message("dl.dispatch"), NOW)
+        assert not replay_filter.matches(Message("provider.youtube"), NOW)
+
+    def test_server_ids(self):
+        replay_filter = ReplayFilter(server_ids=frozenset({"1"}))
+        assert replay_filter.matches(Message(server_id="1"), NOW)
+        assert not replay_filter.matches(Message(server_id="2"), NOW)
+
+    def test_age(self):
+        replay_filter = ReplayFilter(min_age=10, max_age=60)
+        assert not replay_filter.matches(Message(died=NOW - 5), NOW)
+        assert replay_filter.matches(Message(died=NOW - 30), NOW)
+        assert not replay_filter.matches(Message(died=NOW - 90), NOW)
+
+    def test_unknown_age(self):
+        message = Message()
+        message.headers = {}
+        assert ReplayFilter().matches(message, NOW)
+        assert not ReplayFilter(min_age=1).matches(message, NOW)
+
+
+@pytest.mark.unit
+class TestReplayer:
+    @pytest.mark.asyncio
+    async def test_replays_matching(self):
+        matching = [Message() for _ in range(5)]
+        other = [Message("provider.youtube") for _ in range(3)]
+        publish = mock.AsyncMock()
+        counts = await replayer(
+            publish, ReplayFilter(routing_keys=("dl.dispatch",)), batch_size=2
+        ).replay(Queue(matching + other), "dlq")
+        assert counts == {REPLAYED: 5, SKIPPED: 3}
+        assert [call.args[0] for call in publish.await_args_list] == matching
+        assert all(message.acked for message in matching)
+        assert all(message.requeued and not message.acked for message in other)
+
+    @pytest.mark.asyncio
+    async def test_failed_requeued(self):
+        message = Message()
+        publish = mock.AsyncMock(side_effect=ConnectionError)
+        counts = await replayer(publish).replay(Queue([message]), "dlq")
+        assert counts == {FAILED: 1}
+        assert message.requeued
+        assert not message.acked
+
+    @pytest.mark.asyncio
+    async def test_dry_run(self):
+        messages = [Message(), Message("provider.youtube")]
+        publish = mock.AsyncMock()
+        counts = await replayer(
+            publish, ReplayFilter(routing_keys=("dl.dispatch",))
+        ).replay(Queue(messages), "dlq", dry_run=True)
+        assert counts == {MATCHED: 1, SKIPPED: 1}
+        publish.assert_not_awaited()
+        assert all(message.requeued for message in messages)
+
+    @pytest.mark.asyncio
+    async def test_bounded_pass(self):
+        queue = Queue([Message() for _ in range(10)], declared=4)
+        counts = await replayer(batch_size=3).replay(queue, "dlq")
+        assert counts == {REPLAYED: 4}
+        counts = await replayer().replay(Queue([Message()] * 5), "dlq", limit=2)
+        assert counts == {REPLAYED: 2}
+
+    @pytest.mark.asyncio
+    async def test_max_held(self):
+        other = [Message("provider.youtube") for _ in range(5)]
+        matching = Message()
+        queue = Queue([*other, matching])
+        counts = await replayer(
+            replay_filter=ReplayFilter(routing_keys=("dl.dispatch",)),
+            batch_size=2,
+            max_held=3,
+        ).replay(queue, "dlq")
+        assert counts == {SKIPPED: 3}
+        assert all(message.requeued for message in other[:3])
+        assert queue.messages == [*other[3:], matching]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await replayer(rate=50, burst=1, concurrency=5).replay(
+            Queue([Message() for _ in range(6)]), "dlq"
+        )
+        assert loop.time() - start >= 0.09
+
+
+@pytest.mark.unit
+class TestBackgroundReplay:
+    @pytest.mark.asyncio
+    async def test_periodic(self):
+        queue = Queue([])
+        declare = mock.AsyncMock(return_value=queue)
+        background = BackgroundReplay(replayer(), {"dlq": declare}, interval=0.01)
+        background.start()
+        for _ in range(2):
+            message = Message()
+            queue.messages.append(message)
+            queue.declaration_result.message_count = 1
+            await asyncio.sleep(0.03)
+            assert message.acked
+        await background.stop()
+        count = declare.await_count
+        await asyncio.sleep(0.03)
+        assert declare.await_count == count
+
+
+@pytest.mark.unit
+class TestMain:
+    @pytest.mark.parametrize(
+        "argv, routing_keys",
+        [
+            ([], ["dl.dispatch"]),
+            (["--routing-key", "dl.*"], ["dl.*"]),
+            (["--all-routing-keys"], []),
+        ],
+    )
+    def test_routing_keys(self, monkeypatch, argv, routing_keys):
+        run = mock.AsyncMock(return_value={})
+        monkeypatch.setattr(replay, "run", run)
+        replay.main(argv)
+        assert run.await_args.args[0].routing_key == routing_keys
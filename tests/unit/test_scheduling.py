@@ -0,0 +1,120 @@
+#!usr/bin/env python3
+import asyncio
+
+import pytest
+
+from pipo_dispatch.scheduling import FairScheduler
+
+
+class Broker:
+    def __init__(self, fail_on=None):
+        self.published = []
+        self.fail_on = fail_on
+
+    async def publish(self, item):
+        await asyncio.sleep(0)
+        if item == self.fail_on:
+            raise ConnectionError(item)
+        self.published.append(item)
+
+
+def items(key, count):
+    return [(key, index) for index in range(count)]
+
+
+@pytest.mark.unit
+class TestFairScheduler:
+    @pytest.mark.parametrize("max_in_flight", [1, 4])
+    @pytest.mark.asyncio
+    async def test_single_submitter(self, max_in_flight):
+        broker = Broker()
+        scheduler = FairScheduler(max_buffered=3)
+        submitted = await scheduler.submit(
+            "a", broker.publish, items("a", 10), max_in_flight
+        )
+        assert submitted == 10
+        assert sorted(broker.published) == items("a", 10)
+        assert len(scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_small_request_not_starved(self):
+        broker = Broker()
+        scheduler = FairScheduler()
+        large = asyncio.create_task(
+            scheduler.submit("a", broker.publish, items("a", 100))
+        )
+        await asyncio.sleep(0)
+        await scheduler.submit("b", broker.publish, items("b", 1))
+        assert broker.published.index(("b", 0)) <= 2
+        assert not large.done()
+        await large
+        assert len(broker.published) == 101
+
+    @pytest.mark.asyncio
+    async def test_weights(self):
+        broker = Broker()
+        scheduler = FairScheduler(weights={"a": 2}, max_buffered=100)
+        await asyncio.gather(
+            scheduler.submit("a", broker.publish, items("a", 6)),
+            scheduler.submit("b", broker.publish, items("b", 3)),
+        )
+        assert [key for key, _ in broker.published] == list("aabaabaab")
+
+    @pytest.mark.asyncio
+    async def test_bounded_buffer(self):
+        broker = Broker()
+        scheduler = FairScheduler(max_buffered=5)
+        buffered = []
+
+        async def publish(item):
+            buffered.append(len(scheduler))
+            await broker.publish(item)
+
+        await asyncio.gather(
+            scheduler.submit("a", publish, items("a", 20)),
+            scheduler.submit("b", publish, items("b", 20)),
+        )
+        assert len(broker.published) == 40
+        assert max(buffered) <= 5
+
+    @pytest.mark.asyncio
+    async def test_failure_raised_to_submitter(self):
+        broker = Broker(fail_on=("a", 2))
+        scheduler = FairScheduler(max_buffered=100)
+        results = await asyncio.gather(
+            scheduler.submit("a", broker.publish, items("a", 10)),
+            scheduler.submit("b", broker.publish, items("b", 10)),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], ConnectionError)
+        assert results[1] == 10
+        assert sorted(item for item in broker.published if item[0] == "b") == items(
+            "b", 10
+        )
+        assert ("a", 2) not in broker.published
+        assert len(scheduler) == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_first(self):
+        broker = Broker()
+        scheduler = FairScheduler(max_buffered=100)
+        await asyncio.gather(
+            scheduler.submit("a", broker.publish, items("a", 5)),
+            scheduler.submit("a", broker.publish, items("b", 2), priority=1),
+        )
+        # first item is published before the higher priority one is submitted
+        assert [key for key, _ in broker.published] == list("abbaaaa")
+
+    @pytest.mark.asyncio
+    async def test_priority_ahead_of_buffered(self):
+        broker = Broker()
+        scheduler = FairScheduler(max_buffered=5)
+        bulk = asyncio.create_task(
+            scheduler.submit("a", broker.publish, items("a", 50))
+        )
+        await asyncio.sleep(0)
+        assert len(scheduler) == 4
+        await scheduler.submit("b", broker.publish, items("b", 1), priority=1)
+        assert broker.published.index(("b", 0)) <= 2
+        await bulk
+        assert len(broker.published) == 51
@@ -0,0 +1,56 @@
+#!usr/bin/env python3
+import mock
+import pytest
+
+import tests.constants
+from pipo_dispatch.audio_source.source_cache import ClassificationCache
+from pipo_dispatch.audio_source.source_oracle import SourceOracle
+
+
+@pytest.mark.unit
+class TestClassificationCache:
+    @pytest.fixture
+    def classifier(self):
+        return mock.Mock(wraps=SourceOracle.classifier)
+
+    def test_hit(self, classifier, clock):
+        cache = ClassificationCache(classifier, max_entries=10, ttl=60, clock=clock)
+        first = cache.classify(tests.constants.YOUTUBE_URL_1)
+        second = cache.classify(f" {tests.constants.YOUTUBE_URL_1}\n")
+        assert first == second
+        classifier.classify.assert_called_once_with(tests.constants.YOUTUBE_URL_1)
+
+    def test_matches_uncached(self, classifier, clock):
+        cache = ClassificationCache(classifier, max_entries=10, ttl=60, clock=clock)
+        for query in (
+            f" {tests.constants.YOUTUBE_URL_1}\n",
+            f"  {tests.constants.YOUTUBE_QUERY_1} ",
+        ):
+            assert cache.classify(query) == SourceOracle.classifier.classify(query)
+
+    def test_unhandled_query_cached(self, classifier, clock):
+        cache = ClassificationCache(classifier, max_entries=10, ttl=60, clock=clock)
+        assert cache.classify(tests.constants.YOUTUBE_QUERY_0) is None
+        assert cache.classify(tests.constants.YOUTUBE_QUERY_0) is None
+        classifier.classify.assert_called_once()
+
+    def test_expiration(self, classifier, clock):
+        cache = ClassificationCache(classifier, max_entries=10, ttl=60, clock=clock)
+        cache.classify(tests.constants.YOUTUBE_QUERY_1)
+        clock.now = 61
+        cache.classify(tests.constants.YOUTUBE_QUERY_1)
+        assert classifier.classify.call_count == 2
+        assert len(cache) == 1
+
+    def test_least_recently_used_evicted(self, classifier, clock):
+        cache = ClassificationCache(classifier, max_entries=2, ttl=60, clock=clock)
+        cache.classify(tests.constants.YOUTUBE_QUERY_1)
+        cache.classify(tests.constants.YOUTUBE_QUERY_2)
+        cache.classify(tests.constants.YOUTUBE_QUERY_1)
+        cache.classify(tests.constants.SPOTIFY_URL_1)
+        assert len(cache) == 2
+        classifier.classify.reset_mock()
+        cache.classify(tests.constants.YOUTUBE_QUERY_1)
+        classifier.classify.assert_not_called()
+        cache.classify(tests.constants.YOUTUBE_QUERY_2)
+        classifier.classify.assert_called_once_with(tests.constants.YOUTUBE_QUERY_2)
@@ -0,0 +1,190 @@
+#!usr/bin/env python3
+import pytest
+
+import tests.constants
+from pipo_dispatch.audio_source.null_handler import NullHandler
+from pipo_dispatch.audio_source.source_classifier import SourceClassifier
+from pipo_dispatch.audio_source.source_factory import SourceFactory
+from pipo_dispatch.audio_source.source_oracle import SourceOracle
+from pipo_dispatch.audio_source.source_registry import registry
+from pipo_dispatch.audio_source.source_type import SourceType
+from pipo_dispatch.audio_source.spotify_handler import (
+    SpotifyHandler,
+    SpotifyOperations,
+)
+from pipo_dispatch.audio_source.youtube_handler import (
+    YoutubeHandler,
+    YoutubeOperations,
+    YoutubeQueryHandler,
+)
+
+
+@pytest.mark.unit
+class TestSourceClassifier:
+    @pytest.mark.parametrize(
+        "query, handler_type, operation",
+        [
+            (tests.constants.YOUTUBE_URL_1, SourceType.YOUTUBE, YoutubeOperations.URL),
+            (
+                tests.constants.YOUTUBE_URL_NO_HTTPS,
+                SourceType.YOUTUBE,
+                YoutubeOperations.URL,
+            ),
+            (
+                tests.constants.YOUTUBE_PLAYLIST_1,
+                SourceType.YOUTUBE,
+                YoutubeOperations.PLAYLIST,
+            ),
+            (
+                tests.constants.YOUTUBE_PLAYLIST_SOURCE_1,
+                SourceType.YOUTUBE,
+                YoutubeOperations.PLAYLIST,
+            ),
+            ("https://youtu.be/1V_xRb0x9aw", SourceType.YOUTUBE, YoutubeOperations.URL),
+            (
+                "https://MUSIC.youtube.com:443/watch?v=1V_xRb0x9aw",
+                SourceType.YOUTUBE,
+                YoutubeOperations.URL,
+            ),
+            (tests.constants.SPOTIFY_URL_1, SourceType.SPOTIFY, SpotifyOperations.URL),
+            (
+                tests.constants.SPOTIFY_PLAYLIST_1,
+                SourceType.SPOTIFY,
+                SpotifyOperations.URL,
+            ),
+            (
+                tests.constants.YOUTUBE_QUERY_1,
+                SourceType.YOUTUBE,
+                YoutubeOperations.QUERY,
+            ),
+            ("artist: song", SourceType.YOUTUBE, YoutubeOperations.QUERY),
+        ],
+    )
+    def test_classify(self, query, handler_type, operation):
+        result = SourceOracle.classifier.classify(query)
+        assert result.query == query
+        assert result.handler_type == handler_type
+        assert result.operation == operation
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            tests.constants.YOUTUBE_QUERY_0,
+            "https://soundcloud.com/artist/track",
+            "https://notyoutube.com/watch?v=1V_xRb0x9aw",
+            "https:incomplete",
+        ],
+    )
+    def test_classify_unhandled(self, query):
+        assert SourceOracle.classifier.classify(query) is None
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            tests.constants.YOUTUBE_URL_1,
+            tests.constants.YOUTUBE_PLAYLIST_2,
+            tests.constants.SPOTIFY_ALBUM_1,
+            tests.constants.YOUTUBE_QUERY_2,
+            tests.constants.YOUTUBE_QUERY_0,
+        ],
+    )
+    def test_classify_matches_handler_chain(self, query):
+        handlers = YoutubeHandler()
+        handlers.set_next(SpotifyHandler()).set_next(YoutubeQueryHandler())
+        assert SourceOracle.classifier.classify(query) == handlers.handle(query)
+
+    def test_process_queries_skips_unhandled(self):
+        queries = [
+            tests.constants.YOUTUBE_URL_1,
+            tests.constants.YOUTUBE_QUERY_0,
+            tests.constants.SPOTIFY_URL_1,
+        ]
+        result = [pair.query for pair in SourceOracle.process_queries(queries)]
+        assert result == [tests.constants.YOUTUBE_URL_1, tests.constants.SPOTIFY_URL_1]
+
+    @pytest.mark.parametrize(
+        "name, handler",
+        [
+            (SourceType.SPOTIFY, SpotifyHandler),
+            (SourceType.YOUTUBE, YoutubeQueryHandler),
+            (SourceType.NULL, NullHandler),
+            ("unknown", NullHandler),
+        ],
+    )
+    def test_source_factory(self, name, handler):
+        assert SourceFactory.get_source(name) is handler
+
+
+@pytest.mark.unit
+class TestSourceCanonicalization:
+    @pytest.fixture
+    def classifier(self):
+        return SourceClassifier(registry, canonicalize=True)
+
+    @pytest.mark.parametrize(
+        "query, canonical",
+        [
+            (tests.constants.YOUTUBE_URL_1, tests.constants.YOUTUBE_URL_1),
+            (tests.constants.YOUTUBE_URL_NO_HTTPS, tests.constants.YOUTUBE_URL_1),
+            ("https://youtu.be/1V_xRb0x9aw?si=x1", tests.constants.YOUTUBE_URL_1),
+            (
+                "https://music.youtube.com/watch?v=1V_xRb0x9aw&feature=share",
+                tests.constants.YOUTUBE_URL_1,
+            ),
+            (
+                "https://m.youtube.com/shorts/1V_xRb0x9aw?utm_source=x",
+                tests.constants.YOUTUBE_URL_1,
+            ),
+            (tests.constants.YOUTUBE_PLAYLIST_1, tests.constants.YOUTUBE_PLAYLIST_1),
+            (
+                f"{tests.constants.YOUTUBE_PLAYLIST_SOURCE_1}&si=x1",
+                tests.constants.YOUTUBE_PLAYLIST_SOURCE_1,
+            ),
+            (
+                "https://open.spotify.com/intl-pt/track/0q6LuUqGLUiCPP1cbdwFs3?si=x1",
+                tests.constants.SPOTIFY_URL_1,
+            ),
+            (tests.constants.YOUTUBE_QUERY_1, tests.constants.YOUTUBE_QUERY_1),
+        ],
+    )
+    def test_canonical(self, classifier, query, canonical):
+        assert classifier.classify(query).query == canonical
+
+    def test_process_queries_unique(self, classifier):
+        queries = [
+            "https://youtu.be/1V_xRb0x9aw",
+            tests.constants.YOUTUBE_QUERY_1,
+            f"{tests.constants.YOUTUBE_URL_1}&si=x1",
+            tests.constants.YOUTUBE_QUERY_1,
+        ]
+        result = SourceOracle.process_queries(
+            queries, classifier=classifier, unique=True
+        )
+        assert [pair.query for pair in result] == [
+            tests.constants.YOUTUBE_URL_1,
+            tests.constants.YOUTUBE_QUERY_1,
+        ]
+
+
+class TestSourceShuffle:
+    queries = [f"query {index}" for index in range(50)]
+
+    @pytest.mark.parametrize("chunk_size", [None, 1, 7, 50, 100])
+    def test_shuffled_permutation(self, chunk_size):
+        result = list(SourceOracle.shuffled(self.queries, "seed", chunk_size))
+        assert sorted(result) == sorted(self.queries)
+        assert result != self.queries
+
+    def test_shuffled_seeded(self):
+        assert list(SourceOracle.shuffled(self.queries, "seed", 7)) == list(
+            SourceOracle.shuffled(self.queries, "seed", 7)
+        )
+        assert list(SourceOracle.shuffled(self.queries, "seed", 7)) != list(
+            SourceOracle.shuffled(self.queries, "other", 7)
+        )
+
+    def test_process_queries_shuffle_keeps_queries(self):
+        queries = list(self.queries)
+        result = SourceOracle.process_queries(queries, shuffle=True)
+        assert sorted(pair.query for pair in result) == sorted(self.queries)
+        assert queries == self.queries
@@ -0,0 +1,112 @@
+#!usr/bin/env python3
+import json
+import subprocess
+import sys
+
+import pytest
+
+from pipo_dispatch.config import settings
+from pipo_dispatch.startup import StartupProfile
+
+IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import pipo_dispatch._queues
+print(json.dumps({
+    "elapsed": time.perf_counter() - start,
+    "modules": [
+        module for module in sys.modules
+        if module.startswith(("faststream.rabbit.fastapi", "opentelemetry.exporter"))
+    ],
+}))
+"""
+
+STARTUP = """
+import asyncio, json, logging, sys
+from pipo_dispatch.config import settings
+settings.configure(FORCE_ENV_FOR_DYNACONF="test")
+logging.disable(logging.CRITICAL)
+from faststream.rabbit import TestRabbitBroker
+from pipo_dispatch.startup import profile
+from pipo_dispatch._queues import dispatcher_queue, get_broker
+
+async def main():
+    async with TestRabbitBroker(get_broker()) as broker:
+        profile.mark("broker")
+        await broker.publish(
+            {"uuid": "01890f7e-e0b5-7d3e-9a3c-5f0e1c8b2d4a", "server_id": "0",
+             "query": ["query"]},
+            queue=dispatcher_queue,
+        )
+    print(json.dumps({
+        "profile": profile.report(),
+        "modules": [module for module in sys.modules if module.startswith("fastapi")],
+    }))
+
+asyncio.run(main())
+"""
+
+
+def run(script):
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.unit
+class TestStartupProfile:
+    def test_report(self, clock):
+        profile = StartupProfile(clock)
+        clock.now = 1
+        profile.mark("import")
+        clock.now = 1.5
+        profile.mark("router")
+        profile.mark("import")
+        clock.now = 3
+        profile.first_message()
+        profile.first_message()
+        assert profile.report() == {
+            "import": 1,
+            "router": 0.5,
+            "first_message": 1.5,
+            "total": 3,
+        }
+
+
+@pytest.mark.unit
+class TestStartupBudget:
+    def test_import_has_no_side_effects(self):
+        assert run(IMPORT)["modules"] == []
+
+    def test_import_opens_no_progress_store(self, tmp_path, monkeypatch):
+        path = tmp_path / "progress.sqlite"
+        monkeypatch.setenv("PIPO_DISPATCH__PROGRESS__BACKEND", "sqlite")
+        monkeypatch.setenv("PIPO_DISPATCH__PROGRESS__PATH", str(path))
+        run(IMPORT)
+        assert not path.exists()
+
+    def test_import_budget(self):
+        elapsed = min(run(IMPORT)["elapsed"] for _ in range(3))
+        assert elapsed <= settings.startup.budget.import_time
+
+    def test_startup_budget(self):
+        report = run(STARTUP)["profile"]
+        assert list(report) == [
+            "import",
+            "telemetry",
+            "router",
+            "broker",
+            "first_message",
+            "total",
+        ]
+        assert report["total"] <= settings.startup.budget.startup_time
+
+    def test_standalone_without_fastapi(self, monkeypatch):
+        monkeypatch.setenv("PIPO_RUNTIME", "standalone")
+        startup = run(STARTUP)
+        assert startup["modules"] == []
+        assert "first_message" in startup["profile"]
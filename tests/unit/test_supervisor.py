@@ -0,0 +1,101 @@
+#!usr/bin/env python3
+import multiprocessing
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pipo_dispatch.config import settings
+from pipo_dispatch.supervisor import (
+    Supervisor,
+    create_probe_app,
+    prepare_metrics_dir,
+)
+
+
+def ready_worker(worker_id, heartbeats, ready):
+    while True:
+        heartbeats[worker_id] = time.time()
+        ready[worker_id] = True
+        time.sleep(0.01)
+
+
+def exiting_worker(worker_id, heartbeats, ready):
+    heartbeats[worker_id] = time.time()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def context():
+    return multiprocessing.get_context("fork")
+
+
+@pytest.mark.unit
+class TestSupervisor:
+    def test_workers_ready(self, context):
+        supervisor = Supervisor(2, 5, target=ready_worker, context=context)
+        supervisor.start()
+        try:
+            wait_for(supervisor.is_ready)
+            assert supervisor.alive()
+        finally:
+            supervisor.stop(timeout=5)
+        assert not supervisor.alive()
+
+    def test_exited_worker_restarted(self, context):
+        supervisor = Supervisor(1, 5, target=exiting_worker, context=context)
+        supervisor.start()
+        try:
+            wait_for(lambda: not supervisor.alive())
+            assert not supervisor.is_ready()
+            exited = supervisor.heartbeats[0]
+            time.sleep(0.01)
+            supervisor.check()
+            wait_for(lambda: supervisor.heartbeats[0] > exited)
+        finally:
+            supervisor.stop(timeout=5)
+
+    def test_stale_heartbeat(self, context):
+        now = [time.time()]
+        supervisor = Supervisor(
+            1, 5, target=ready_worker, context=context, clock=lambda: now[0]
+        )
+        supervisor.start()
+        try:
+            wait_for(supervisor.is_ready)
+            now[0] += 60
+            assert not supervisor.alive()
+            assert not supervisor.is_ready()
+        finally:
+            supervisor.stop(timeout=5)
+
+    def test_probe_app(self, context, tmp_path, monkeypatch):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        supervisor = Supervisor(2, 5, target=ready_worker, context=context)
+        with TestClient(create_probe_app(supervisor)) as client:
+            wait_for(supervisor.is_ready)
+            response = client.get(settings.probes.liveness.endpoint)
+            assert response.status_code == settings.probes.liveness.status_code
+            assert client.get(settings.probes.readiness.endpoint).status_code == 204
+            response = client.get(f"{settings.telemetry.metrics.endpoint}/")
+            assert response.status_code == 200
+        assert not supervisor.alive()
+
+
+@pytest.mark.unit
+def test_prepare_metrics_dir_keeps_other_files(
+    tmp_path, override_settings, monkeypatch
+):
+    # restored once the test ends, as prepare_metrics_dir exports it
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    (tmp_path / "counter_1.db").write_bytes(b"")
+    (tmp_path / "data.txt").write_text("kept")
+    override_settings("workers.metrics_dir", str(tmp_path))
+    assert prepare_metrics_dir() == str(tmp_path)
+    assert [path.name for path in tmp_path.iterdir()] == ["data.txt"]
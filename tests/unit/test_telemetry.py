@@ -0,0 +1,141 @@
+#!usr/bin/env python3
+import uuid
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, Decision
+from opentelemetry.trace import Status, StatusCode
+from prometheus_client import REGISTRY
+
+from pipo_dispatch.telemetry import (
+    ErrorSpanProcessor,
+    RateLimitedSampler,
+    create_histogram,
+    create_sampler,
+)
+
+
+@pytest.fixture(autouse=True)
+def sdk_enabled(monkeypatch):
+    monkeypatch.delenv("OTEL_SDK_DISABLED", raising=False)
+
+
+def tracer(sampler, always_on_error=False):
+    exporter = InMemorySpanExporter()
+    processor = SimpleSpanProcessor(exporter)
+    if always_on_error:
+        processor = ErrorSpanProcessor(processor)
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(processor)
+    return provider.get_tracer(__name__), exporter
+
+
+@pytest.mark.unit
+class TestSampling:
+    def test_sample_all(self):
+        test_tracer, exporter = tracer(create_sampler())
+        for _ in range(10):
+            with test_tracer.start_as_current_span("root"):
+                pass
+        assert len(exporter.get_finished_spans()) == 10
+
+    def test_sample_none(self):
+        test_tracer, exporter = tracer(create_sampler(ratio=0))
+        for _ in range(10):
+            with test_tracer.start_as_current_span("root") as span:
+                assert not span.is_recording()
+        assert not exporter.get_finished_spans()
+
+    def test_children_follow_parent(self):
+        test_tracer, exporter = tracer(create_sampler(ratio=0.5))
+        for _ in range(50):
+            with test_tracer.start_as_current_span("root"):
+                with test_tracer.start_as_current_span("child"):
+                    pass
+        spans = exporter.get_finished_spans()
+        roots = {span.context.trace_id for span in spans if span.name == "root"}
+        children = {span.context.trace_id for span in spans if span.name == "child"}
+        assert 0 < len(roots) < 50
+        assert roots == children
+
+    def test_rate_limited(self):
+        sampler = RateLimitedSampler(ALWAYS_ON, rate=3)
+        decisions = [
+            sampler.should_sample(None, trace_id, "root").decision
+            for trace_id in range(1, 11)
+        ]
+        assert decisions.count(Decision.RECORD_AND_SAMPLE) == 3
+        assert decisions[3:] == [Decision.DROP] * 7
+
+    def test_rate_limited_records_unsampled_on_error(self):
+        sampler = create_sampler(rate_limit=1, always_on_error=True)
+        test_tracer, exporter = tracer(sampler, always_on_error=True)
+        for _ in range(5):
+            with test_tracer.start_as_current_span("root") as span:
+                assert span.is_recording()
+        assert len(exporter.get_finished_spans()) == 1
+
+
+@pytest.mark.unit
+class TestErrorSpanProcessor:
+    def test_export_unsampled_error(self):
+        test_tracer, exporter = tracer(
+            create_sampler(ratio=0, always_on_error=True), always_on_error=True
+        )
+        with test_tracer.start_as_current_span("ok"):
+            pass
+        with test_tracer.start_as_current_span("root"):
+            with test_tracer.start_as_current_span("failed") as span:
+                span.set_status(Status(StatusCode.ERROR))
+        spans = exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["failed"]
+        assert spans[0].context.trace_flags.sampled
+        assert spans[0].parent is not None
+
+    def test_export_raised_exception(self):
+        test_tracer, exporter = tracer(
+            create_sampler(ratio=0, always_on_error=True), always_on_error=True
+        )
+        with pytest.raises(ValueError), test_tracer.start_as_current_span("root"):
+            raise ValueError
+        (span,) = exporter.get_finished_spans()
+        assert span.status.status_code is StatusCode.ERROR
+        assert span.events[0].name == "exception"
+
+    def test_unsampled_dropped_without_error_recording(self):
+        test_tracer, exporter = tracer(create_sampler(ratio=0), always_on_error=True)
+        with pytest.raises(ValueError), test_tracer.start_as_current_span("root"):
+            raise ValueError
+        assert not exporter.get_finished_spans()
+        assert trace.get_current_span() is trace.INVALID_SPAN
+
+
+@pytest.mark.unit
+class TestHistogram:
+    def test_record_both_registries(self):
+        reader = InMemoryMetricReader()
+        meter = MeterProvider(metric_readers=[reader]).get_meter(__name__)
+        # registered globally, unique across reruns
+        name = f"test.histogram.{uuid.uuid4().hex}"
+        histogram = create_histogram(
+            meter, name, "Test histogram", "s", labels=("stage",)
+        )
+        histogram.record(0.2, {"stage": "a"})
+        histogram.record(0.4, {"stage": "a"})
+        labels = {"stage": "a"}
+        prometheus_name = name.replace(".", "_")
+        assert REGISTRY.get_sample_value(f"{prometheus_name}_count", labels) == 2
+        assert REGISTRY.get_sample_value(
+            f"{prometheus_name}_sum", labels
+        ) == pytest.approx(0.6)
+        (metric,) = (
+            reader.get_metrics_data().resource_metrics[0].scope_metrics[0].metrics
+        )
+        (point,) = metric.data.data_points
+        assert point.count == 2
+        assert point.attributes == labels